@@ -0,0 +1,28 @@
+"""Ajout du champ engine
+
+Revision ID: 5b1f0c7e9a42
+Revises: 2d8d214d3548
+Create Date: 2026-10-17 10:12:37.512904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1f0c7e9a42'
+down_revision: Union[str, Sequence[str], None] = '2d8d214d3548'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('campaigns', sa.Column('engine', sa.String(length=20), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('campaigns', 'engine')
@@ -0,0 +1,42 @@
+"""Empreinte des jetons de rafraîchissement
+
+Revision ID: 7c3e9d41b2f6
+Revises: 5b1f0c7e9a42
+Create Date: 2026-10-17 14:05:12.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e9d41b2f6'
+down_revision: Union[str, Sequence[str], None] = '5b1f0c7e9a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Les jetons expirés ne serviront plus : inutile de les migrer
+    op.execute("DELETE FROM refresh_tokens WHERE expires_at < now()")
+    op.add_column('refresh_tokens', sa.Column('token_hash', sa.String(length=64), nullable=True))
+    op.execute("UPDATE refresh_tokens SET token_hash = encode(sha256(convert_to(token, 'UTF8')), 'hex')")
+    op.alter_column('refresh_tokens', 'token_hash', nullable=False)
+    op.create_unique_constraint('refresh_tokens_token_hash_key', 'refresh_tokens', ['token_hash'])
+    op.drop_constraint('refresh_tokens_token_key', 'refresh_tokens', type_='unique')
+    op.drop_column('refresh_tokens', 'token')
+    op.create_index(op.f('ix_refresh_tokens_expires_at'), 'refresh_tokens', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Les jetons ne peuvent pas être reconstitués à partir de leur empreinte
+    op.drop_index(op.f('ix_refresh_tokens_expires_at'), table_name='refresh_tokens')
+    op.execute("DELETE FROM refresh_tokens")
+    op.add_column('refresh_tokens', sa.Column('token', sa.String(length=512), nullable=False))
+    op.create_unique_constraint('refresh_tokens_token_key', 'refresh_tokens', ['token'])
+    op.drop_constraint('refresh_tokens_token_hash_key', 'refresh_tokens', type_='unique')
+    op.drop_column('refresh_tokens', 'token_hash')
@@ -0,0 +1,49 @@
+"""Horodatage et index des campagnes
+
+Revision ID: 9a4d2e6f1c83
+Revises: 7c3e9d41b2f6
+Create Date: 2026-10-17 16:40:03.902117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4d2e6f1c83'
+down_revision: Union[str, Sequence[str], None] = '7c3e9d41b2f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Horodatage fourni par la base
+    op.alter_column('campaigns', 'created_at', server_default=sa.text('now()'))
+    op.alter_column('campaigns', 'updated_at', server_default=sa.text('now()'))
+
+    # Les doublons de nom existants (créés par mise à jour) sont renommés avant d'ajouter la contrainte
+    op.execute("""
+        UPDATE campaigns SET name = left(name, 39) || ' (' || left(uuid::text, 8) || ')'
+        WHERE uuid IN (
+            SELECT uuid FROM (
+                SELECT uuid, row_number() OVER (PARTITION BY name ORDER BY created_at, uuid) AS rank
+                FROM campaigns WHERE name IS NOT NULL
+            ) AS ranked
+            WHERE rank > 1
+        )
+    """)
+    op.create_unique_constraint('campaigns_name_key', 'campaigns', ['name'])
+    op.create_index('ix_campaigns_created_at_uuid', 'campaigns', ['created_at', 'uuid'], unique=False)
+    op.create_index(op.f('ix_campaigns_updated_at'), 'campaigns', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_campaigns_updated_at'), table_name='campaigns')
+    op.drop_index('ix_campaigns_created_at_uuid', table_name='campaigns')
+    op.drop_constraint('campaigns_name_key', 'campaigns', type_='unique')
+    op.alter_column('campaigns', 'updated_at', server_default=None)
+    op.alter_column('campaigns', 'created_at', server_default=None)
@@ -0,0 +1,77 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Cache en mémoire de taille bornée, avec éviction de l'entrée la moins récemment utilisée.
+
+    Une durée de vie (en secondes) peut être donnée pour tout le cache (`ttl`)
+    ou par entrée (`set(..., ttl=...)`) : une entrée expirée est traitée
+    comme absente. Les lectures sont comptées (`hits` / `misses`).
+
+    Les opérations sont protégées par un verrou : une même instance peut être
+    partagée entre la boucle d'événements et les threads de traitement.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # clé -> (date d'expiration selon time.monotonic(), ou None ; valeur)
+        self._data: OrderedDict[Hashable, tuple[Optional[float], Any]] = OrderedDict()
+        self._lock = Lock()
+
+    def _is_live(self, key: Hashable) -> bool:
+        # À appeler sous le verrou ; retire l'entrée si elle a expiré
+        item = self._data.get(key)
+        if item is None:
+            return False
+        expires_at = item[0]
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return False
+        return True
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if not self._is_live(key):
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return self._data[key][1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if not self._is_live(key):
+                return default
+            return self._data.pop(key)[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Compteurs du cache, pour le suivi de son efficacité."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._is_live(key)
@@ -0,0 +1,182 @@
+import gzip
+import io
+import zlib
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+from fastapi import HTTPException, status
+from starlette.datastructures import Headers
+
+from app.core.config import GZIP_LEVEL, RESPONSE_COMPRESSION_CODECS, UPLOAD_SNIFF_BYTES, ZSTD_LEVEL
+
+try:
+    import zstandard
+except ImportError:  # Compression zstd optionnelle
+    zstandard = None
+
+# Extensions de fichiers compressés, et codec correspondant
+CODEC_EXTENSIONS = {'.gz': 'gzip', '.zst': 'zstd'}
+# Taille du tampon de lecture des flux décompressés
+DECOMPRESSED_BUFFER_SIZE = 1024 * 1024
+
+def available_codecs() -> list[str]:
+    return ['gzip', 'zstd'] if zstandard is not None else ['gzip']
+
+def _check_codec(codec: str) -> str:
+    if codec not in available_codecs():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Compression non supportée : {codec}. Compressions disponibles : {', '.join(available_codecs())}"
+        )
+    return codec
+
+def detect_upload_codec(filename: str, headers: Optional[Headers] = None) -> tuple[Optional[str], str]:
+    """
+    Retourne le codec d'un fichier uploadé (ou None) et son nom sans l'extension de compression.
+
+    Le codec est lu dans l'en-tête Content-Encoding de la partie (ou de la
+    requête pour un corps brut), à défaut dans l'extension du fichier (.gz, .zst).
+    """
+    for extension, codec in CODEC_EXTENSIONS.items():
+        if filename.lower().endswith(extension):
+            return _check_codec(codec), filename[:-len(extension)]
+    encoding = (headers or {}).get("content-encoding", "").strip().lower()
+    if encoding in ("", "identity"):
+        return None, filename
+    if encoding == "x-gzip":
+        encoding = "gzip"
+    return _check_codec(encoding), filename
+
+def decompress_head(head: bytes, codec: Optional[str], max_size: int = UPLOAD_SNIFF_BYTES) -> bytes:
+    """
+    Décompresse autant que possible le début d'un fichier compressé (pour lire son en-tête).
+
+    Au plus `max_size` octets sont produits : un début très compressé (bombe
+    de décompression) n'est pas décompressé en entier en mémoire.
+    """
+    if codec is None:
+        return head
+    try:
+        if codec == 'gzip':
+            return zlib.decompressobj(wbits=31).decompress(head, max_size)
+        # Le décompresseur zstd incrémental n'a pas de limite de sortie : lecture bornée par stream_reader
+        with zstandard.ZstdDecompressor().stream_reader(io.BytesIO(head), read_across_frames=True) as reader:
+            return reader.read(max_size)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Fichier compressé invalide ({codec}) : {e}"
+        )
+
+class _DecompressedStream(io.RawIOBase):
+    """
+    Flux décompressé à la volée, en lecture seule.
+
+    Seul le retour au début du flux est possible (le décompresseur est alors
+    recréé) : c'est ce qu'il faut pour relire la ligne d'en-tête avant l'analyse.
+    """
+
+    def __init__(self, source: BinaryIO, codec: str):
+        self._source = source
+        self._codec = codec
+        self._start = source.tell()
+        self._open()
+
+    def _open(self) -> None:
+        self._source.seek(self._start)
+        if self._codec == 'gzip':
+            self._reader = gzip.GzipFile(fileobj=self._source, mode="rb")
+        else:
+            self._reader = zstandard.ZstdDecompressor().stream_reader(
+                self._source, read_across_frames=True, closefd=False,
+            )
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        """Libère le décompresseur ; le flux compressé n'est pas fermé."""
+        if not self.closed:
+            self._reader.close()
+        super().close()
+
+    def readinto(self, buffer) -> int:
+        data = self._reader.read(len(buffer))
+        size = len(data)
+        buffer[:size] = data
+        self._position += size
+        return size
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("Recherche depuis la fin impossible dans un flux compressé")
+        if offset < self._position:
+            self._open()
+        while self._position < offset:
+            skipped = len(self._reader.read(min(offset - self._position, DECOMPRESSED_BUFFER_SIZE)))
+            if not skipped:
+                break
+            self._position += skipped
+        return self._position
+
+def open_decompressed(source: BinaryIO, codec: Optional[str]) -> BinaryIO:
+    """Retourne un flux lisant `source` décompressé à la volée (ou `source` lui-même sans codec)."""
+    if codec is None:
+        return source
+    return io.BufferedReader(_DecompressedStream(source, codec), buffer_size=DECOMPRESSED_BUFFER_SIZE)
+
+def negotiate_response_codec(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Choisit la compression de la réponse d'après l'en-tête Accept-Encoding du client.
+
+    Les codecs sont essayés dans l'ordre de RESPONSE_COMPRESSION_CODECS ;
+    un codec refusé par le client (q=0) ou indisponible est ignoré.
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for codec in RESPONSE_COMPRESSION_CODECS:
+        if codec in available_codecs() and accepted.get(codec, accepted.get("*", 0.0)) > 0:
+            return codec
+    return None
+
+def compress_stream(chunks: Iterable[bytes], codec: str) -> Iterator[bytes]:
+    """
+    Compresse un flux d'octets bloc par bloc.
+
+    Chaque bloc est compressé dès qu'il est produit : la réponse part au fil
+    du traitement, sans attendre la fin du fichier.
+    """
+    if codec == 'gzip':
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    else:
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    try:
+        for chunk in chunks:
+            output = compressor.compress(chunk)
+            if output:
+                yield output
+        yield compressor.flush()
+    finally:
+        # Client déconnecté : le traitement en amont est interrompu lui aussi
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
@@ -1,10 +1,65 @@
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
 
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()  # Niveau de journalisation de l'application (DEBUG, INFO, WARNING, ERROR)
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true"  # Ajoute l'en-tête Server-Timing aux réponses de traitement
+
 # JWT settings
 SECRET_KEY = os.getenv("SECRET_KEY", "une_cle_secrete_tres_difficile_a_deviner_en_production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30  # Durée de vie du jeton d'accès
-REFRESH_TOKEN_EXPIRE_DAYS = 7   # Durée de vie du jeton de rafraîchissement
\ No newline at end of file
+REFRESH_TOKEN_EXPIRE_DAYS = 7   # Durée de vie du jeton de rafraîchissement
+REFRESH_TOKEN_SWEEP_INTERVAL = int(os.getenv("REFRESH_TOKEN_SWEEP_INTERVAL", "3600"))  # Intervalle de purge des jetons de rafraîchissement expirés, en secondes
+REFRESH_TOKEN_SWEEP_BATCH_SIZE = int(os.getenv("REFRESH_TOKEN_SWEEP_BATCH_SIZE", "1000"))  # Jetons expirés supprimés par transaction lors de la purge
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))  # Jetons d'accès validés gardés en mémoire par get_current_user
+
+# Mots de passe
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))  # Facteur de coût bcrypt des nouveaux hachages (chaque +1 double le temps de calcul)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))  # Hachages bcrypt exécutés simultanément
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))  # Hachages en cours ou en attente au-delà desquels les connexions sont refusées (503)
+
+# LDAP
+LDAP_POOL_SIZE = int(os.getenv("LDAP_POOL_SIZE", "4"))  # Connexions de service LDAP gardées ouvertes (recherches simultanées)
+LDAP_CONNECT_TIMEOUT = int(os.getenv("LDAP_CONNECT_TIMEOUT", "5"))  # Délai de connexion au serveur LDAP, en secondes
+LDAP_RECEIVE_TIMEOUT = int(os.getenv("LDAP_RECEIVE_TIMEOUT", "10"))  # Délai de réponse du serveur LDAP, en secondes
+LDAP_CONFIG_CACHE_SECONDS = int(os.getenv("LDAP_CONFIG_CACHE_SECONDS", "300"))  # Durée avant relecture de la configuration LDAP en base
+LDAP_USER_CACHE_SIZE = int(os.getenv("LDAP_USER_CACHE_SIZE", "10000"))  # Résultats de recherche d'utilisateurs LDAP gardés en mémoire
+LDAP_USER_CACHE_TTL = int(os.getenv("LDAP_USER_CACHE_TTL", "300"))  # Durée de validité d'un utilisateur trouvé, en secondes
+LDAP_USER_NEGATIVE_CACHE_TTL = int(os.getenv("LDAP_USER_NEGATIVE_CACHE_TTL", "30"))  # Durée de validité d'un utilisateur introuvable, en secondes
+
+# Campagnes
+CAMPAIGN_PAGE_SIZE = int(os.getenv("CAMPAIGN_PAGE_SIZE", "50"))  # Campagnes renvoyées par page de la liste, par défaut
+CAMPAIGN_PAGE_SIZE_MAX = int(os.getenv("CAMPAIGN_PAGE_SIZE_MAX", "200"))  # Taille de page maximale acceptée pour la liste des campagnes
+CAMPAIGN_CACHE_SIZE = int(os.getenv("CAMPAIGN_CACHE_SIZE", "1024"))  # Campagnes (et pages de la liste) gardées en mémoire
+CAMPAIGN_CACHE_TTL = int(os.getenv("CAMPAIGN_CACHE_TTL", "60"))  # Durée de validité d'une campagne en cache, en secondes (délai de prise en compte d'une modification faite par un autre processus)
+
+# Traitement des fichiers CSV
+CSV_CHUNK_SIZE = int(os.getenv("CSV_CHUNK_SIZE", "50000"))  # Nombre de lignes lues et traitées par bloc
+CAMPAIGN_PLAN_CACHE_SIZE = int(os.getenv("CAMPAIGN_PLAN_CACHE_SIZE", "256"))  # Nombre de plans de campagne compilés gardés en mémoire
+PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", str(os.cpu_count() or 1)))  # Processus de traitement des gros fichiers (1 = pas de pool)
+DEFAULT_PROCESSING_ENGINE = os.getenv("DEFAULT_PROCESSING_ENGINE", "pandas")  # Moteur d'exécution des règles : "pandas" ou "arrow"
+DEFAULT_CSV_WRITER = os.getenv("DEFAULT_CSV_WRITER", "pandas")  # Écriture du CSV produit : "pandas" (référence) ou "arrow" (plus rapide, guillemets autour de tous les textes)
+OUTPUT_BLOCK_SIZE = int(os.getenv("OUTPUT_BLOCK_SIZE", str(256 * 1024)))  # Taille maximale des blocs d'octets envoyés au client
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))  # Niveau de compression gzip des réponses (1 = rapide, 9 = compact)
+ZSTD_LEVEL = int(os.getenv("ZSTD_LEVEL", "3"))  # Niveau de compression zstd des réponses (1 à 22)
+RESPONSE_COMPRESSION_CODECS = [codec.strip() for codec in os.getenv("RESPONSE_COMPRESSION_CODECS", "zstd,gzip").split(",") if codec.strip()]  # Compressions proposées aux clients, par ordre de préférence (vide = jamais)
+UPLOAD_SNIFF_BYTES = int(os.getenv("UPLOAD_SNIFF_BYTES", str(64 * 1024)))  # Octets lus au plus pour valider l'en-tête d'un upload
+UPLOAD_SPOOL_MAX_SIZE = int(os.getenv("UPLOAD_SPOOL_MAX_SIZE", str(1024 * 1024)))  # Taille au-delà de laquelle un fichier reçu est écrit sur disque plutôt que gardé en mémoire
+UPLOAD_TEMP_DIR = Path(os.environ["UPLOAD_TEMP_DIR"]) if os.getenv("UPLOAD_TEMP_DIR") else None  # Répertoire des fichiers reçus écrits sur disque (vide = répertoire temporaire du système)
+UPLOAD_MEMORY_MAP = os.getenv("UPLOAD_MEMORY_MAP", "true").lower() == "true"  # Lecture des CSV écrits sur disque par projection en mémoire (mmap) plutôt que par appels read()
+
+# Traitements asynchrones (jobs)
+BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
+JOB_SPOOL_DIR = Path(os.getenv("JOB_SPOOL_DIR", BACKEND_DIR / "spool" / "jobs"))  # Fichiers d'entrée et résultats des jobs
+JOB_MAX_CONCURRENCY = int(os.getenv("JOB_MAX_CONCURRENCY", "2"))  # Jobs exécutés simultanément
+JOB_QUEUE_MAX_DEPTH = int(os.getenv("JOB_QUEUE_MAX_DEPTH", "20"))  # Jobs en attente au-delà desquels les uploads sont refusés
+JOB_RETENTION_HOURS = int(os.getenv("JOB_RETENTION_HOURS", "24"))  # Durée de conservation des résultats terminés
+JOB_SHUTDOWN_TIMEOUT = float(os.getenv("JOB_SHUTDOWN_TIMEOUT", "30"))  # Attente maximale des jobs en cours à l'arrêt du serveur, en secondes
+
+# Profilage des traitements (administrateurs)
+PROFILING_ADMINS = {login.strip().lower() for login in os.getenv("PROFILING_ADMINS", "").split(",") if login.strip()}  # Identifiants LDAP autorisés à profiler un traitement (vide = profilage désactivé)
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", BACKEND_DIR / "spool" / "profiles"))  # Profils enregistrés (.pstats et résumé .json)
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))  # Profils conservés ; les plus anciens sont supprimés au-delà
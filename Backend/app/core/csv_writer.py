@@ -0,0 +1,179 @@
+import codecs
+import csv
+import io
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+import pandas as pd
+
+from app.core.config import DEFAULT_CSV_WRITER, OUTPUT_BLOCK_SIZE
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # Écriture Arrow optionnelle
+    pa = None
+
+QUOTING = {
+    "minimal": csv.QUOTE_MINIMAL,  # Seules les valeurs contenant un séparateur, un guillemet ou un saut de ligne
+    "all": csv.QUOTE_ALL,
+    "nonnumeric": csv.QUOTE_NONNUMERIC,
+    "none": csv.QUOTE_NONE,  # Caractères spéciaux précédés de la barre oblique inverse
+}
+LINE_TERMINATORS = {"lf": "\n", "crlf": "\r\n"}
+
+# Équivalents Arrow des styles de guillemets. Arrow entoure toujours de
+# guillemets les valeurs texte : "minimal" et "nonnumeric" deviennent tous deux "needed".
+ARROW_QUOTING = {"minimal": "needed", "nonnumeric": "needed", "all": "all_valid"}
+
+
+@dataclass(frozen=True)
+class OutputDialect:
+    """
+    Format du CSV produit : séparateur, guillemets, fin de ligne, encodage,
+    et writer utilisé (à défaut DEFAULT_CSV_WRITER).
+
+    L'encodage est appliqué directement par le writer (pas de seconde passe
+    de réencodage). "utf-8-sig" ajoute le BOM UTF-8 au début du fichier
+    seulement. Un caractère impossible à représenter dans l'encodage choisi
+    (ex. cp1252) est remplacé par "?" : la réponse est déjà en cours d'envoi
+    quand il est rencontré.
+    """
+    delimiter: str = ","
+    quoting: str = "minimal"
+    line_terminator: str = "lf"
+    encoding: str = "utf-8"
+    writer: Optional[str] = None
+
+    @classmethod
+    def create(
+        cls,
+        delimiter: str = ",",
+        quoting: str = "minimal",
+        line_terminator: str = "lf",
+        encoding: str = "utf-8",
+        writer: Optional[str] = None,
+    ) -> "OutputDialect":
+        """Valide les options d'un format de sortie ; lève ValueError si l'une d'elles est invalide."""
+        if delimiter == "\\t":
+            delimiter = "\t"
+        if len(delimiter) != 1 or delimiter in '"\r\n':
+            raise ValueError(f"Séparateur invalide : {delimiter!r} (un seul caractère, hors guillemet et saut de ligne)")
+        if quoting not in QUOTING:
+            raise ValueError(f"Style de guillemets invalide : {quoting}. Styles disponibles : {', '.join(QUOTING)}")
+        if line_terminator not in LINE_TERMINATORS:
+            raise ValueError(f"Fin de ligne invalide : {line_terminator}. Valeurs possibles : {', '.join(LINE_TERMINATORS)}")
+        try:
+            name = codecs.lookup(encoding).name
+        except LookupError:
+            raise ValueError(f"Encodage inconnu : {encoding}")
+        # Les blocs sont encodés séparément : l'encodage doit être compatible ASCII
+        # et sans marque d'ordre répétée à chaque bloc (UTF-16, UTF-32).
+        if name != "utf-8-sig" and "\n".encode(name) != b"\n":
+            raise ValueError(f"Encodage non pris en charge : {encoding}")
+        if writer is not None and writer not in WRITERS:
+            raise ValueError(f"Writer CSV indisponible : {writer}. Writers disponibles : {', '.join(WRITERS)}")
+        return cls(delimiter=delimiter, quoting=quoting, line_terminator=line_terminator, encoding=name, writer=writer)
+
+    @property
+    def bom(self) -> bytes:
+        return codecs.BOM_UTF8 if self.encoding == "utf-8-sig" else b""
+
+    @property
+    def body_encoding(self) -> str:
+        """Encodage du contenu (le BOM éventuel est écrit à part, une seule fois)."""
+        return "utf-8" if self.encoding == "utf-8-sig" else self.encoding
+
+
+DEFAULT_DIALECT = OutputDialect()
+
+
+class CsvWriter(ABC):
+    """Sérialise un DataFrame traité en octets CSV, au format demandé."""
+    name: str
+
+    def supports(self, dialect: OutputDialect) -> bool:
+        return True
+
+    @abstractmethod
+    def write(self, df: pd.DataFrame, header: bool, dialect: OutputDialect) -> bytes:
+        """Sérialise un bloc ; `header` indique le premier bloc (ligne d'en-tête et BOM éventuel)."""
+
+
+class PandasCsvWriter(CsvWriter):
+    """Writer de référence : DataFrame.to_csv, encodé directement dans un tampon binaire."""
+    name = "pandas"
+
+    def write(self, df: pd.DataFrame, header: bool, dialect: OutputDialect) -> bytes:
+        buffer = io.BytesIO()
+        if header:
+            buffer.write(dialect.bom)
+        df.to_csv(
+            buffer,
+            index=False,
+            header=header,
+            sep=dialect.delimiter,
+            quoting=QUOTING[dialect.quoting],
+            escapechar="\\" if dialect.quoting == "none" else None,
+            lineterminator=LINE_TERMINATORS[dialect.line_terminator],
+            encoding=dialect.body_encoding,
+            errors="replace",
+        )
+        return buffer.getvalue()
+
+
+class ArrowCsvWriter(CsvWriter):
+    """
+    Writer Apache Arrow (pyarrow.csv.write_csv), plus rapide sur les gros blocs.
+
+    Le CSV produit est équivalent mais pas identique octet pour octet à celui
+    de pandas : les valeurs texte sont toujours entre guillemets et les
+    décimaux entiers sont écrits sans ".0". Limité aux encodages UTF-8 et aux
+    styles avec guillemets ; un format non pris en charge est écrit par pandas
+    (voir write_csv).
+    """
+    name = "arrow"
+
+    def supports(self, dialect: OutputDialect) -> bool:
+        # Sans guillemets, Arrow refuse les valeurs contenant un séparateur (pas de caractère d'échappement)
+        return dialect.body_encoding == "utf-8" and dialect.quoting != "none"
+
+    def write(self, df: pd.DataFrame, header: bool, dialect: OutputDialect) -> bytes:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        if header:
+            sink.write(dialect.bom)
+        pa_csv.write_csv(table, sink, pa_csv.WriteOptions(
+            include_header=header,
+            delimiter=dialect.delimiter,
+            quoting_style=ARROW_QUOTING[dialect.quoting],
+            eol=LINE_TERMINATORS[dialect.line_terminator],
+        ))
+        return sink.getvalue().to_pybytes()
+
+
+WRITERS: dict[str, CsvWriter] = {"pandas": PandasCsvWriter()}
+if pa is not None:
+    WRITERS["arrow"] = ArrowCsvWriter()
+
+def write_csv(df: pd.DataFrame, header: bool, dialect: OutputDialect = DEFAULT_DIALECT) -> bytes:
+    """
+    Sérialise un bloc traité avec le writer du format (à défaut DEFAULT_CSV_WRITER).
+
+    Si le writer ne prend pas en charge le format demandé, ou n'est pas
+    installé, le bloc est écrit par pandas.
+    """
+    selected = WRITERS.get(dialect.writer or DEFAULT_CSV_WRITER)
+    if selected is None or not selected.supports(dialect):
+        selected = WRITERS["pandas"]
+    return selected.write(df, header, dialect)
+
+def iter_blocks(data: bytes, block_size: int = OUTPUT_BLOCK_SIZE) -> Iterator[bytes]:
+    """Découpe le CSV d'un bloc de lignes en blocs d'au plus `block_size` octets, envoyés au fil de l'eau."""
+    if len(data) <= block_size:
+        yield data
+        return
+    view = memoryview(data)
+    for start in range(0, len(data), block_size):
+        yield bytes(view[start:start + block_size])
@@ -0,0 +1,255 @@
+import csv
+import time
+from abc import ABC, abstractmethod
+from typing import Any, BinaryIO, Iterator, Optional
+
+import pandas as pd
+from fastapi import HTTPException, status
+
+from app.core.config import DEFAULT_PROCESSING_ENGINE
+from app.core.csv_writer import DEFAULT_DIALECT, OutputDialect, write_csv
+from app.core.file_processor import (
+    CompiledPlan, TextPass, apply_step, check_missing_columns, process_dataframe, step_label,
+)
+from app.core.metrics import StageTimings
+from app.core.sniffing import DEFAULT_INPUT_DIALECT, InputDialect
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:  # Moteur Arrow optionnel
+    pa = None
+
+# Valeurs lues comme nulles, identiques aux `na_values` par défaut de pandas.read_csv
+NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+def parse_header_line(data: bytes, dialect: InputDialect = DEFAULT_INPUT_DIALECT) -> list[str]:
+    """Analyse la ligne d'en-tête contenue au début de `data` (octets CSV au format `dialect`)."""
+    first_line = data.split(b"\n", 1)[0]
+    return next(csv.reader(
+        [dialect.decode(first_line).rstrip("\r")], delimiter=dialect.delimiter, quotechar=dialect.quotechar
+    ), [])
+
+def read_header(source: BinaryIO, dialect: InputDialect = DEFAULT_INPUT_DIALECT) -> list[str]:
+    """Lit la ligne d'en-tête d'un flux CSV sans déplacer la position de lecture."""
+    position = source.tell()
+    first_line = source.readline()
+    source.seek(position)
+    return parse_header_line(first_line, dialect)
+
+
+class ProcessingEngine(ABC):
+    """
+    Interface d'un moteur d'exécution des règles.
+
+    Un moteur lit le CSV par blocs dans sa propre représentation, applique un
+    plan compilé à chaque bloc et sérialise le résultat. Tous les moteurs
+    doivent produire exactement les mêmes octets que PandasEngine.
+    """
+    name: str
+
+    @abstractmethod
+    def read_chunks(
+        self,
+        source: BinaryIO,
+        chunksize: int,
+        columns: Optional[list[str]] = None,
+        dialect: InputDialect = DEFAULT_INPUT_DIALECT,
+    ) -> Iterator[Any]:
+        """
+        Lit le CSV par blocs ; si `columns` est fourni, seules ces colonnes sont analysées.
+
+        Le flux est décodé au fil de la lecture selon `dialect` (encodage,
+        séparateur, guillemets) : le fichier n'est jamais décodé en entier.
+        """
+
+    def from_frames(self, frames: Iterator[pd.DataFrame]) -> Iterator[Any]:
+        """Convertit des blocs lus par pandas (ex. feuilles Excel) dans la représentation du moteur."""
+        return frames
+
+    def num_rows(self, chunk: Any) -> int:
+        return len(chunk)
+
+    @abstractmethod
+    def process(self, chunk: Any, plan: CompiledPlan, timings: Optional[StageTimings] = None) -> pd.DataFrame:
+        """Applique le plan à un bloc ; si `timings` est fourni, y ajoute la durée des règles et de la réorganisation."""
+
+    def to_csv(self, df: pd.DataFrame, header: bool, dialect: OutputDialect = DEFAULT_DIALECT) -> bytes:
+        """Sérialise un bloc traité au format demandé (voir app.core.csv_writer)."""
+        return write_csv(df, header, dialect)
+
+
+class PandasEngine(ProcessingEngine):
+    """Moteur de référence : pandas.read_csv et séries pandas."""
+    name = "pandas"
+
+    def read_chunks(
+        self,
+        source: BinaryIO,
+        chunksize: int,
+        columns: Optional[list[str]] = None,
+        dialect: InputDialect = DEFAULT_INPUT_DIALECT,
+    ) -> Iterator[pd.DataFrame]:
+        # Toutes les colonnes sont lues en texte : le typage ne dépend donc pas du
+        # découpage en blocs et les valeurs non transformées sont restituées telles quelles.
+        return pd.read_csv(
+            source, chunksize=chunksize, dtype=str, usecols=columns,
+            encoding=dialect.encoding, sep=dialect.delimiter, quotechar=dialect.quotechar,
+        )
+
+    def process(self, chunk: pd.DataFrame, plan: CompiledPlan, timings: Optional[StageTimings] = None) -> pd.DataFrame:
+        return process_dataframe(chunk, plan, timings)
+
+
+class ArrowEngine(ProcessingEngine):
+    """
+    Moteur Apache Arrow : lecture CSV multi-thread et noyaux de calcul Arrow.
+
+    Les opérations sans équivalent Arrow strictement identique à pandas
+    (casse de textes non ASCII, MULTIPLY_BY, remplacement d'une chaîne vide)
+    sont déléguées à l'implémentation pandas pour la colonne concernée.
+    """
+    name = "arrow"
+
+    def read_chunks(
+        self,
+        source: BinaryIO,
+        chunksize: int,
+        columns: Optional[list[str]] = None,
+        dialect: InputDialect = DEFAULT_INPUT_DIALECT,
+    ) -> Iterator["pa.Table"]:
+        if columns is None:
+            columns = read_header(source, dialect)
+        reader = pa_csv.open_csv(
+            source,
+            # Arrow lit l'UTF-8 (BOM compris) nativement ; les autres encodages sont transcodés au fil de la lecture
+            read_options=pa_csv.ReadOptions(
+                use_threads=True, encoding="utf8" if dialect.encoding.startswith("utf-8") else dialect.encoding,
+            ),
+            # Sans `newlines_in_values`, un retour à la ligne entre guillemets désynchronise le découpage en blocs
+            parse_options=pa_csv.ParseOptions(
+                delimiter=dialect.delimiter, quote_char=dialect.quotechar, newlines_in_values=True,
+            ),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=columns,
+                column_types={name: pa.string() for name in columns},
+                null_values=NA_VALUES,
+                strings_can_be_null=True,
+                quoted_strings_can_be_null=True,
+            ),
+        )
+        return self._regroup(reader, chunksize)
+
+    @staticmethod
+    def _regroup(reader, chunksize: int) -> Iterator["pa.Table"]:
+        # Les lots Arrow sont découpés en octets : ils sont regroupés par `chunksize` lignes
+        batches, rows = [], 0
+        for batch in reader:
+            batches.append(batch)
+            rows += batch.num_rows
+            if rows >= chunksize:
+                yield pa.Table.from_batches(batches, schema=reader.schema)
+                batches, rows = [], 0
+        if batches or rows == 0:
+            yield pa.Table.from_batches(batches, schema=reader.schema)
+
+    def from_frames(self, frames: Iterator[pd.DataFrame]) -> Iterator["pa.Table"]:
+        for frame in frames:
+            schema = pa.schema([(name, pa.string()) for name in frame.columns])
+            yield pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+
+    def num_rows(self, chunk: "pa.Table") -> int:
+        return chunk.num_rows
+
+    def process(self, chunk: "pa.Table", plan: CompiledPlan, timings: Optional[StageTimings] = None) -> pd.DataFrame:
+        check_missing_columns(plan, chunk.column_names)
+        processed_columns = {}
+        for index, column_plan in enumerate(plan.columns):
+            values = chunk.column(column_plan.name)
+            for step in column_plan.steps:
+                if isinstance(values, pa.ChunkedArray) and isinstance(step, TextPass):
+                    values = self._timed_text_pass(values, step, timings)
+                else:
+                    if isinstance(values, pa.ChunkedArray):
+                        values = values.to_pandas()
+                    values = apply_step(step, values, timings)
+            if isinstance(values, pa.ChunkedArray):
+                values = values.to_pandas(types_mapper=pd.ArrowDtype)
+            processed_columns[index] = values.rename(column_plan.name).reset_index(drop=True)
+        if not processed_columns:
+            return pd.DataFrame(index=range(chunk.num_rows))
+        if timings is None:
+            return pd.concat(processed_columns.values(), axis=1)
+        with timings.measure("reorder"):
+            return pd.concat(processed_columns.values(), axis=1)
+
+    def _timed_text_pass(self, values: "pa.ChunkedArray", text_pass: TextPass, timings: Optional[StageTimings]):
+        if timings is None:
+            return self._text_pass(values, text_pass)
+        start = time.perf_counter()
+        values = self._text_pass(values, text_pass)
+        timings.add_rule(step_label(text_pass), time.perf_counter() - start)
+        return values
+
+    @staticmethod
+    def _needs_pandas(values: "pa.ChunkedArray", text_pass: TextPass) -> bool:
+        """
+        Vrai si la passe doit être exécutée par pandas : Arrow ne change la casse
+        que des caractères ASCII, et remplace une chaîne vide autrement que pandas.
+
+        Une casse appliquée après un préfixe, un suffixe ou un remplacement non
+        ASCII porte aussi sur du texte non ASCII, même si la colonne lue est ASCII.
+        """
+        values_are_ascii = None
+        literals_are_ascii = True
+        for name, *args in text_pass.operations:
+            if name == "replace" and args[0] == "":
+                return True
+            if name in ("replace", "concat"):
+                literals_are_ascii = literals_are_ascii and all(text.isascii() for text in args)
+            elif name in ("upper", "lower"):
+                if not literals_are_ascii:
+                    return True
+                if values_are_ascii is None:
+                    values_are_ascii = pc.all(pc.string_is_ascii(values)).as_py() is not False
+                if not values_are_ascii:
+                    return True
+        return False
+
+    @staticmethod
+    def _text_pass(values: "pa.ChunkedArray", text_pass: TextPass):
+        if ArrowEngine._needs_pandas(values, text_pass):
+            return text_pass(values.to_pandas())
+
+        values = pc.fill_null(values, "")
+        for name, *args in text_pass.operations:
+            if name == "upper":
+                values = pc.ascii_upper(values)
+            elif name == "lower":
+                values = pc.ascii_lower(values)
+            elif name == "replace":
+                old, new = args
+                values = pc.replace_substring(values, pattern=old, replacement=new)
+            elif name == "concat":
+                prefix, suffix = args
+                values = pc.binary_join_element_wise(prefix, values, suffix, "")
+        return values
+
+
+ENGINES: dict[str, ProcessingEngine] = {"pandas": PandasEngine()}
+if pa is not None:
+    ENGINES["arrow"] = ArrowEngine()
+
+def get_processing_engine(name: Optional[str] = None) -> ProcessingEngine:
+    """Retourne le moteur demandé, ou le moteur par défaut si aucun n'est précisé."""
+    engine = ENGINES.get(name or DEFAULT_PROCESSING_ENGINE)
+    if engine is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Moteur de traitement indisponible : {name}. Moteurs disponibles : {', '.join(ENGINES)}"
+        )
+    return engine
@@ -0,0 +1,33 @@
+import hashlib
+
+from fastapi import Request, Response, status
+
+# Les réponses peuvent être gardées par le navigateur, mais doivent être revalidées (If-None-Match) à chaque usage
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(*parts) -> str:
+    """ETag fort calculé à partir des éléments qui identifient une version de la ressource."""
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Indique si l'en-tête If-None-Match du client correspond déjà à `etag`."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match utilise la comparaison faible : le préfixe W/ est ignoré
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return etag in candidates
+
+def not_modified(etag: str) -> Response:
+    """Réponse 304 sans corps."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -0,0 +1,196 @@
+from datetime import date, datetime, time
+from typing import Any, BinaryIO, Iterable, Iterator, Optional
+
+import pandas as pd
+from fastapi import HTTPException, status
+
+from app.core.engines import NA_VALUES
+
+try:
+    import openpyxl
+except ImportError:  # Lecture des fichiers .xlsx optionnelle
+    openpyxl = None
+
+try:
+    import xlrd
+except ImportError:  # Lecture des fichiers .xls optionnelle
+    xlrd = None
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+
+_NA_VALUES = set(NA_VALUES)
+
+def is_excel_filename(filename: str) -> bool:
+    return filename.lower().endswith(EXCEL_EXTENSIONS)
+
+def csv_filename(filename: str) -> str:
+    """Nom du CSV produit à partir d'un fichier : un classeur Excel garde son nom, avec l'extension .csv."""
+    if is_excel_filename(filename):
+        return filename.rsplit('.', 1)[0] + '.csv'
+    return filename
+
+def _cell_to_text(value: Any) -> Optional[str]:
+    """
+    Convertit une valeur de cellule en texte, comme si la feuille avait été exportée en CSV.
+
+    Les cellules vides, et les textes que pandas.read_csv lirait comme nuls, deviennent None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime):
+        if value.time() == time(0):
+            return value.date().isoformat()
+        return value.isoformat(sep=" ")
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    text = str(value)
+    return None if text in _NA_VALUES else text
+
+def _unknown_sheet(sheet: str, sheet_names: list[str]) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Feuille introuvable : {sheet}. Feuilles disponibles : {', '.join(sheet_names)}"
+    )
+
+def _missing_reader(package: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Lecture des fichiers Excel indisponible sur ce serveur (paquet {package} manquant)."
+    )
+
+def _iter_xlsx_rows(source: BinaryIO, sheet: Optional[str]) -> Iterator[tuple]:
+    if openpyxl is None:
+        raise _missing_reader("openpyxl")
+    # Mode lecture seule : les lignes sont lues au fil du XML, sans charger la feuille en mémoire
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        if sheet is None:
+            worksheet = workbook.worksheets[0]
+        elif sheet in workbook.sheetnames:
+            worksheet = workbook[sheet]
+        else:
+            raise _unknown_sheet(sheet, workbook.sheetnames)
+        yield from worksheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+def _iter_xls_rows(source: BinaryIO, sheet: Optional[str]) -> Iterator[tuple]:
+    if xlrd is None:
+        raise _missing_reader("xlrd")
+    # Le format .xls est limité à 65 536 lignes : le fichier est lu en une fois
+    workbook = xlrd.open_workbook(file_contents=source.read(), on_demand=True)
+    try:
+        sheet_names = workbook.sheet_names()
+        if sheet is None:
+            worksheet = workbook.sheet_by_index(0)
+        elif sheet in sheet_names:
+            worksheet = workbook.sheet_by_name(sheet)
+        else:
+            raise _unknown_sheet(sheet, sheet_names)
+        for index in range(worksheet.nrows):
+            row = []
+            for cell in worksheet.row(index):
+                if cell.ctype == xlrd.XL_CELL_DATE:
+                    row.append(xlrd.xldate.xldate_as_datetime(cell.value, workbook.datemode))
+                elif cell.ctype == xlrd.XL_CELL_BOOLEAN:
+                    row.append(bool(cell.value))
+                elif cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+                    row.append(None)
+                else:
+                    row.append(cell.value)
+            yield tuple(row)
+    finally:
+        workbook.release_resources()
+
+def _iter_rows(source: BinaryIO, filename: str, sheet: Optional[str]) -> Iterator[tuple]:
+    if filename.lower().endswith('.xls'):
+        return _iter_xls_rows(source, sheet)
+    return _iter_xlsx_rows(source, sheet)
+
+def _header(row: Optional[tuple]) -> list[str]:
+    if row is None:
+        return []
+    return [_cell_to_text(value) or "" for value in row]
+
+def list_sheets(source: BinaryIO, filename: str) -> list[str]:
+    """Retourne le nom des feuilles d'un classeur."""
+    position = source.tell()
+    try:
+        if filename.lower().endswith('.xls'):
+            if xlrd is None:
+                raise _missing_reader("xlrd")
+            workbook = xlrd.open_workbook(file_contents=source.read(), on_demand=True)
+            try:
+                return workbook.sheet_names()
+            finally:
+                workbook.release_resources()
+        if openpyxl is None:
+            raise _missing_reader("openpyxl")
+        workbook = openpyxl.load_workbook(source, read_only=True)
+        try:
+            return workbook.sheetnames
+        finally:
+            workbook.close()
+    finally:
+        source.seek(position)
+
+def read_excel_header(source: BinaryIO, filename: str, sheet: Optional[str] = None) -> list[str]:
+    """Lit la ligne d'en-tête d'une feuille sans déplacer la position de lecture."""
+    position = source.tell()
+    rows = _iter_rows(source, filename, sheet)
+    try:
+        return _header(next(rows, None))
+    finally:
+        rows.close()
+        source.seek(position)
+
+def _to_frame(rows: Iterable[tuple], names: list[str], indices: list[int]) -> pd.DataFrame:
+    records = [
+        [_cell_to_text(row[i]) if i < len(row) else None for i in indices]
+        for row in rows
+    ]
+    # Colonnes texte, comme pour un CSV lu avec dtype=str
+    return pd.DataFrame(records, columns=names, dtype="str")
+
+def read_excel_chunks(
+    source: BinaryIO,
+    filename: str,
+    chunksize: int,
+    columns: Optional[list[str]] = None,
+    sheet: Optional[str] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Lit une feuille Excel par blocs de `chunksize` lignes, sous forme de DataFrames texte.
+
+    La première ligne de la feuille est l'en-tête. Si `columns` est fourni,
+    seules ces colonnes sont conservées. Les lignes entièrement vides sont
+    ignorées, comme les lignes vides d'un CSV.
+    """
+    rows = _iter_rows(source, filename, sheet)
+    try:
+        header = _header(next(rows, None))
+        if columns is None:
+            columns = header
+        positions = {}
+        for index, name in enumerate(header):
+            positions.setdefault(name, index)
+        names = [name for name in columns if name in positions]
+        indices = [positions[name] for name in names]
+
+        batch, yielded = [], False
+        for row in rows:
+            if all(value is None or value == "" for value in row):
+                continue
+            batch.append(row)
+            if len(batch) >= chunksize:
+                yield _to_frame(batch, names, indices)
+                batch, yielded = [], True
+        # Une feuille sans données produit tout de même un bloc vide (en-tête seul)
+        if batch or not yielded:
+            yield _to_frame(batch, names, indices)
+    finally:
+        rows.close()
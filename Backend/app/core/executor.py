@@ -0,0 +1,115 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from app.core.config import PROCESS_POOL_WORKERS
+from app.core.csv_writer import DEFAULT_DIALECT, OutputDialect
+from app.core.engines import get_processing_engine
+from app.core.file_processor import CompiledPlan
+from app.core.metrics import StageTimings
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = Lock()
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Retourne le pool de processus partagé, créé au premier usage.
+
+    Retourne None si PROCESS_POOL_WORKERS <= 1 : les blocs sont alors traités
+    dans le thread appelant.
+    """
+    global _pool
+    if PROCESS_POOL_WORKERS <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # "spawn" plutôt que "fork" : le serveur est multi-threadé au moment de la création du pool
+            _pool = ProcessPoolExecutor(
+                max_workers=PROCESS_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+def shutdown_process_pool() -> None:
+    """Arrête le pool de processus (appelé à l'arrêt de l'application)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+def process_partition(
+    chunk: Any,
+    plan: CompiledPlan,
+    header: bool = False,
+    engine_name: Optional[str] = None,
+    dialect: OutputDialect = DEFAULT_DIALECT,
+) -> tuple[bytes, StageTimings]:
+    """
+    Traite une partition de lignes avec le moteur donné et la sérialise en CSV, au format `dialect`.
+
+    Exécutée dans un processus du pool : la transformation et la sérialisation
+    se font toutes deux hors du processus serveur. Les durées des règles, de
+    la réorganisation et de la sérialisation sont renvoyées avec le CSV.
+    """
+    engine = get_processing_engine(engine_name)
+    timings = StageTimings(rows=engine.num_rows(chunk))
+    df = engine.process(chunk, plan, timings)
+    with timings.measure("serialize"):
+        output = engine.to_csv(df, header=header, dialect=dialect)
+    timings.bytes_written = len(output)
+    return output, timings
+
+def map_partitions(
+    partitions: Iterable[Any],
+    plan: CompiledPlan,
+    progress: Optional[Callable[[int, int], None]] = None,
+    engine_name: Optional[str] = None,
+    timings: Optional[StageTimings] = None,
+    parallel: bool = True,
+    dialect: OutputDialect = DEFAULT_DIALECT,
+) -> Iterator[bytes]:
+    """
+    Traite des partitions successives en parallèle et restitue le CSV dans l'ordre d'origine.
+
+    Au plus deux partitions par processus sont en vol à un instant donné :
+    la mémoire reste bornée même si la lecture est plus rapide que le traitement.
+    `progress(lignes, octets)` est appelé pour chaque partition restituée ;
+    les durées mesurées dans chaque partition sont ajoutées à `timings`.
+    Si `parallel` est faux, les partitions sont traitées dans le thread
+    appelant (traitement profilé : voir app.core.profiling).
+    """
+    engine = get_processing_engine(engine_name)
+
+    def emit(rows: int, result: tuple[bytes, StageTimings]) -> bytes:
+        output, partition_timings = result
+        if timings is not None:
+            timings.merge(partition_timings)
+        if progress is not None:
+            progress(rows, len(output))
+        return output
+
+    pool = get_process_pool() if parallel else None
+    if pool is None:
+        for chunk in partitions:
+            yield emit(engine.num_rows(chunk), process_partition(chunk, plan, engine_name=engine.name, dialect=dialect))
+        return
+
+    max_pending = PROCESS_POOL_WORKERS * 2
+    pending: deque[tuple[int, Future]] = deque()
+    try:
+        for chunk in partitions:
+            future = pool.submit(process_partition, chunk, plan, engine_name=engine.name, dialect=dialect)
+            pending.append((engine.num_rows(chunk), future))
+            if len(pending) >= max_pending:
+                rows, future = pending.popleft()
+                yield emit(rows, future.result())
+        while pending:
+            rows, future = pending.popleft()
+            yield emit(rows, future.result())
+    finally:
+        # Client déconnecté ou erreur : les partitions restantes ne servent plus
+        for _, future in pending:
+            future.cancel()
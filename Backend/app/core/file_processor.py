@@ -1,6 +1,11 @@
+import time
 import pandas as pd
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Optional
 from fastapi import HTTPException, status
-from io import StringIO
+
+if TYPE_CHECKING:
+    from app.core.metrics import StageTimings
 
 # Simule la structure de vos modèles/schémas pour la clarté
 # Dans votre code, vous importeriez vos vrais schémas Pydantic ou modèles SQLAlchemy
@@ -14,69 +19,293 @@ class CampaignColumn:
         self.name = name
         self.rules = rules
 
-def apply_rule(series: pd.Series, rule: ColumnRule) -> pd.Series:
-    """Applique une seule règle à une colonne (Series) de Pandas."""
-    if rule.type == 'TO_UPPERCASE':
-        return series.fillna("").astype(str).str.upper()
-    if rule.type == 'TO_LOWERCASE':
-        return series.fillna("").astype(str).str.lower()
-    if rule.type == 'ADD_PREFIX':
-        return str(rule.value) + series.astype(str)
-    if rule.type == 'ADD_SUFFIX':
-        return series.astype(str) + str(rule.value)
-    if rule.type == 'REPLACE_TEXT':
-        # S'attend à une valeur comme "ancien_texte,nouveau_texte"
-        try:
-            old, new = str(rule.value).split(',', 1)
-            return series.str.replace(old, new, regex=False)
-        except (ValueError, TypeError):
-            # Ignore la règle si la valeur est mal formatée
-            return series
-    if rule.type == 'MULTIPLY_BY':
-        try:
-            # Tente de convertir la colonne en numérique, ignorant les erreurs
-            numeric_series = pd.to_numeric(series, errors='coerce')
-            return numeric_series * float(rule.value)
-        except (ValueError, TypeError):
-            # Si la multiplication échoue, retourne la colonne originale
-            return series
+# --- Implémentations vectorisées des règles ---
+# Fonctions de module (et non des lambdas) pour que les plans compilés restent sérialisables.
+
+def _to_uppercase(series: pd.Series) -> pd.Series:
+    return series.fillna("").astype(str).str.upper()
+
+def _to_lowercase(series: pd.Series) -> pd.Series:
+    return series.fillna("").astype(str).str.lower()
+
+def _add_prefix(prefix: str, series: pd.Series) -> pd.Series:
+    return prefix + series.astype(str)
+
+def _add_suffix(suffix: str, series: pd.Series) -> pd.Series:
+    return series.astype(str) + suffix
+
+def _replace_text(old_new: tuple[str, str], series: pd.Series) -> pd.Series:
+    old, new = old_new
+    return series.str.replace(old, new, regex=False)
+
+def _multiply_by(factor: float, series: pd.Series) -> pd.Series:
+    # Tente de convertir la colonne en numérique, ignorant les erreurs
+    numeric_series = pd.to_numeric(series, errors='coerce')
+    return numeric_series * factor
+
+# --- Analyse des valeurs de règles ---
+# Chaque analyseur valide et pré-calcule la valeur d'une règle une seule fois.
+# Il lève ValueError / TypeError si la valeur est inutilisable : la règle est alors ignorée.
+
+def _parse_replace_text(value) -> tuple[str, str]:
+    # S'attend à une valeur comme "ancien_texte,nouveau_texte"
+    old, new = str(value).split(',', 1)
+    return old, new
+
+RULE_PARSERS: dict[str, Callable[[any], any]] = {
+    'TO_UPPERCASE': lambda value: None,
+    'TO_LOWERCASE': lambda value: None,
+    'ADD_PREFIX': str,
+    'ADD_SUFFIX': str,
+    'REPLACE_TEXT': _parse_replace_text,
+    'MULTIPLY_BY': float,
+}
+
+RULE_FUNCTIONS: dict[str, Callable[..., pd.Series]] = {
+    'TO_UPPERCASE': _to_uppercase,
+    'TO_LOWERCASE': _to_lowercase,
+    'ADD_PREFIX': _add_prefix,
+    'ADD_SUFFIX': _add_suffix,
+    'REPLACE_TEXT': _replace_text,
+    'MULTIPLY_BY': _multiply_by,
+}
+
+# Règles qui produisent du texte et peuvent être fusionnées en une seule passe
+TEXT_RULES = {'TO_UPPERCASE', 'TO_LOWERCASE', 'ADD_PREFIX', 'ADD_SUFFIX', 'REPLACE_TEXT'}
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """Règle validée, avec sa valeur déjà analysée."""
+    type: str
+    value: any = None
+
+    def apply(self, series: pd.Series) -> pd.Series:
+        function = RULE_FUNCTIONS[self.type]
+        if self.value is None:
+            return function(series)
+        return function(self.value, series)
+
+# --- Passe d'optimisation : fusion des règles texte ---
+# Les opérations ci-dessous supposent une colonne déjà convertie en texte, sans valeurs nulles.
+
+def _str_upper(series: pd.Series) -> pd.Series:
+    return series.str.upper()
+
+def _str_lower(series: pd.Series) -> pd.Series:
+    return series.str.lower()
+
+def _upper_literal(text: str) -> str:
+    # Passe par le même noyau que la colonne (Python ou Arrow selon le dtype texte de pandas),
+    # qui ne traitent pas tous certains caractères de la même façon (ex. "ß").
+    return _str_upper(pd.Series([text]).astype(str)).iloc[0]
+
+def _str_concat(prefix: str, suffix: str, series: pd.Series) -> pd.Series:
+    if prefix:
+        series = prefix + series
+    if suffix:
+        series = series + suffix
     return series
 
-def process_dataframe(df: pd.DataFrame, campaign_config: list[CampaignColumn]) -> pd.DataFrame:
+def _str_replace(old: str, new: str, series: pd.Series) -> pd.Series:
+    return series.str.replace(old, new, regex=False)
+
+# Opérations d'une passe texte : ("upper",), ("lower",), ("replace", ancien, nouveau), ("concat", préfixe, suffixe).
+# Décrites par des tuples pour que chaque moteur (voir app.core.engines) puisse les exécuter avec ses propres noyaux.
+TEXT_OPERATIONS: dict[str, Callable[..., pd.Series]] = {
+    'upper': _str_upper,
+    'lower': _str_lower,
+    'replace': _str_replace,
+    'concat': _str_concat,
+}
+
+@dataclass(frozen=True)
+class TextPass:
     """
-    Valide, transforme et réorganise un DataFrame Pandas selon la configuration d'une campagne.
+    Suite de règles texte consécutives, exécutée en une seule passe sur la colonne.
+
+    La colonne est convertie en texte une seule fois, puis chaque opération
+    travaille directement sur le résultat précédent.
     """
-    # 1. Validation des colonnes
-    expected_columns = {col.name for col in campaign_config}
-    missing_columns = expected_columns - set(df.columns)
+    operations: tuple[tuple, ...]
+    # Types des règles fusionnées, pour les mesures de durée par règle
+    rule_types: tuple[str, ...] = ()
+
+    def __call__(self, series: pd.Series) -> pd.Series:
+        series = series.fillna("").astype(str)
+        for name, *args in self.operations:
+            series = TEXT_OPERATIONS[name](*args, series)
+        return series
+
+def _fuse_text_rules(rules: list[CompiledRule]) -> TextPass:
+    """
+    Réécrit une suite de règles texte en un minimum d'opérations vectorisées.
+
+    Les préfixes et suffixes sont accumulés puis concaténés en une fois.
+    TO_UPPERCASE s'applique caractère par caractère : il est appliqué directement
+    aux préfixes/suffixes en attente, qui restent donc regroupés.
+    TO_LOWERCASE (sigma final dépendant du contexte) et REPLACE_TEXT (motif à
+    cheval sur un préfixe) ne le sont pas : les littéraux en attente sont
+    concaténés avant eux pour conserver exactement le résultat de la règle.
+    """
+    operations = []
+    prefix, suffix = "", ""
+
+    def flush():
+        nonlocal prefix, suffix
+        if prefix or suffix:
+            operations.append(('concat', prefix, suffix))
+            prefix, suffix = "", ""
+
+    for rule in rules:
+        if rule.type == 'ADD_PREFIX':
+            prefix = rule.value + prefix
+        elif rule.type == 'ADD_SUFFIX':
+            suffix = suffix + rule.value
+        elif rule.type == 'TO_UPPERCASE':
+            prefix, suffix = _upper_literal(prefix), _upper_literal(suffix)
+            operations.append(('upper',))
+        elif rule.type == 'TO_LOWERCASE':
+            flush()
+            operations.append(('lower',))
+        elif rule.type == 'REPLACE_TEXT':
+            flush()
+            operations.append(('replace', *rule.value))
+    flush()
+    return TextPass(operations=tuple(operations), rule_types=tuple(rule.type for rule in rules))
+
+def optimize_rules(rules: tuple[CompiledRule, ...]) -> tuple[Callable[[pd.Series], pd.Series], ...]:
+    """Regroupe les règles texte consécutives en passes fusionnées ; les autres restent telles quelles."""
+    steps = []
+    pending_text_rules = []
+    for rule in rules:
+        if rule.type in TEXT_RULES:
+            pending_text_rules.append(rule)
+            continue
+        if pending_text_rules:
+            steps.append(_fuse_text_rules(pending_text_rules))
+            pending_text_rules = []
+        steps.append(rule.apply)
+    if pending_text_rules:
+        steps.append(_fuse_text_rules(pending_text_rules))
+    return tuple(steps)
+
+def step_label(step: Callable[[pd.Series], pd.Series]) -> str:
+    """Nom d'une étape pour les mesures : type de la règle, ou types des règles d'une passe texte fusionnée."""
+    if isinstance(step, TextPass):
+        return "+".join(step.rule_types) or "TEXT"
+    rule = getattr(step, "__self__", None)
+    if isinstance(rule, CompiledRule):
+        return rule.type
+    return getattr(step, "__name__", type(step).__name__)
+
+@dataclass(frozen=True)
+class CompiledColumn:
+    """Colonne de sortie, ses règles validées et les étapes optimisées qui les exécutent."""
+    name: str
+    rules: tuple[CompiledRule, ...]
+    steps: tuple[Callable[[pd.Series], pd.Series], ...] = ()
+
+@dataclass(frozen=True)
+class CompiledPlan:
+    """Configuration de campagne compilée : immuable et réutilisable entre les requêtes."""
+    columns: tuple[CompiledColumn, ...]
+    # Moteur d'exécution préféré par la campagne (voir app.core.engines), None = moteur par défaut
+    engine: Optional[str] = None
+
+    @property
+    def output_columns(self) -> list[str]:
+        return [col.name for col in self.columns]
+
+    @property
+    def input_columns(self) -> list[str]:
+        """Colonnes du fichier source réellement utilisées, sans doublons : les seules à lire."""
+        return list(dict.fromkeys(self.output_columns))
+
+def compile_rule(rule: ColumnRule) -> Optional[CompiledRule]:
+    """Compile une règle, ou retourne None si elle est inconnue ou mal formatée."""
+    parser = RULE_PARSERS.get(rule.type)
+    if parser is None:
+        return None
+    try:
+        value = parser(rule.value)
+    except (ValueError, TypeError):
+        return None
+    return CompiledRule(type=rule.type, value=value)
+
+def compile_columns(campaign_config: list[CampaignColumn], engine: Optional[str] = None) -> CompiledPlan:
+    """Compile une configuration de campagne en un plan d'exécution optimisé."""
+    columns = []
+    for column_config in campaign_config:
+        compiled_rules = (compile_rule(rule) for rule in column_config.rules)
+        rules = tuple(rule for rule in compiled_rules if rule is not None)
+        columns.append(CompiledColumn(
+            name=column_config.name,
+            rules=rules,
+            steps=optimize_rules(rules),
+        ))
+    return CompiledPlan(columns=tuple(columns), engine=engine)
+
+def check_missing_columns(plan: CompiledPlan, columns) -> None:
+    """Lève une erreur 400 si des colonnes attendues par la campagne sont absentes."""
+    expected_columns = set(plan.output_columns)
+    missing_columns = expected_columns - set(columns)
     if missing_columns:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Colonnes manquantes dans le fichier importé : {', '.join(missing_columns)}"
         )
 
+def apply_rule(series: pd.Series, rule: ColumnRule) -> pd.Series:
+    """Applique une seule règle à une colonne (Series) de Pandas."""
+    compiled_rule = compile_rule(rule)
+    if compiled_rule is None:
+        return series
+    return compiled_rule.apply(series)
+
+def process_dataframe(
+    df: pd.DataFrame,
+    campaign_config: CompiledPlan | list[CampaignColumn],
+    timings: Optional["StageTimings"] = None,
+) -> pd.DataFrame:
+    """
+    Valide, transforme et réorganise un DataFrame Pandas selon la configuration d'une campagne.
+
+    `campaign_config` peut être un plan déjà compilé (voir app.core.plan_cache) ;
+    une liste de CampaignColumn est compilée à la volée.
+    Si `timings` est fourni, la durée de chaque règle et de la réorganisation y est ajoutée.
+    """
+    if isinstance(campaign_config, CompiledPlan):
+        plan = campaign_config
+    else:
+        plan = compile_columns(campaign_config)
+
+    # 1. Validation des colonnes
+    check_missing_columns(plan, df.columns)
+
     # 2. Application des règles de calcul
-    for column_config in campaign_config:
-        col_name = column_config.name
-        if col_name in df.columns:
-            # S'assure que la colonne est de type string pour les manipulations de texte
-            if not pd.api.types.is_numeric_dtype(df[col_name]):
-                 df[col_name] = df[col_name].astype(str).fillna('')
-            print("application des règle de calcul", column_config.rules)
-            for rule in column_config.rules:
-                df[col_name] = apply_rule(df[col_name], rule)
-                print(f"📌 Application règle {rule.type} sur colonne {col_name}")
+    # Chaque colonne est transformée hors du DataFrame source puis écrite une seule
+    # fois dans le résultat : pas de réaffectation dans `df` après chaque règle.
+    processed_columns = []
+    for column_plan in plan.columns:
+        series = df[column_plan.name]
+        for step in column_plan.steps:
+            series = apply_step(step, series, timings)
+        processed_columns.append(series.rename(column_plan.name))
 
     # 3. Réorganisation et sélection des colonnes
-    print(f"📌 Réorganisation des colonnes : {campaign_config}")
-    final_column_order = [col.name for col in campaign_config]
-    print(f"📌 Réorganisation des colonnes : {final_column_order}")
-    # S'assure que toutes les colonnes de l'ordre final existent avant de réorganiser
-    print("📌 Colonnes attendues :", final_column_order)
-    print("📌 Colonnes présentes dans df :", list(df.columns))
-
-    final_columns_in_df = [col for col in final_column_order if col in df.columns]
-    print("📌 Colonnes retenues :", final_columns_in_df)
-    processed_df = df[final_columns_in_df]
-
-    return processed_df
\ No newline at end of file
+    # Le résultat est assemblé directement dans l'ordre final, sans copie intermédiaire de `df`.
+    if not processed_columns:
+        return pd.DataFrame(index=df.index)
+    if timings is None:
+        return pd.concat(processed_columns, axis=1)
+    with timings.measure("reorder"):
+        return pd.concat(processed_columns, axis=1)
+
+def apply_step(step: Callable, series, timings: Optional["StageTimings"] = None):
+    """Exécute une étape d'une colonne, en mesurant sa durée si `timings` est fourni."""
+    if timings is None:
+        return step(series)
+    start = time.perf_counter()
+    result = step(series)
+    timings.add_rule(step_label(step), time.perf_counter() - start)
+    return result
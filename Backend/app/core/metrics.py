@@ -0,0 +1,168 @@
+import io
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import BinaryIO, Iterator, Optional
+
+try:
+    import prometheus_client
+except ImportError:  # Export Prometheus optionnel
+    prometheus_client = None
+
+# Étapes du traitement d'un fichier, dans l'ordre du pipeline
+STAGES = ("upload", "decode", "parse", "rules", "reorder", "serialize")
+
+# Traitements de quelques millisecondes à plusieurs minutes
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+@dataclass
+class StageTimings:
+    """
+    Durées cumulées (en secondes) des étapes d'un traitement, et volumes traités.
+
+    Sérialisable : un processus du pool renvoie les durées de sa partition,
+    qui sont ajoutées à celles du traitement (voir merge).
+    """
+    stages: dict[str, float] = field(default_factory=dict)
+    # Durée par règle ; les règles texte fusionnées en une passe sont comptées ensemble ("ADD_PREFIX+TO_UPPERCASE")
+    rules: dict[str, float] = field(default_factory=dict)
+    rows: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def add_rule(self, rule: str, seconds: float) -> None:
+        self.rules[rule] = self.rules.get(rule, 0.0) + seconds
+        self.add("rules", seconds)
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def merge(self, other: "StageTimings") -> None:
+        for stage, seconds in other.stages.items():
+            self.add(stage, seconds)
+        for rule, seconds in other.rules.items():
+            self.rules[rule] = self.rules.get(rule, 0.0) + seconds
+        self.rows += other.rows
+        self.bytes_read += other.bytes_read
+        self.bytes_written += other.bytes_written
+
+    def server_timing(self) -> str:
+        """Valeur de l'en-tête Server-Timing (durées en millisecondes)."""
+        return ", ".join(
+            f"{stage};dur={self.stages[stage] * 1000:.1f}" for stage in STAGES if stage in self.stages
+        )
+
+
+class MeteredReader(io.RawIOBase):
+    """
+    Flux en lecture qui mesure le temps passé à lire `source` (étape "decode")
+    et compte les octets lus.
+
+    Placé après la décompression : le temps mesuré est celui de la lecture du
+    fichier reçu et de sa décompression, les octets sont ceux du CSV décompressé.
+    """
+
+    def __init__(self, source: BinaryIO, timings: StageTimings):
+        self._source = source
+        self._timings = timings
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return self._source.seekable()
+
+    def readinto(self, buffer) -> int:
+        start = time.perf_counter()
+        readinto = getattr(self._source, "readinto", None)
+        if readinto is not None:
+            # Copie directe dans le tampon du lecteur (fichier projeté en mémoire, flux décompressé)
+            size = readinto(buffer) or 0
+        else:
+            data = self._source.read(len(buffer))
+            size = len(data)
+            buffer[:size] = data
+        self._timings.add("decode", time.perf_counter() - start)
+        self._timings.bytes_read += size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._source.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._source.tell()
+
+def metered(source: BinaryIO, timings: StageTimings) -> BinaryIO:
+    return io.BufferedReader(MeteredReader(source, timings))
+
+def timed_parse(chunks: Iterator, timings: StageTimings) -> Iterator:
+    """
+    Mesure la lecture de chaque bloc (étape "parse").
+
+    Le temps de lecture du flux source, déjà compté dans "decode" par
+    MeteredReader, en est retranché.
+    """
+    try:
+        while True:
+            decoded = timings.stages.get("decode", 0.0)
+            start = time.perf_counter()
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            elapsed = time.perf_counter() - start - (timings.stages.get("decode", 0.0) - decoded)
+            timings.add("parse", max(elapsed, 0.0))
+            yield chunk
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+# --- Export Prometheus ---
+
+if prometheus_client is not None:
+    _STAGE_SECONDS = prometheus_client.Histogram(
+        "reorganizer_stage_duration_seconds",
+        "Durée de chaque étape du traitement d'un fichier",
+        ["stage"],
+        buckets=DURATION_BUCKETS,
+    )
+    _RULE_SECONDS = prometheus_client.Histogram(
+        "reorganizer_rule_duration_seconds",
+        "Durée cumulée de chaque règle sur un fichier",
+        ["rule"],
+        buckets=DURATION_BUCKETS,
+    )
+    _ROWS = prometheus_client.Counter("reorganizer_rows_processed", "Lignes traitées")
+    _BYTES_READ = prometheus_client.Counter("reorganizer_bytes_read", "Octets CSV lus (après décompression)")
+    _BYTES_WRITTEN = prometheus_client.Counter("reorganizer_bytes_written", "Octets CSV produits (avant compression)")
+    _FILES = prometheus_client.Counter("reorganizer_files_processed", "Fichiers traités", ["engine"])
+
+def observe_processing(timings: StageTimings, engine: Optional[str] = None) -> None:
+    """Enregistre les mesures d'un traitement terminé (sans effet si prometheus_client est absent)."""
+    if prometheus_client is None:
+        return
+    for stage, seconds in timings.stages.items():
+        _STAGE_SECONDS.labels(stage=stage).observe(seconds)
+    for rule, seconds in timings.rules.items():
+        _RULE_SECONDS.labels(rule=rule).observe(seconds)
+    _ROWS.inc(timings.rows)
+    _BYTES_READ.inc(timings.bytes_read)
+    _BYTES_WRITTEN.inc(timings.bytes_written)
+    _FILES.labels(engine=engine or "").inc()
+
+def render_metrics() -> Optional[tuple[bytes, str]]:
+    """Mesures au format d'exposition Prometheus et leur type de contenu, ou None si prometheus_client est absent."""
+    if prometheus_client is None:
+        return None
+    return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Optional
+
+from app.core.cache import LRUCache
+from app.core.config import CAMPAIGN_PLAN_CACHE_SIZE
+from app.core.file_processor import CampaignColumn, ColumnRule, CompiledPlan, compile_columns
+
+# Plans compilés, indexés par uuid de campagne.
+# Chaque entrée conserve le `updated_at` de la version compilée : une campagne
+# modifiée ailleurs (autre worker, script) est recompilée à la prochaine lecture.
+_plans = LRUCache(maxsize=CAMPAIGN_PLAN_CACHE_SIZE)
+
+def compile_campaign_fields(fields: list[dict], engine: Optional[str] = None) -> CompiledPlan:
+    """
+    Compile le JSON `fields` d'une campagne en un plan d'exécution.
+
+    Lève TypeError / AttributeError si la configuration est mal formée.
+    """
+    # Trier les colonnes par leur ordre
+    sorted_columns_config = sorted(fields, key=lambda col: col.get('order', 0))
+    campaign_config = [
+        CampaignColumn(
+            name=col.get('name'),
+            rules=[ColumnRule(type=rule.get('type'), value=rule.get('value')) for rule in col.get('rules', [])]
+        )
+        for col in sorted_columns_config
+    ]
+    if any(not isinstance(col.name, str) for col in campaign_config):
+        raise TypeError("Chaque colonne de la campagne doit avoir un nom.")
+    return compile_columns(campaign_config, engine=engine)
+
+def get_campaign_plan(campaign) -> CompiledPlan:
+    """Retourne le plan compilé d'une campagne, en le compilant au premier appel."""
+    key = str(campaign.uuid)
+    version: Optional[datetime] = campaign.updated_at
+    cached = _plans.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    plan = compile_campaign_fields(campaign.fields, engine=campaign.engine)
+    _plans.set(key, (version, plan))
+    return plan
+
+def invalidate_campaign_plan(campaign_uuid) -> None:
+    """Retire du cache le plan d'une campagne modifiée ou supprimée."""
+    _plans.pop(str(campaign_uuid))
@@ -0,0 +1,127 @@
+import cProfile
+import json
+import logging
+import pstats
+import time
+import uuid
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Iterator, Optional, TypeVar
+
+from app.core.config import PROFILE_DIR, PROFILE_MAX_FILES
+from app.core.metrics import StageTimings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Fonctions les plus coûteuses reprises dans le résumé d'un profil
+TOP_FUNCTIONS = 30
+
+# Un seul profileur actif à la fois : cProfile refuse deux profileurs
+# simultanés à partir de Python 3.12. Deux traitements profilés en même
+# temps s'exécutent donc bloc par bloc, à tour de rôle.
+_active_lock = Lock()
+
+
+class RequestProfile:
+    """
+    Profil déterministe (cProfile) du traitement d'un fichier.
+
+    Le traitement s'exécute dans plusieurs threads successifs (pool de threads
+    de Starlette) : le profileur est activé autour de chaque appel (voir `call`)
+    plutôt que pour un thread donné. À la fin du traitement (ou à la
+    déconnexion du client), le profil est enregistré dans PROFILE_DIR :
+    `<id>.pstats` (lisible par `python -m pstats`, snakeviz, ou speedscope
+    après conversion) et `<id>.json`, qui résume la durée de chaque étape et
+    de chaque règle et les fonctions les plus coûteuses.
+    """
+
+    def __init__(self, label: str, directory: Path = PROFILE_DIR):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.label = label
+        self.directory = directory
+        self._profiler = cProfile.Profile()
+        self._elapsed = 0.0
+        self._saved = False
+
+    def call(self, function: Callable[..., T], *args, **kwargs) -> T:
+        """Exécute `function` sous le profileur, dans le thread appelant."""
+        with _active_lock:
+            start = time.perf_counter()
+            self._profiler.enable()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._profiler.disable()
+                self._elapsed += time.perf_counter() - start
+
+    def wrap(self, chunks: Iterator[bytes], timings: StageTimings) -> Iterator[bytes]:
+        """Profile la production de chaque bloc de `chunks`, puis enregistre le profil."""
+        complete = False
+        try:
+            while True:
+                try:
+                    chunk = self.call(next, chunks)
+                except StopIteration:
+                    complete = True
+                    return
+                yield chunk
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+            self.save(timings, complete)
+
+    def save(self, timings: StageTimings, complete: bool = True) -> Optional[Path]:
+        """Enregistre le profil et son résumé ; retourne le chemin du résumé (None si déjà fait)."""
+        if self._saved:
+            return None
+        self._saved = True
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._profiler.dump_stats(self.directory / f"{self.id}.pstats")
+            summary_path = self.directory / f"{self.id}.json"
+            summary_path.write_text(
+                json.dumps(self.summary(timings, complete), indent=2, ensure_ascii=False), encoding="utf-8"
+            )
+            _prune(self.directory)
+            logger.info(f"Profil {self.id} enregistré ({self.label}) : {summary_path}")
+            return summary_path
+        except OSError as e:
+            logger.error(f"Impossible d'enregistrer le profil {self.id} : {e}")
+            return None
+
+    def summary(self, timings: StageTimings, complete: bool) -> dict:
+        stats = pstats.Stats(self._profiler).sort_stats(pstats.SortKey.CUMULATIVE)
+        top_functions = []
+        for function in stats.fcn_list[:TOP_FUNCTIONS]:
+            _, calls, own, cumulative, _ = stats.stats[function]
+            filename, line, name = function
+            top_functions.append({
+                "function": f"{filename}:{line}({name})",
+                "calls": calls,
+                "own_seconds": round(own, 6),
+                "cumulative_seconds": round(cumulative, 6),
+            })
+        return {
+            "id": self.id,
+            "label": self.label,
+            "complete": complete,
+            "profiled_seconds": round(self._elapsed, 6),
+            "rows": timings.rows,
+            "bytes_read": timings.bytes_read,
+            "bytes_written": timings.bytes_written,
+            "stages": {stage: round(seconds, 6) for stage, seconds in timings.stages.items()},
+            # Règles de la plus coûteuse à la moins coûteuse
+            "rules": {rule: round(seconds, 6) for rule, seconds in
+                      sorted(timings.rules.items(), key=lambda item: item[1], reverse=True)},
+            "top_functions": top_functions,
+        }
+
+def _prune(directory: Path) -> None:
+    """Supprime les profils les plus anciens au-delà de PROFILE_MAX_FILES."""
+    summaries = sorted(directory.glob("*.json"), key=lambda path: path.stat().st_mtime, reverse=True)
+    for summary in summaries[PROFILE_MAX_FILES:]:
+        summary.unlink(missing_ok=True)
+        summary.with_suffix(".pstats").unlink(missing_ok=True)
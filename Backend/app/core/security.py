@@ -1,10 +1,20 @@
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Callable, Optional, TypeVar
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-from app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS
+from app.core.config import (
+    SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS,
+    BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING,
+)
 import uuid
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+T = TypeVar("T")
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -12,6 +22,59 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+# --- Hachage hors de la boucle d'événements ---
+# bcrypt est volontairement coûteux (plusieurs dizaines de ms par appel) et
+# libère le GIL : il s'exécute dans un pool de threads dédié et borné, pour
+# ne bloquer ni la boucle d'événements ni le pool de threads partagé de Starlette.
+
+class PasswordHashBusyError(Exception):
+    """Trop de hachages en attente (PASSWORD_HASH_MAX_PENDING) : la demande est refusée."""
+
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_hash_lock = Lock()
+_pending = 0
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    with _hash_lock:
+        if _hash_executor is None:
+            _hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+        return _hash_executor
+
+def shutdown_hash_executor() -> None:
+    """Arrête le pool de hachage (appelé à l'arrêt de l'application)."""
+    global _hash_executor
+    with _hash_lock:
+        if _hash_executor is not None:
+            _hash_executor.shutdown(wait=True, cancel_futures=True)
+            _hash_executor = None
+
+async def _run_hashing(function: Callable[..., T], *args) -> T:
+    global _pending
+    with _hash_lock:
+        if _pending >= PASSWORD_HASH_MAX_PENDING:
+            raise PasswordHashBusyError()
+        _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_hash_executor(), function, *args)
+    finally:
+        with _hash_lock:
+            _pending -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password exécuté dans le pool de hachage ; lève PasswordHashBusyError s'il est saturé."""
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash exécuté dans le pool de hachage ; lève PasswordHashBusyError s'il est saturé."""
+    return await _run_hashing(get_password_hash, password)
+
+REFRESH_TOKEN_TYPE = "refresh"
+
+def hash_token(token: str) -> str:
+    """Empreinte SHA-256 d'un jeton, seule forme sous laquelle il est stocké et recherché en base."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -22,6 +85,7 @@ def create_access_token(data: dict):
 def create_refresh_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire})
+    # jti : deux jetons émis dans la même seconde pour un même utilisateur restent distincts
+    to_encode.update({"exp": expire, "type": REFRESH_TOKEN_TYPE, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt, expire
\ No newline at end of file
@@ -0,0 +1,184 @@
+import codecs
+import csv
+import io
+from dataclasses import dataclass
+from typing import BinaryIO
+
+# Séparateurs et guillemets reconnus, par ordre de préférence en cas d'égalité
+CANDIDATE_DELIMITERS = (",", ";", "\t", "|")
+CANDIDATE_QUOTES = ('"', "'")
+
+# Octets sans caractère en cp1252 : un fichier qui en contient est lu en latin-1
+_CP1252_UNDEFINED = b"\x81\x8d\x8f\x90\x9d"
+
+
+@dataclass(frozen=True)
+class InputDialect:
+    """
+    Format d'un CSV reçu : encodage, séparateur et guillemets.
+
+    "utf-8-sig" signale un fichier commençant par un BOM UTF-8 (retiré à la lecture).
+    """
+    encoding: str = "utf-8"
+    delimiter: str = ","
+    quotechar: str = '"'
+
+    @property
+    def bom(self) -> bool:
+        return self.encoding == "utf-8-sig"
+
+    @property
+    def charset(self) -> str:
+        """Encodage du contenu, BOM exclu."""
+        return "utf-8" if self.bom else self.encoding
+
+    def decode(self, data: bytes) -> str:
+        """Décode un extrait du fichier ; un caractère coupé en fin d'extrait est ignoré."""
+        text = codecs.getincrementaldecoder(self.encoding)().decode(data, final=False)
+        # Fichier UTF-8 sans BOM déclaré mais présent (dialecte par défaut)
+        return text.lstrip("\ufeff")
+
+
+DEFAULT_INPUT_DIALECT = InputDialect()
+
+def detect_encoding(sample: bytes) -> str:
+    """
+    Encodage d'un CSV d'après ses premiers octets : BOM UTF-8, à défaut UTF-8
+    si l'extrait est valide, à défaut cp1252 (exports Windows), ou latin-1 si
+    l'extrait contient des octets que cp1252 ne définit pas.
+
+    Lève ValueError pour un fichier UTF-16 ou UTF-32 (BOM correspondant).
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        raise ValueError("fichier UTF-16 ou UTF-32 non pris en charge, enregistrez-le en UTF-8")
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    if any(byte in _CP1252_UNDEFINED for byte in sample):
+        return "latin-1"
+    return "cp1252"
+
+def detect_delimiter(text: str) -> tuple[str, str]:
+    """
+    Séparateur et guillemet d'un extrait de CSV décodé.
+
+    Chaque combinaison candidate est appliquée aux lignes complètes de
+    l'extrait ; la meilleure donne le même nombre de champs au plus grand
+    nombre de lignes, puis le plus de champs. Un fichier d'une seule colonne
+    garde le dialecte par défaut.
+    """
+    end = text.rfind("\n")
+    if end >= 0:
+        text = text[:end + 1]
+    best, best_score = (DEFAULT_INPUT_DIALECT.delimiter, DEFAULT_INPUT_DIALECT.quotechar), (0.0, 1)
+    for quotechar in CANDIDATE_QUOTES:
+        for delimiter in CANDIDATE_DELIMITERS:
+            try:
+                rows = [row for row in csv.reader(io.StringIO(text), delimiter=delimiter, quotechar=quotechar) if row]
+            except csv.Error:
+                continue
+            if not rows:
+                continue
+            width = len(rows[0])
+            score = (sum(len(row) == width for row in rows) / len(rows), width)
+            if width > 1 and score > best_score:
+                best, best_score = (delimiter, quotechar), score
+    return best
+
+def sniff_dialect(sample: bytes) -> InputDialect:
+    """
+    Détecte le format d'un CSV d'après ses premiers octets uniquement.
+
+    Lève ValueError si l'encodage n'est pas pris en charge (voir detect_encoding).
+    """
+    encoding = detect_encoding(sample)
+    delimiter, quotechar = detect_delimiter(InputDialect(encoding=encoding).decode(sample))
+    return InputDialect(encoding=encoding, delimiter=delimiter, quotechar=quotechar)
+
+
+class Utf8FallbackReader(io.RawIOBase):
+    """
+    Flux UTF-8 tolérant aux octets cp1252 isolés.
+
+    L'encodage est détecté sur le début du fichier seulement : un fichier
+    UTF-8 (ou ASCII) au début peut contenir plus loin un octet cp1252 (ex.
+    "é" en 0xE9), qui ferait échouer la lecture en cours de réponse. Les
+    séquences UTF-8 valides sont transmises telles quelles ; chaque octet
+    invalide est lu en cp1252 (latin-1 s'il n'y est pas défini) et réécrit en
+    UTF-8. Les lecteurs CSV reçoivent donc toujours de l'UTF-8 valide.
+
+    Seul le retour au début du flux est possible (lecture de l'en-tête).
+    """
+
+    def __init__(self, source: BinaryIO):
+        self._source = source
+        self._start = source.tell()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pending = b""  # Séquence UTF-8 coupée en fin de bloc
+        self._output = bytearray()
+        self._position = 0
+        self._eof = False
+        self.replaced = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._output and not self._eof:
+            data = self._source.read(len(buffer))
+            self._eof = not data
+            self._convert(self._pending + data)
+        size = min(len(buffer), len(self._output))
+        buffer[:size] = self._output[:size]
+        del self._output[:size]
+        self._position += size
+        return size
+
+    def _convert(self, data: bytes) -> None:
+        start = 0
+        while True:
+            try:
+                _, consumed = codecs.utf_8_decode(data[start:], "strict", self._eof)
+            except UnicodeDecodeError as e:
+                self._output += data[start:start + e.start]
+                for byte in data[start + e.start:start + e.end]:
+                    self._output += _fallback_char(byte).encode("utf-8")
+                self.replaced += e.end - e.start
+                start += e.end
+                continue
+            self._output += data[start:start + consumed]
+            self._pending = data[start + consumed:]
+            return
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        target = offset if whence == io.SEEK_SET else self._position + offset if whence == io.SEEK_CUR else None
+        if target == self._position:
+            return self._position
+        if target != 0:
+            raise io.UnsupportedOperation("seul le retour au début du flux est possible")
+        self._source.seek(self._start)
+        self._reset()
+        return 0
+
+def _fallback_char(byte: int) -> str:
+    if byte in _CP1252_UNDEFINED:
+        return bytes((byte,)).decode("latin-1")
+    return bytes((byte,)).decode("cp1252")
+
+def tolerant_source(source: BinaryIO, dialect: InputDialect) -> BinaryIO:
+    """Flux à lire pour un CSV détecté en UTF-8 : voir Utf8FallbackReader ; les autres encodages sont lus tels quels."""
+    if dialect.charset != "utf-8":
+        return source
+    return Utf8FallbackReader(source)
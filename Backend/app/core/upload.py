@@ -0,0 +1,316 @@
+import io
+import mmap
+import os
+from dataclasses import dataclass, field
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, Callable, Optional
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, UploadFile
+
+from app.core.config import UPLOAD_MEMORY_MAP, UPLOAD_SNIFF_BYTES, UPLOAD_SPOOL_MAX_SIZE, UPLOAD_TEMP_DIR
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:  # Anciennes versions de python-multipart
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# Taille maximale d'un champ texte du formulaire (hors fichier)
+MAX_FIELD_SIZE = 64 * 1024
+# Pages déjà lues d'un fichier projeté rendues au système par tranches de cette taille
+MAPPED_RELEASE_STEP = 8 * 1024 * 1024
+
+# Description OpenAPI du corps attendu par les routes qui utilisent receive_upload
+# (FastAPI ne peut pas la déduire, le corps n'étant pas déclaré avec File(...))
+UPLOAD_OPENAPI_EXTRA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+# inspect(fichier, début_du_fichier) : lève une HTTPException pour refuser l'upload,
+# retourne True si le début du fichier suffit et que le reste du corps ne doit pas être lu
+UploadInspector = Callable[[UploadFile, bytes], Optional[bool]]
+
+
+def spooled_file() -> SpooledTemporaryFile:
+    """
+    Fichier temporaire d'un upload : gardé en mémoire jusqu'à
+    UPLOAD_SPOOL_MAX_SIZE octets, puis écrit dans UPLOAD_TEMP_DIR.
+    """
+    if UPLOAD_TEMP_DIR is not None:
+        UPLOAD_TEMP_DIR.mkdir(parents=True, exist_ok=True)
+    return SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_SIZE, dir=UPLOAD_TEMP_DIR)
+
+
+class MappedFile(io.RawIOBase):
+    """
+    Lecture d'un fichier sur disque par projection en mémoire (mmap).
+
+    Chaque bloc est copié directement des pages du fichier vers le tampon du
+    lecteur CSV, sans appel read() ni copie intermédiaire : la mémoire
+    utilisée reste celle des blocs en cours de lecture, le cache de pages du
+    système conservant le reste du fichier. Fermer la projection ne ferme pas le
+    fichier projeté.
+    """
+
+    def __init__(self, fileno: int, position: int = 0):
+        self._map = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+        self._released = 0
+        if hasattr(self._map, "madvise"):
+            # Lecture séquentielle : le système lit en avance
+            self._map.madvise(mmap.MADV_SEQUENTIAL)
+        self._map.seek(position)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        start = self._map.tell()
+        size = max(0, min(len(buffer), len(self._map) - start))
+        with memoryview(self._map) as view:
+            buffer[:size] = view[start:start + size]
+        self._map.seek(start + size)
+        self._release(start + size)
+        return size
+
+    def _release(self, position: int) -> None:
+        """
+        Retire de la mémoire du processus les pages déjà lues : elles restent
+        dans le cache de pages et sont relues depuis celui-ci en cas de retour
+        en arrière (seek).
+        """
+        end = position - position % mmap.PAGESIZE
+        if end - self._released < MAPPED_RELEASE_STEP or not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        self._map.madvise(mmap.MADV_DONTNEED, self._released, end - self._released)
+        self._released = end
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._map.seek(offset, whence)
+        position = self._map.tell()
+        self._released = min(self._released, position - position % mmap.PAGESIZE)
+        return position
+
+    def tell(self) -> int:
+        return self._map.tell()
+
+    def close(self) -> None:
+        if not self.closed:
+            self._map.close()
+        super().close()
+
+
+def map_file(source: BinaryIO) -> BinaryIO:
+    """
+    Projette en mémoire un fichier présent sur disque (upload écrit dans son
+    fichier temporaire, fichier d'entrée d'un job), à la position de lecture
+    courante. Un upload encore en mémoire, un fichier vide ou un flux sans
+    descripteur de fichier est retourné tel quel, de même si
+    UPLOAD_MEMORY_MAP est désactivé.
+    """
+    # SpooledTemporaryFile.fileno() écrirait sur disque un fichier encore en mémoire
+    if not UPLOAD_MEMORY_MAP or not getattr(source, "_rolled", True):
+        return source
+    try:
+        fileno = source.fileno()
+        if os.fstat(fileno).st_size == 0:
+            return source
+        return MappedFile(fileno, source.tell())
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        return source
+
+
+@dataclass
+class ReceivedUpload:
+    """Fichier reçu en flux et champs texte du formulaire."""
+    file: Optional[UploadFile] = None
+    fields: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class _Part:
+    name: str = ""
+    filename: Optional[str] = None
+    headers: list[tuple[bytes, bytes]] = field(default_factory=list)
+    data: bytearray = field(default_factory=bytearray)
+
+
+class _UploadReceiver:
+    """
+    Reçoit le corps d'une requête bloc par bloc et n'inspecte que le début du fichier.
+
+    Contrairement à `File(...)`, qui attend la fin de l'upload avant d'appeler
+    la route, `inspect` est appelé dès que les UPLOAD_SNIFF_BYTES premiers
+    octets du fichier (ou le fichier entier, s'il est plus court) sont
+    arrivés : une erreur est renvoyée au client sans lire le reste du corps.
+    Le début inspecté est ainsi celui sur lequel le format du fichier sera
+    détecté au traitement, et non une seule ligne arrivée dans le premier bloc.
+    """
+
+    def __init__(self, inspect: Optional[UploadInspector], file_field: str):
+        self.inspect = inspect
+        self.file_field = file_field
+        self.result = ReceivedUpload()
+        self.head = bytearray()
+        self.inspected = False
+        self.part = _Part()
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        # Morceaux du fichier en attente d'écriture, et fin de la partie fichier
+        self.pending: list[bytes] = []
+        self.file_complete = False
+
+    # --- Callbacks du parseur multipart (synchrones) ---
+
+    def on_part_begin(self) -> None:
+        self.part = _Part()
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self.part.headers.append((bytes(self._header_field).lower(), bytes(self._header_value)))
+        self._header_field.clear()
+        self._header_value.clear()
+
+    def on_headers_finished(self) -> None:
+        disposition = dict(self.part.headers).get(b"content-disposition", b"")
+        _, options = parse_options_header(disposition)
+        self.part.name = options.get(b"name", b"").decode("latin-1")
+        filename = options.get(b"filename")
+        if filename is not None and self.part.name == self.file_field:
+            self.part.filename = filename.decode("utf-8", errors="replace")
+            self.set_file(UploadFile(
+                file=spooled_file(),
+                filename=self.part.filename,
+                headers=Headers(raw=self.part.headers),
+            ))
+
+    def set_file(self, upload: UploadFile) -> None:
+        self.result.file = upload
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self.part.filename is not None:
+            self.pending.append(data[start:end])
+            return
+        self.part.data += data[start:end]
+        if len(self.part.data) > MAX_FIELD_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Le champ '{self.part.name}' du formulaire est trop long."
+            )
+
+    def on_part_end(self) -> None:
+        if self.part.filename is not None:
+            self.file_complete = True
+        elif self.part.name:
+            self.result.fields[self.part.name] = self.part.data.decode("utf-8", errors="replace")
+
+    # --- Traitement asynchrone des données reçues ---
+
+    async def flush(self) -> bool:
+        """Écrit les données en attente ; retourne True si la lecture peut s'arrêter."""
+        upload = self.result.file
+        if upload is None:
+            return False
+        # Vidée sur place : pour un corps brut, `pending.append` est la fonction d'écriture
+        data = b"".join(self.pending)
+        self.pending.clear()
+        if not self.inspected:
+            self.head += data
+            if len(self.head) >= UPLOAD_SNIFF_BYTES or self.file_complete:
+                self.inspected = True
+                if self.inspect is not None and self.inspect(upload, bytes(self.head[:UPLOAD_SNIFF_BYTES])):
+                    return True
+        if data:
+            await upload.write(data)
+        return False
+
+
+async def receive_upload(
+    request: Request,
+    inspect: Optional[UploadInspector] = None,
+    file_field: str = "file",
+) -> ReceivedUpload:
+    """
+    Reçoit un upload multipart (ou un corps brut, dont le nom de fichier est
+    donné par l'en-tête X-Filename) en inspectant le début du fichier au plus tôt.
+    Le fichier est conservé tel quel : s'il est compressé, c'est au lecteur de
+    le décompresser (voir app.core.compression).
+
+    Si `inspect` retourne True, la lecture s'arrête après l'inspection : seul
+    le début du fichier est reçu, le reste du corps n'est jamais lu, et le
+    fichier retourné est déjà fermé (seul son nom reste utilisable).
+    Sinon, le fichier retourné est repositionné au début ; l'appelant le ferme.
+    """
+    receiver = _UploadReceiver(inspect, file_field)
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+
+    if content_type == b"multipart/form-data":
+        boundary = options.get(b"boundary")
+        if not boundary:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Requête multipart invalide : boundary manquant."
+            )
+        parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": receiver.on_part_begin,
+            "on_part_data": receiver.on_part_data,
+            "on_part_end": receiver.on_part_end,
+            "on_header_field": receiver.on_header_field,
+            "on_header_value": receiver.on_header_value,
+            "on_header_end": receiver.on_header_end,
+            "on_headers_finished": receiver.on_headers_finished,
+        })
+        write = parser.write
+    else:
+        # Corps brut : tout le corps est le fichier
+        receiver.part = _Part(name=file_field, filename=request.headers.get("x-filename", ""))
+        receiver.set_file(UploadFile(
+            file=spooled_file(),
+            filename=receiver.part.filename,
+            headers=request.headers,
+        ))
+        parser = None
+        write = receiver.pending.append
+
+    try:
+        async for chunk in request.stream():
+            if chunk:
+                write(chunk)
+            if await receiver.flush():
+                await receiver.result.file.close()
+                return receiver.result
+        if parser is not None:
+            parser.finalize()
+        receiver.file_complete = True
+        await receiver.flush()
+    except Exception:
+        if receiver.result.file is not None:
+            await receiver.result.file.close()
+        raise
+
+    if receiver.result.file is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Aucun fichier reçu dans le champ '{file_field}'."
+        )
+    await run_in_threadpool(receiver.result.file.file.seek, 0)
+    return receiver.result
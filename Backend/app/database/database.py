@@ -1,11 +1,14 @@
+import asyncio
+import logging
 import os
+import random
 from pathlib import Path
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
 
 import psycopg2
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 # Charger les variables d'environnement
@@ -13,7 +16,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 ENV_DIR = BASE_DIR / "environments"
 ENV_FILE = os.getenv("ENV_FILE", ".env")
 load_dotenv(ENV_DIR / ENV_FILE)
-print(f"Chargement .env depuis: {ENV_DIR / ENV_FILE}")
+logger = logging.getLogger(__name__)
+logger.debug(f"Chargement .env depuis: {ENV_DIR / ENV_FILE}")
 
 # Déclaration de la base de données
 Base = declarative_base() 
@@ -23,6 +27,16 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL manquant dans l'environnement. Vérifiez votre fichier .env.*")
 
+# Pool de connexions et journalisation SQL
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))  # Connexions gardées ouvertes dans le pool
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))  # Connexions supplémentaires ouvertes lors des pics, fermées ensuite
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # Attente maximale d'une connexion libre, en secondes
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Âge au-delà duquel une connexion est renouvelée, en secondes
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"  # Vérifie une connexion avant de la réutiliser
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"  # Journalise toutes les requêtes SQL (développement uniquement)
+DB_LOG_SAMPLE_RATE = float(os.getenv("DB_LOG_SAMPLE_RATE", "0"))  # Fraction des requêtes SQL journalisées (0 à 1), si DB_ECHO est désactivé
+DB_CREATE_IF_MISSING = os.getenv("DB_CREATE_IF_MISSING", "true").lower() == "true"  # Crée la base PostgreSQL au démarrage si elle n'existe pas
+
 # Variables pour la création de la base de données
 PG_CONFIG = {
     "user": os.getenv("PGUSER", "postgres"),
@@ -51,24 +65,71 @@ def create_database_if_not_exists() -> None:
             )
             if not cur.fetchone():
                 cur.execute(f"CREATE DATABASE {PG_CONFIG['dbname']}")
-                print(f"Base '{PG_CONFIG['dbname']}' creee")
+                logger.info(f"Base '{PG_CONFIG['dbname']}' creee")
             else:
-                print(f"La base '{PG_CONFIG['dbname']}' existe deja")
+                logger.debug(f"La base '{PG_CONFIG['dbname']}' existe deja")
                 
     except Exception as e:
-        print(f"Erreur lors de la verification/creation de la base : {e}")
+        logger.error(f"Erreur lors de la verification/creation de la base : {e}")
     finally:
         if 'conn' in locals():
             conn.close()
 
-def get_engine():
-    """Crée et retourne l'engine SQLAlchemy asynchrone."""
-    create_database_if_not_exists()
-    return create_async_engine(DATABASE_URL, echo=True)
+def engine_options(url: str = DATABASE_URL) -> dict[str, Any]:
+    """Options de l'engine : pool de connexions et journalisation, d'après l'environnement."""
+    options: dict[str, Any] = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+    # SQLite n'a pas de pool de connexions réseau à dimensionner
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    return options
+
+def _log_sampled_statements(engine: AsyncEngine, rate: float) -> None:
+    """Journalise une fraction des requêtes SQL, pour observer la production sans la ralentir."""
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def log_statement(conn, cursor, statement, parameters, context, executemany):
+        if random.random() < rate:
+            logger.info(f"SQL : {statement}")
+
+def get_engine() -> AsyncEngine:
+    """
+    Crée et retourne l'engine SQLAlchemy asynchrone.
+
+    Aucune connexion n'est ouverte ici : l'import du module reste immédiat.
+    La création de la base et l'ouverture du pool se font au démarrage
+    de l'application (voir init_database).
+    """
+    engine = create_async_engine(DATABASE_URL, **engine_options())
+    if not DB_ECHO and DB_LOG_SAMPLE_RATE > 0:
+        _log_sampled_statements(engine, DB_LOG_SAMPLE_RATE)
+    return engine
 
 # Initialisation de l'engine
 engine = get_engine()
 
+async def init_database() -> None:
+    """
+    Étape de démarrage explicite : crée la base PostgreSQL si besoin
+    (connexion psycopg2 synchrone, hors de la boucle d'événements),
+    puis ouvre une première connexion du pool pour que la première requête
+    n'en paie pas le coût.
+    """
+    if DB_CREATE_IF_MISSING and DATABASE_URL.startswith("postgresql"):
+        await asyncio.to_thread(create_database_if_not_exists)
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception as e:
+        logger.error(f"Base de données injoignable au démarrage : {e}")
+
+async def close_database() -> None:
+    """Ferme les connexions du pool à l'arrêt de l'application."""
+    await engine.dispose()
+
 # Configuration de la session asynchrone
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -1,15 +1,41 @@
-from fastapi import Depends, HTTPException, status
+import time
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
 from jose import JWTError, jwt
-from app.core.config import SECRET_KEY, ALGORITHM
+from app.core.cache import LRUCache
+from app.core.security import REFRESH_TOKEN_TYPE
+from app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, PRINCIPAL_CACHE_SIZE, PROFILING_ADMINS
 from app.schemas.token_schema import TokenPayload
-from app.services import auth_service
 from app.database.database import get_db
+from app.models.models import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+# Utilisateurs déjà authentifiés, par jeton : un jeton déjà validé n'est ni
+# re-vérifié (signature, expiration) ni relu en base jusqu'à son expiration.
+# Les utilisateurs en cache sont détachés de leur session : à traiter en lecture seule.
+_principals = LRUCache(maxsize=PRINCIPAL_CACHE_SIZE)
+
+def invalidate_principal_cache(token: Optional[str] = None) -> None:
+    """Oublie l'utilisateur associé à un jeton (ou à tous les jetons si aucun n'est donné)."""
+    if token is None:
+        _principals.clear()
+    else:
+        _principals.pop(token)
+
+def principal_cache_stats() -> dict[str, int]:
+    """Compteurs du cache des jetons validés (hits, misses, taille)."""
+    return _principals.stats()
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    cached = _principals.get(token)
+    if cached is not None:
+        return cached
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -18,13 +44,37 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_uuid: str = payload.get("sub")
-        if user_uuid is None:
+        # Un jeton de rafraîchissement ne donne pas accès aux routes protégées
+        if user_uuid is None or payload.get("type") == REFRESH_TOKEN_TYPE:
             raise credentials_exception
         token_data = TokenPayload(sub=user_uuid)
-    except JWTError:
+    except (JWTError, ValueError):
         raise credentials_exception
     
-    user = db.query(User).filter(User.uuid == token_data.sub).first()
+    result = await db.execute(select(User).where(User.uuid == token_data.sub))
+    user = result.scalars().first()
     if user is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+
+    # Gardé pour la durée de vie restante du jeton
+    expires_at = payload.get("exp")
+    ttl = expires_at - time.time() if expires_at is not None else ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    if ttl > 0:
+        db.expunge(user)
+        _principals.set(token, user, ttl=ttl)
+    return user
+
+async def require_profiling_admin(request: Request, db: AsyncSession) -> User:
+    """
+    Retourne l'utilisateur authentifié de la requête s'il figure dans PROFILING_ADMINS.
+
+    Appelée uniquement lorsqu'un profilage est demandé : les autres requêtes
+    de la route restent sans authentification.
+    """
+    user = await get_current_user(await oauth2_scheme(request), db)
+    if user.ldap_login.lower() not in PROFILING_ADMINS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Profiling is restricted to administrators",
+        )
+    return user
@@ -10,12 +10,12 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     Table,
-    Enum
+    Enum,
+    Index,
 )
 import uuid
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from datetime import datetime, timezone
 
 class LdapConfig(Base):
     __tablename__ = "ldap_configs"
@@ -42,11 +42,13 @@ class RefreshToken(Base):
         nullable=False,
         index=True,
     )
-    token = Column(String(512), unique=True, nullable=False)
+    # Empreinte SHA-256 (hexadécimale) du jeton : le jeton lui-même n'est jamais stocké
+    token_hash = Column(String(64), unique=True, nullable=False)
     user_agent = Column(String(255), nullable=True)
     ip_address = Column(String(64), nullable=True)
     is_revoked = Column(Boolean, default=False)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    # Indexé pour la purge des jetons expirés
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("User", backref="refresh_tokens")
@@ -67,9 +69,16 @@ class Campaign(Base):
     __tablename__ = "campaigns"
 
     uuid = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    name = Column(String(50), nullable=True)
+    name = Column(String(50), nullable=True, unique=True)
     description = Column(Text)
     outputFilenameTemplate = Column(String(50), nullable=True)
     fields = Column(JSON, nullable=False)
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc), nullable=False)
-    updated_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc), nullable=False)
\ No newline at end of file
+    engine = Column(String(20), nullable=True)
+    # Horodatage fourni par la base à chaque écriture (et non une valeur figée au démarrage du processus)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
+
+    __table_args__ = (
+        # Pagination de la liste, triée par (created_at, uuid)
+        Index("ix_campaigns_created_at_uuid", "created_at", "uuid"),
+    )
\ No newline at end of file
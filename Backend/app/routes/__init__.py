@@ -2,8 +2,10 @@ from fastapi import FastAPI
 from app.routes import auth
 from app.routes import campaign_routes
 from app.routes import reorganizer_routes
+from app.routes import job_routes
 
 def include_routers(app: FastAPI):
     app.include_router(auth.router, prefix="/api")
     app.include_router(campaign_routes.router, prefix="/api")
-    app.include_router(reorganizer_routes.router, prefix="/api", tags=["files"])
\ No newline at end of file
+    app.include_router(reorganizer_routes.router, prefix="/api", tags=["files"])
+    app.include_router(job_routes.router, prefix="/api")
\ No newline at end of file
@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.schemas.token_schema import Token
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.token_schema import RefreshTokenRequest, RevokedTokensResponse, Token
 from app.schemas.user_schema import UserPublic
 from app.services import auth_service
 from app.database.database import get_db 
@@ -11,12 +11,12 @@ from app.models.models import User
 router = APIRouter()
 
 @router.post("/login", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
-    user = auth_service.authenticate_user(
+    user = await auth_service.authenticate_user(
         db, ldap_login=form_data.username, password=form_data.password
     )
     if not user:
@@ -29,7 +29,7 @@ def login_for_access_token(
     user_agent = request.headers.get("user-agent")
     ip_address = request.client.host
 
-    access_token, refresh_token = auth_service.create_user_tokens(
+    access_token, refresh_token = await auth_service.create_user_tokens(
         db, user=user, user_agent=user_agent, ip_address=ip_address
     )
     
@@ -39,8 +39,42 @@ def login_for_access_token(
         "token_type": "bearer"
     }
 
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    body: RefreshTokenRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Échange un jeton de rafraîchissement contre une nouvelle paire de jetons.
+    Le jeton présenté est révoqué : chaque jeton ne sert qu'une fois.
+    """
+    access_token, refresh_token = await auth_service.refresh_user_tokens(
+        db, body.refresh_token, user_agent=request.headers.get("user-agent"), ip_address=request.client.host
+    )
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer"
+    }
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(body: RefreshTokenRequest, db: AsyncSession = Depends(get_db)):
+    """Révoque le jeton de rafraîchissement de la session courante."""
+    await auth_service.revoke_refresh_token(db, body.refresh_token)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@router.post("/logout/all", response_model=RevokedTokensResponse)
+async def logout_everywhere(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Révoque tous les jetons de rafraîchissement de l'utilisateur connecté (toutes ses sessions)."""
+    revoked = await auth_service.revoke_user_tokens(db, current_user.uuid)
+    return {"revoked": revoked}
+
 @router.get("/me", response_model=UserPublic)
-def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: User = Depends(get_current_user)):
     """
     Route protégée pour récupérer les informations de l'utilisateur connecté.
     """
@@ -1,28 +1,72 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List, Optional
+from uuid import UUID
 
+from app.core.config import CAMPAIGN_PAGE_SIZE, CAMPAIGN_PAGE_SIZE_MAX
+from app.core.etag import is_not_modified, make_etag, not_modified, set_etag
 from app.database.database import get_db 
 from app.models.models import Campaign
-from app.schemas.campaign_schema import CampaignCreate, CampaignResponse, CampaignUpdate
-from app.services.campaign_service import CampaignService
+from app.schemas.campaign_schema import CampaignCreate, CampaignPage, CampaignResponse, CampaignUpdate
+from app.services.campaign_service import CampaignNameTakenError, CampaignService
 
 router = APIRouter(prefix="/campaigns", tags=["campaigns"])
 
-@router.get("", response_model=List[CampaignResponse])
-async def get_campaigns(db: AsyncSession = Depends(get_db), skip: int = 0):
-    campaigns = await CampaignService.get_campaigns(db, skip=skip)
-    return campaigns
+@router.get("", response_model=CampaignPage, responses={304: {"description": "Page inchangée (If-None-Match)"}})
+async def get_campaigns(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    limit: int = Query(CAMPAIGN_PAGE_SIZE, ge=1, le=CAMPAIGN_PAGE_SIZE_MAX, description="Nombre de campagnes par page"),
+    cursor: Optional[str] = Query(None, description="Curseur `next_cursor` de la page précédente"),
+    include_fields: bool = Query(False, description="Inclure la configuration des colonnes de chaque campagne"),
+):
+    """
+    Liste paginée des campagnes, sans la configuration des colonnes par défaut
+    (voir GET /campaigns/{uuid} pour le détail d'une campagne).
+
+    L'ETag de la page dépend de la version de la liste : un client qui la
+    renvoie (If-None-Match) reçoit 304 tant qu'aucune campagne n'a changé.
+    """
+    version = await CampaignService.get_list_version(db)
+    etag = make_etag("campaigns", version, limit, cursor, include_fields)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return await CampaignService.get_campaigns(
+        db, limit=limit, cursor=cursor, include_fields=include_fields, version=version
+    )
+
+@router.get("/{campaign_uuid}", response_model=CampaignResponse, responses={304: {"description": "Campagne inchangée (If-None-Match)"}})
+async def get_campaign(campaign_uuid: UUID, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    """Détail d'une campagne ; son ETag dépend de `updated_at` (304 si le client a déjà cette version)."""
+    try:
+        campaign = await CampaignService.get_campaign(db, campaign_uuid)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    etag = make_etag(campaign.uuid, campaign.updated_at.isoformat())
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return campaign
 
 @router.post("", response_model=CampaignResponse)
 async def create_campaign(campaign: CampaignCreate, db: AsyncSession = Depends(get_db)):
-    db_campaign = await CampaignService.create_campaign(db, campaign)
+    try:
+        db_campaign = await CampaignService.create_campaign(db, campaign)
+    except CampaignNameTakenError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     return db_campaign
 
 @router.put("/{campaign_uuid}", response_model=CampaignResponse)
 async def update_campaign(campaign_uuid: str, campaign: CampaignUpdate, db: AsyncSession = Depends(get_db)):
-    db_campaign = await CampaignService.update_campaign(db, campaign_uuid, campaign)
+    try:
+        db_campaign = await CampaignService.update_campaign(db, campaign_uuid, campaign)
+    except CampaignNameTakenError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     return db_campaign
 
 @router.delete("/{campaign_uuid}", response_model=dict)
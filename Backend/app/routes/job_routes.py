@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from uuid import UUID
+
+from app.core.engines import get_processing_engine
+from app.core.excel import csv_filename
+from app.core.upload import UPLOAD_OPENAPI_EXTRA, receive_upload
+from app.database.database import get_db
+from app.schemas.job_schema import JobResponse
+from app.services import reorganizer_sevice
+from app.services.job_service import Job, QueueFullError, job_manager
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+def _to_response(job: Job) -> JobResponse:
+    return JobResponse.model_validate(job, from_attributes=True)
+
+def _get_job_or_404(job_id: UUID) -> Job:
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job non trouvé."
+        )
+    return job
+
+@router.post(
+    "/{campaign_uuid}",
+    response_model=JobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    openapi_extra=UPLOAD_OPENAPI_EXTRA,
+)
+async def create_job(
+    campaign_uuid: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    engine: Optional[str] = Query(None, description="Moteur de traitement (pandas, arrow) ; par défaut celui de la campagne"),
+    sheet: Optional[str] = Query(None, description="Feuille à traiter pour un fichier Excel ; par défaut la première"),
+):
+    """
+    Met en file d'attente le traitement d'un fichier CSV (éventuellement compressé) ou Excel
+    et retourne immédiatement l'identifiant du job.
+    """
+    plan = await reorganizer_sevice.get_campaign_plan(db, campaign_uuid)
+    engine_name = get_processing_engine(engine or plan.engine).name
+    # Fichier refusé dès réception de son début s'il ne convient pas à la campagne
+    upload = await receive_upload(request, inspect=reorganizer_sevice.header_inspector(plan))
+    file = upload.file
+    compression, filename = reorganizer_sevice.describe_upload(file)
+    try:
+        await run_in_threadpool(file.file.seek, 0)
+        job = await run_in_threadpool(
+            job_manager.submit, campaign_uuid, filename, plan, file.file, engine_name, sheet, compression
+        )
+    except QueueFullError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Trop de traitements en attente, veuillez réessayer plus tard.",
+            headers={"Retry-After": "30"},
+        )
+    finally:
+        await file.close()
+    return _to_response(job)
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: UUID):
+    """
+    Retourne l'état et la progression d'un job.
+    """
+    return _to_response(_get_job_or_404(job_id))
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: UUID):
+    """
+    Télécharge le CSV produit par un job terminé.
+    """
+    job = _get_job_or_404(job_id)
+    if job.status != "succeeded":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Le résultat n'est pas disponible (statut : {job.status})."
+        )
+    return FileResponse(
+        job.result_path,
+        media_type="text/csv",
+        filename=f"processed_{csv_filename(job.filename)}",
+    )
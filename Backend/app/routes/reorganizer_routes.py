@@ -1,51 +1,191 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status
+import logging
+from urllib.parse import quote
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.ext.asyncio import AsyncSession
-import uuid
-import io
+from typing import Optional
 
+from app.core.config import SERVER_TIMING_ENABLED
+from app.core.compression import compress_stream, decompress_head, negotiate_response_codec
+from app.core.csv_writer import OutputDialect
+from app.core.excel import csv_filename, is_excel_filename, list_sheets
+from app.core.metrics import StageTimings
+from app.core.profiling import RequestProfile
+from app.core.upload import UPLOAD_OPENAPI_EXTRA, receive_upload
 from app.database.database import get_db
+from app.dependencies.get_current_user import require_profiling_admin
+from app.schemas.reorganizer_shema import HeaderValidationResponse
 from app.services import reorganizer_sevice
 # from app.dependencies.get_current_user import get_current_user # Optionnel : pour protéger la route
 # from app.models.user_model import User # Optionnel
 
 router = APIRouter()
 
-@router.post("/process/{campaign_uuid}")
+logger = logging.getLogger(__name__)
+
+def output_dialect(
+    delimiter: str = Query(",", description="Séparateur du CSV produit (\\t pour une tabulation)"),
+    quoting: str = Query("minimal", description="Guillemets : minimal, all, nonnumeric ou none"),
+    line_terminator: str = Query("lf", description="Fin de ligne : lf ou crlf"),
+    encoding: str = Query("utf-8", description="Encodage du CSV produit (ex. utf-8, utf-8-sig, cp1252)"),
+    writer: Optional[str] = Query(None, description="Écriture du CSV (pandas, arrow) ; par défaut DEFAULT_CSV_WRITER"),
+) -> OutputDialect:
+    """Format du CSV produit, d'après les paramètres de la requête."""
+    try:
+        return OutputDialect.create(delimiter, quoting, line_terminator, encoding, writer)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.post("/process/{campaign_uuid}", openapi_extra=UPLOAD_OPENAPI_EXTRA)
 async def process_file_endpoint(
     campaign_uuid: str,
+    request: Request,
     db: AsyncSession = Depends(get_db),
-    file: UploadFile = File(...)
+    engine: Optional[str] = Query(None, description="Moteur de traitement (pandas, arrow) ; par défaut celui de la campagne"),
+    sheet: Optional[str] = Query(None, description="Feuille à traiter pour un fichier Excel ; par défaut la première"),
+    profile: bool = Query(False, description="Profile le traitement (administrateurs uniquement) ; équivaut à l'en-tête X-Profile: 1"),
+    dialect: OutputDialect = Depends(output_dialect),
 ):
     """
-    Endpoint pour uploader un fichier CSV et le traiter selon une campagne.
+    Endpoint pour uploader un fichier CSV ou Excel (.xlsx, .xls) et le traiter selon une campagne.
+
+    L'extension et les colonnes du fichier sont vérifiées dès réception de son
+    début : un fichier invalide est refusé sans attendre la fin de l'upload.
+
+    Un CSV compressé (.csv.gz, .csv.zst ou en-tête Content-Encoding) est
+    décompressé à la volée. La réponse est compressée au fil de l'eau si le
+    client l'accepte (Accept-Encoding : zstd, gzip).
+
+    Le format du CSV produit (séparateur, guillemets, fin de ligne, encodage)
+    se choisit par les paramètres de la requête ; par défaut, CSV UTF-8
+    séparé par des virgules. Celui du CSV reçu est détecté sur le début du
+    fichier et renvoyé dans les en-têtes X-Input-Encoding, X-Input-BOM,
+    X-Input-Delimiter et X-Input-Quote-Char. Pour un classeur Excel, le nom
+    de ses feuilles (encodés comme dans une URL, séparés par des virgules)
+    est renvoyé dans l'en-tête X-Excel-Sheets.
+
+    Si SERVER_TIMING_ENABLED est activé, l'en-tête Server-Timing donne la
+    durée de réception du fichier et celle des étapes du premier bloc (le
+    reste du fichier est traité pendant l'envoi de la réponse).
+
+    Un administrateur (PROFILING_ADMINS, jeton d'accès requis) peut demander
+    le profilage du traitement (`profile=true` ou en-tête X-Profile: 1) : le
+    fichier est alors traité dans le processus serveur, sous cProfile, et le
+    profil est enregistré dans PROFILE_DIR avec la durée de chaque règle
+    (voir app.core.profiling). Son identifiant est renvoyé dans l'en-tête
+    X-Profile-Id. Sans cette demande, le traitement n'est pas instrumenté.
     """
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Type de fichier invalide. Seuls les fichiers .csv sont acceptés par le backend."
-        )
-    print("Fichier reçu avec succès")
+    plan = await reorganizer_sevice.get_campaign_plan(db, campaign_uuid)
+    request_profile: Optional[RequestProfile] = None
+    if profile or request.headers.get("x-profile", "").lower() in ("1", "true"):
+        await require_profiling_admin(request, db)
+        request_profile = RequestProfile(label=f"campagne {campaign_uuid}")
+    timings = StageTimings()
+    with timings.measure("upload"):
+        upload = await receive_upload(request, inspect=reorganizer_sevice.header_inspector(plan))
+    file = upload.file
+    logger.debug(f"Fichier reçu : {file.filename}")
     try:
-        processed_csv_str = await reorganizer_sevice.process_csv_file(
-            db, 
-            campaign_uuid, 
-            file
+        input_dialect = await run_in_threadpool(reorganizer_sevice.sniff_upload, file)
+        # Le CSV est lu, traité et renvoyé bloc par bloc
+        csv_stream = await reorganizer_sevice.stream_upload(
+            plan, file, engine_name=engine, sheet=sheet, timings=timings, profile=request_profile,
+            dialect=dialect, input_dialect=input_dialect,
         )
+        _, filename = reorganizer_sevice.describe_upload(file)
+        headers = {
+            "Content-Disposition": f"attachment; filename=processed_{csv_filename(filename)}",
+            "Vary": "Accept-Encoding",
+        }
+        if is_excel_filename(filename):
+            # Feuilles du classeur, pour en traiter une autre sans appel préalable à /validate
+            sheets = await run_in_threadpool(list_sheets, file.file, filename)
+            headers["X-Excel-Sheets"] = ",".join(quote(name, safe="") for name in sheets)
+        if input_dialect is not None:
+            headers.update({
+                "X-Input-Encoding": input_dialect.charset,
+                "X-Input-BOM": "true" if input_dialect.bom else "false",
+                "X-Input-Delimiter": "\\t" if input_dialect.delimiter == "\t" else input_dialect.delimiter,
+                "X-Input-Quote-Char": input_dialect.quotechar,
+            })
+        if SERVER_TIMING_ENABLED:
+            headers["Server-Timing"] = timings.server_timing()
+        codec = negotiate_response_codec(request.headers.get("accept-encoding"))
+        if codec is not None:
+            csv_stream = compress_stream(csv_stream, codec)
+            headers["Content-Encoding"] = codec
+        if request_profile is not None:
+            csv_stream = request_profile.wrap(csv_stream, timings)
+            headers["X-Profile-Id"] = request_profile.id
 
         # Renvoyer le CSV traité en tant que fichier à télécharger
         return StreamingResponse(
-            iter([processed_csv_str]),
-            media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename=processed_{file.filename}"}
+            csv_stream,
+            media_type=f"text/csv; charset={dialect.body_encoding}",
+            headers=headers,
+            background=BackgroundTask(file.close),
         )
 
     except HTTPException as e:
         # Fait remonter les erreurs HTTP gérées
+        await file.close()
         raise e
     except Exception as e:
         # Gère les erreurs inattendues
+        await file.close()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Une erreur interne est survenue : {e}"
-        )
\ No newline at end of file
+        )
+
+@router.post(
+    "/process/{campaign_uuid}/validate",
+    response_model=HeaderValidationResponse,
+    openapi_extra=UPLOAD_OPENAPI_EXTRA,
+)
+async def validate_file_endpoint(
+    campaign_uuid: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    sheet: Optional[str] = Query(None, description="Feuille à vérifier pour un fichier Excel ; par défaut la première"),
+):
+    """
+    Vérifie qu'un fichier convient à une campagne en ne lisant que sa ligne d'en-tête.
+
+    Pour un CSV, le reste de l'upload n'est pas lu : la réponse est immédiate
+    quelle que soit la taille du fichier. Un classeur Excel est reçu en entier
+    (son en-tête n'est lisible qu'une fois l'archive complète) et la liste de
+    ses feuilles est renvoyée, pour permettre de choisir celle à traiter.
+    """
+    plan = await reorganizer_sevice.get_campaign_plan(db, campaign_uuid)
+    columns: list[str] = []
+    sheets: Optional[list[str]] = None
+
+    def inspect(file: UploadFile, head: bytes) -> bool:
+        compression, filename = reorganizer_sevice.describe_upload(file)
+        if is_excel_filename(filename):
+            return False
+        columns.extend(reorganizer_sevice.parse_csv_header(decompress_head(head, compression)))
+        return True
+
+    upload = await receive_upload(request, inspect=inspect)
+    if is_excel_filename(upload.file.filename):
+        try:
+            columns = await run_in_threadpool(
+                reorganizer_sevice.read_workbook_header, upload.file.file, upload.file.filename, sheet
+            )
+            sheets = await run_in_threadpool(list_sheets, upload.file.file, upload.file.filename)
+        finally:
+            await upload.file.close()
+
+    found_columns = set(columns)
+    missing_columns = [name for name in plan.input_columns if name not in found_columns]
+    return HeaderValidationResponse(
+        valid=not missing_columns,
+        columns=columns,
+        missing_columns=missing_columns,
+        sheets=sheets,
+    )
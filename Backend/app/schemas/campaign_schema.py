@@ -1,4 +1,4 @@
-from typing import Literal, Dict, List
+from typing import Literal, Dict, List, Optional
 from pydantic import BaseModel, Field
 from uuid import UUID
 from datetime import datetime
@@ -23,6 +23,7 @@ class CampaignBase(BaseModel):
     description: str
     outputFilenameTemplate:str
     fields: List[FielsBase]
+    engine: Optional[Literal["pandas", "arrow"]] = None
     
 class CampaignCreate(CampaignBase):
     pass
@@ -35,3 +36,21 @@ class CampaignResponse(CampaignBase):
     created_at: datetime
     updated_at: datetime
 
+
+
+class CampaignSummary(BaseModel):
+    """Campagne dans la liste : sans la configuration des colonnes, sauf si elle est demandée."""
+    uuid: UUID
+    name: str
+    description: Optional[str] = None
+    outputFilenameTemplate: Optional[str] = None
+    engine: Optional[Literal["pandas", "arrow"]] = None
+    field_count: int
+    fields: Optional[List[FielsBase]] = None
+    created_at: datetime
+    updated_at: datetime
+
+class CampaignPage(BaseModel):
+    items: List[CampaignSummary]
+    # Curseur à passer pour obtenir la page suivante ; None sur la dernière page
+    next_cursor: Optional[str] = None
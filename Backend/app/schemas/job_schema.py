@@ -0,0 +1,20 @@
+from typing import Literal, Optional
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import datetime
+
+
+class JobResponse(BaseModel):
+    job_id: UUID
+    campaign_uuid: str
+    filename: str
+    engine: Optional[str] = None
+    sheet: Optional[str] = None
+    compression: Optional[str] = None
+    status: Literal["queued", "running", "succeeded", "failed"]
+    rows_processed: int
+    bytes_written: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,10 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class HeaderValidationResponse(BaseModel):
+    valid: bool
+    columns: List[str]
+    missing_columns: List[str]
+    # Feuilles du classeur, pour un fichier Excel
+    sheets: Optional[List[str]] = None
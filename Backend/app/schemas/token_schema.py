@@ -7,4 +7,10 @@ class Token(BaseModel):
     token_type: str = "bearer"
 
 class TokenPayload(BaseModel):
-    sub: uuid.UUID
\ No newline at end of file
+    sub: uuid.UUID
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+class RevokedTokensResponse(BaseModel):
+    revoked: int
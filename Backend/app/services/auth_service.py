@@ -1,39 +1,192 @@
-from sqlalchemy.orm import Session
+import asyncio
+import logging
+import uuid
+from typing import Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
 from fastapi import HTTPException, status
-from app.core.security import verify_password, create_access_token, create_refresh_token, get_password_hash
+from jose import JWTError, jwt
+from app.core.config import ALGORITHM, REFRESH_TOKEN_SWEEP_BATCH_SIZE, REFRESH_TOKEN_SWEEP_INTERVAL, SECRET_KEY
+from app.core.security import (
+    REFRESH_TOKEN_TYPE, PasswordHashBusyError, create_access_token, create_refresh_token, hash_token,
+    verify_password_async,
+)
+from app.database.database import AsyncSessionLocal
 from app.schemas.user_schema import UserCreate
 from app.models.models import User, RefreshToken # Assurez-vous que vos modèles sont ici
-from datetime import datetime
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
 
-def get_user_by_login(db: Session, ldap_login: str):
-    return db.query(User).filter(User.ldap_login == ldap_login).first()
+async def get_user_by_login(db: AsyncSession, ldap_login: str):
+    result = await db.execute(select(User).where(User.ldap_login == ldap_login))
+    return result.scalars().first()
 
-def authenticate_user(db: Session, ldap_login: str, password: str):
-    user = get_user_by_login(db, ldap_login)
+async def authenticate_user(db: AsyncSession, ldap_login: str, password: str):
+    user = await get_user_by_login(db, ldap_login)
     if not user:
         return None
     # Pour un utilisateur local, on vérifie le mot de passe haché.
     # Si c'est un utilisateur LDAP, cette logique devra être adaptée.
-    if not user.hashed_password or not verify_password(password, user.hashed_password):
+    if not user.hashed_password:
         return None
+    try:
+        # bcrypt s'exécute dans le pool de hachage, hors de la boucle d'événements
+        if not await verify_password_async(password, user.hashed_password):
+            return None
+    except PasswordHashBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Trop de connexions simultanées, veuillez réessayer",
+            headers={"Retry-After": "1"},
+        )
     return user
 
-def create_user_tokens(db: Session, user: User, user_agent: str, ip_address: str):
+async def create_user_tokens(db: AsyncSession, user: User, user_agent: str, ip_address: str):
+    return await _issue_tokens(db, user.uuid, user_agent, ip_address)
+
+async def _issue_tokens(db: AsyncSession, user_id: uuid.UUID, user_agent: str, ip_address: str):
     # Créer le jeton d'accès
-    access_token = create_access_token(data={"sub": str(user.uuid)})
+    access_token = create_access_token(data={"sub": str(user_id)})
     
-    # Créer et stocker le jeton de rafraîchissement
-    refresh_token_str, expires_at = create_refresh_token(data={"sub": str(user.uuid)})
+    # Créer et stocker le jeton de rafraîchissement (seule son empreinte est conservée)
+    refresh_token_str, expires_at = create_refresh_token(data={"sub": str(user_id)})
     
     db_refresh_token = RefreshToken(
-        user_id=user.uuid,
-        token=refresh_token_str,
+        user_id=user_id,
+        token_hash=hash_token(refresh_token_str),
         user_agent=user_agent,
         ip_address=ip_address,
         expires_at=expires_at,
     )
     db.add(db_refresh_token)
-    db.commit()
-    db.refresh(db_refresh_token)
+    await db.commit()
     
-    return access_token, refresh_token_str
\ No newline at end of file
+    return access_token, refresh_token_str
+
+
+def _invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+async def refresh_user_tokens(db: AsyncSession, refresh_token: str, user_agent: str, ip_address: str):
+    """
+    Échange un jeton de rafraîchissement contre une nouvelle paire de jetons.
+
+    Le jeton présenté est révoqué par une seule mise à jour conditionnelle
+    (recherche par empreinte, index unique) : deux rafraîchissements
+    simultanés avec le même jeton ne peuvent pas réussir tous les deux.
+    Un jeton déjà révoqué qui est présenté de nouveau a probablement été
+    volé : tous les jetons de l'utilisateur sont alors révoqués.
+    """
+    try:
+        payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise _invalid_refresh_token()
+    if payload.get("type") != REFRESH_TOKEN_TYPE:
+        raise _invalid_refresh_token()
+
+    token_hash = hash_token(refresh_token)
+    result = await db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.is_revoked.is_(False),
+            RefreshToken.expires_at > datetime.now(timezone.utc),
+        )
+        .values(is_revoked=True)
+        .returning(RefreshToken.user_id)
+    )
+    user_id = result.scalar_one_or_none()
+    if user_id is None:
+        reused = await db.execute(
+            select(RefreshToken.user_id).where(RefreshToken.token_hash == token_hash, RefreshToken.is_revoked.is_(True))
+        )
+        reused_user_id = reused.scalar_one_or_none()
+        if reused_user_id is not None:
+            logger.warning(f"Jeton de rafraîchissement réutilisé pour l'utilisateur {reused_user_id} : révocation de ses sessions")
+            await revoke_user_tokens(db, reused_user_id)
+        raise _invalid_refresh_token()
+
+    return await _issue_tokens(db, user_id, user_agent, ip_address)
+
+async def revoke_refresh_token(db: AsyncSession, refresh_token: str) -> bool:
+    """Révoque un jeton de rafraîchissement (déconnexion) ; retourne False s'il est inconnu ou déjà révoqué."""
+    result = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.token_hash == hash_token(refresh_token), RefreshToken.is_revoked.is_(False))
+        .values(is_revoked=True)
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+async def revoke_user_tokens(db: AsyncSession, user_id: uuid.UUID) -> int:
+    """Révoque tous les jetons de rafraîchissement d'un utilisateur en une seule requête ; retourne leur nombre."""
+    result = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.is_revoked.is_(False))
+        .values(is_revoked=True)
+    )
+    await db.commit()
+    return result.rowcount
+
+async def purge_expired_refresh_tokens(batch_size: int = REFRESH_TOKEN_SWEEP_BATCH_SIZE) -> int:
+    """
+    Supprime les jetons de rafraîchissement expirés, par lots de `batch_size`.
+
+    Chaque lot est une transaction courte (index sur expires_at) : la table
+    n'est jamais verrouillée longtemps, même après une longue interruption.
+    Les jetons révoqués non expirés sont conservés pour détecter leur réutilisation.
+    """
+    deleted = 0
+    now = datetime.now(timezone.utc)
+    while True:
+        async with AsyncSessionLocal() as db:
+            expired = select(RefreshToken.uuid).where(RefreshToken.expires_at < now).limit(batch_size)
+            result = await db.execute(delete(RefreshToken).where(RefreshToken.uuid.in_(expired)))
+            await db.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+        # Laisse passer les autres requêtes entre deux lots
+        await asyncio.sleep(0)
+
+
+class RefreshTokenSweeper:
+    """Purge périodique des jetons de rafraîchissement expirés, dans la boucle d'événements de l'application."""
+
+    def __init__(self, interval: float = REFRESH_TOKEN_SWEEP_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="refresh-token-sweeper")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                deleted = await purge_expired_refresh_tokens()
+                if deleted:
+                    logger.info(f"{deleted} jeton(s) de rafraîchissement expiré(s) supprimé(s)")
+            except Exception as e:
+                # Base indisponible : nouvelle tentative au prochain passage
+                logger.error(f"Erreur lors de la purge des jetons de rafraîchissement : {e}")
+            await asyncio.sleep(self.interval)
+
+refresh_token_sweeper = RefreshTokenSweeper()
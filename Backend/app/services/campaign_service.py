@@ -1,31 +1,133 @@
+import base64
+import json
+import logging
+from datetime import datetime
 from app.schemas.campaign_schema import CampaignCreate, CampaignUpdate, CampaignResponse
-from typing import List
+from typing import List, Optional
+from uuid import UUID
+from fastapi import HTTPException, status
+from sqlalchemy import func, tuple_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.models.models import Campaign
+from app.core.cache import LRUCache
+from app.core.config import CAMPAIGN_CACHE_SIZE, CAMPAIGN_CACHE_TTL
+from app.core.plan_cache import invalidate_campaign_plan
+
+logger = logging.getLogger(__name__)
+
+# Campagnes lues récemment, par uuid, détachées de leur session (à traiter en lecture seule).
+# Les modifications faites par ce processus les invalident aussitôt ; celles
+# d'un autre processus sont prises en compte au plus tard après CAMPAIGN_CACHE_TTL.
+_campaigns = LRUCache(maxsize=CAMPAIGN_CACHE_SIZE, ttl=CAMPAIGN_CACHE_TTL)
+# Pages de la liste, par version de la table (voir get_list_version) et paramètres de la page
+_pages = LRUCache(maxsize=CAMPAIGN_CACHE_SIZE, ttl=CAMPAIGN_CACHE_TTL)
+
+class CampaignNameTakenError(ValueError):
+    """Le nom de campagne est déjà utilisé (index unique sur `name`)."""
+
+def invalidate_campaign(campaign_uuid) -> None:
+    """Oublie une campagne créée, modifiée ou supprimée (campagne, plan compilé et pages de la liste)."""
+    _campaigns.pop(str(campaign_uuid))
+    _pages.clear()
+    invalidate_campaign_plan(campaign_uuid)
 
 class CampaignService:
     """Service de gestion des campagnes."""
     
     @staticmethod
     async def create_campaign(db: AsyncSession, campaign: CampaignCreate):
-        """ Création de campagne """
-        result = await db.execute(select(Campaign).where(Campaign.name == campaign.name))
-        verify = result.scalar_one_or_none()
-        if verify:
-            raise ValueError("Cette campagne existe déjà")
+        """
+        Création de campagne
+
+        L'unicité du nom est garantie par l'index unique : pas de recherche
+        préalable, l'insertion échoue si le nom est déjà pris.
+        """
         campaign_dict = campaign.model_dump()
         db_campaign = Campaign(**campaign_dict)
         db.add(db_campaign)
-        await db.commit()
+        await _commit_unique_name(db)
         await db.refresh(db_campaign)
+        invalidate_campaign(db_campaign.uuid)
         return db_campaign
 
     @staticmethod
-    async def get_campaigns(db: AsyncSession, skip: int = 0):
-        """ Récupération de toutes les campagnes """
-        result = await db.execute(select(Campaign).offset(skip))
-        return result.scalars().all()
+    async def get_list_version(db: AsyncSession) -> str:
+        """
+        Version de la liste des campagnes : nombre de campagnes et dernière modification.
+
+        Toute création, modification ou suppression la change ; une seule
+        requête d'agrégat suffit à savoir si une page déjà envoyée est à jour.
+        """
+        result = await db.execute(select(func.count(), func.max(Campaign.updated_at)).select_from(Campaign))
+        count, last_updated_at = result.one()
+        return f"{count}:{last_updated_at.isoformat() if last_updated_at else ''}"
+
+    @staticmethod
+    async def get_campaigns(
+        db: AsyncSession,
+        limit: int,
+        cursor: Optional[str] = None,
+        include_fields: bool = False,
+        version: Optional[str] = None,
+    ):
+        """
+        Récupération d'une page de campagnes, triées par date de création puis uuid.
+
+        Pagination par curseur (keyset) : la page suivante reprend après la
+        dernière campagne renvoyée, sans parcourir les précédentes.
+        Le JSON `fields` n'est lu que si `include_fields` est demandé ;
+        seul le nombre de colonnes est calculé par la base.
+        Avec la `version` de la liste, la page est mise en cache.
+        """
+        key = (version, limit, cursor, include_fields)
+        if version is not None:
+            cached = _pages.get(key)
+            if cached is not None:
+                return cached
+
+        columns = [
+            Campaign.uuid, Campaign.name, Campaign.description, Campaign.outputFilenameTemplate,
+            Campaign.engine, Campaign.created_at, Campaign.updated_at,
+            func.json_array_length(Campaign.fields).label("field_count"),
+        ]
+        if include_fields:
+            columns.append(Campaign.fields)
+        query = select(*columns).order_by(Campaign.created_at, Campaign.uuid).limit(limit + 1)
+        if cursor:
+            created_at, campaign_uuid = _decode_cursor(cursor)
+            query = query.where(tuple_(Campaign.created_at, Campaign.uuid) > (created_at, campaign_uuid))
+
+        rows = (await db.execute(query)).mappings().all()
+        items = [dict(row) for row in rows[:limit]]
+        next_cursor = _encode_cursor(items[-1]["created_at"], items[-1]["uuid"]) if len(rows) > limit else None
+        page = {"items": items, "next_cursor": next_cursor}
+        if version is not None:
+            _pages.set(key, page)
+        return page
+
+    @staticmethod
+    async def get_campaign(db: AsyncSession, campaign_uuid: str):
+        """
+        Récupération d'une campagne, avec la configuration de ses colonnes.
+
+        Lecture au travers du cache : la base n'est interrogée qu'au premier
+        appel (ou après invalidation / expiration). La campagne renvoyée est
+        partagée entre les requêtes et ne doit pas être modifiée.
+        """
+        key = str(campaign_uuid)
+        cached = _campaigns.get(key)
+        if cached is not None:
+            return cached
+
+        result = await db.execute(select(Campaign).where(Campaign.uuid == campaign_uuid))
+        db_campaign = result.scalar_one_or_none()
+        if not db_campaign:
+            raise ValueError("Campagne non trouvée")
+        db.expunge(db_campaign)
+        _campaigns.set(key, db_campaign)
+        return db_campaign
 
     @staticmethod
     async def update_campaign(db: AsyncSession, campaign_uuid: str, campaign: CampaignUpdate):
@@ -38,8 +140,9 @@ class CampaignService:
         for key, value in campaign.model_dump().items():
             setattr(db_campaign, key, value)
 
-        await db.commit()
+        await _commit_unique_name(db)
         await db.refresh(db_campaign)
+        invalidate_campaign(campaign_uuid)
         return db_campaign
 
     @staticmethod
@@ -47,11 +150,36 @@ class CampaignService:
         """ Suppression de campagne """
         result = await db.execute(select(Campaign).where(Campaign.uuid == campaign_uuid))
         db_campaign = result.scalar_one_or_none()
-        print(f"resultat de la recherche de la campagne à supprimer {db_campaign}")
+        logger.debug(f"Campagne à supprimer : {db_campaign}")
         if not db_campaign:
             raise ValueError("Campagne non trouvée")
 
         await db.delete(db_campaign)
         await db.commit()
+        invalidate_campaign(campaign_uuid)
         return {"message": "Campagne supprimée avec succès"}
 
+
+async def _commit_unique_name(db: AsyncSession) -> None:
+    """Valide la transaction ; lève CampaignNameTakenError si le nom de campagne est déjà utilisé."""
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise CampaignNameTakenError("Cette campagne existe déjà")
+
+def _encode_cursor(created_at: datetime, campaign_uuid: UUID) -> str:
+    """Curseur opaque : position (created_at, uuid) de la dernière campagne d'une page."""
+    payload = json.dumps([created_at.isoformat(), str(campaign_uuid)])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, campaign_uuid = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), UUID(campaign_uuid)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Curseur de pagination invalide."
+        )
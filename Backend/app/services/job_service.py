@@ -0,0 +1,191 @@
+import logging
+import os
+import queue
+import shutil
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from threading import Lock, Thread
+from typing import BinaryIO, Optional
+
+from fastapi import HTTPException
+
+from app.core.config import (
+    JOB_MAX_CONCURRENCY, JOB_QUEUE_MAX_DEPTH, JOB_RETENTION_HOURS, JOB_SHUTDOWN_TIMEOUT, JOB_SPOOL_DIR,
+)
+from app.core.file_processor import CompiledPlan
+from app.services.reorganizer_sevice import iter_processed_file
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """La file d'attente des jobs a atteint JOB_QUEUE_MAX_DEPTH."""
+
+
+@dataclass
+class Job:
+    """Traitement d'un fichier exécuté en arrière-plan."""
+    campaign_uuid: str
+    filename: str
+    plan: CompiledPlan
+    engine: Optional[str] = None
+    # Feuille à traiter pour un classeur Excel (None = première feuille)
+    sheet: Optional[str] = None
+    # Compression du fichier d'entrée ("gzip", "zstd"), conservée telle quelle dans le spool
+    compression: Optional[str] = None
+    job_id: uuid.UUID = field(default_factory=uuid.uuid4)
+    status: str = "queued"
+    rows_processed: int = 0
+    bytes_written: int = 0
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @property
+    def input_path(self) -> Path:
+        return JOB_SPOOL_DIR / f"{self.job_id}.input"
+
+    @property
+    def result_path(self) -> Path:
+        return JOB_SPOOL_DIR / f"{self.job_id}.csv"
+
+    def add_progress(self, rows: int, written: int) -> None:
+        self.rows_processed += rows
+        self.bytes_written += written
+
+
+class JobManager:
+    """
+    File d'attente bornée de jobs, exécutés par un nombre fixe de threads.
+
+    Les threads ne font qu'orchestrer : la transformation elle-même est répartie
+    sur le pool de processus (voir app.core.executor).
+    Les jobs sont suivis en mémoire : leur état est propre à chaque processus serveur.
+    """
+
+    def __init__(self, max_concurrency: int = JOB_MAX_CONCURRENCY, max_queue_depth: int = JOB_QUEUE_MAX_DEPTH):
+        self.max_concurrency = max_concurrency
+        self._queue: queue.Queue[Optional[Job]] = queue.Queue(maxsize=max_queue_depth)
+        self._jobs: dict[uuid.UUID, Job] = {}
+        self._lock = Lock()
+        self._workers: list[Thread] = []
+
+    def submit(
+        self,
+        campaign_uuid: str,
+        filename: str,
+        plan: CompiledPlan,
+        source: BinaryIO,
+        engine: Optional[str] = None,
+        sheet: Optional[str] = None,
+        compression: Optional[str] = None,
+    ) -> Job:
+        """
+        Copie le fichier uploadé dans le répertoire de spool et met le job en file d'attente.
+
+        Lève QueueFullError si la file est pleine.
+        """
+        if self._queue.full():
+            raise QueueFullError()
+        self._start_workers()
+        self.purge_expired()
+
+        job = Job(
+            campaign_uuid=campaign_uuid, filename=filename, plan=plan,
+            engine=engine, sheet=sheet, compression=compression,
+        )
+        JOB_SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+        with open(job.input_path, "wb") as spooled_input:
+            shutil.copyfileobj(source, spooled_input)
+
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            job.input_path.unlink(missing_ok=True)
+            raise QueueFullError()
+        with self._lock:
+            self._jobs[job.job_id] = job
+        return job
+
+    def get(self, job_id: uuid.UUID) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def purge_expired(self) -> None:
+        """Supprime les jobs terminés depuis plus de JOB_RETENTION_HOURS, ainsi que leurs résultats."""
+        limit = datetime.now(timezone.utc) - timedelta(hours=JOB_RETENTION_HOURS)
+        with self._lock:
+            expired = [job for job in self._jobs.values() if job.finished_at and job.finished_at < limit]
+            for job in expired:
+                del self._jobs[job.job_id]
+        for job in expired:
+            job.result_path.unlink(missing_ok=True)
+
+    def shutdown(self, timeout: float = JOB_SHUTDOWN_TIMEOUT) -> None:
+        """
+        Arrête les threads une fois les jobs en cours terminés, en les
+        attendant au plus `timeout` secondes au total. Les threads encore
+        occupés au-delà sont abandonnés (threads démons, interrompus à la fin
+        du processus) et signalés dans les logs.
+        """
+        deadline = time.monotonic() + timeout
+        for _ in self._workers:
+            try:
+                self._queue.put(None, timeout=max(deadline - time.monotonic(), 0))
+            except queue.Full:
+                break
+        for worker in self._workers:
+            worker.join(max(deadline - time.monotonic(), 0))
+        running = [worker.name for worker in self._workers if worker.is_alive()]
+        if running:
+            logger.warning(f"Arrêt sans attendre la fin des jobs en cours ({', '.join(running)})")
+        self._workers = []
+
+    def _start_workers(self) -> None:
+        with self._lock:
+            if self._workers:
+                return
+            for index in range(self.max_concurrency):
+                worker = Thread(target=self._worker_loop, name=f"job-worker-{index}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _worker_loop(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self._run(job)
+
+    def _run(self, job: Job) -> None:
+        job.status = "running"
+        job.started_at = datetime.now(timezone.utc)
+        partial_result = job.result_path.with_suffix(".part")
+        try:
+            with open(job.input_path, "rb") as source, open(partial_result, "wb") as output:
+                blocks = iter_processed_file(
+                    source, job.plan, progress=job.add_progress, engine_name=job.engine,
+                    filename=job.filename, sheet=job.sheet, compression=job.compression,
+                )
+                for block in blocks:
+                    output.write(block)
+            os.replace(partial_result, job.result_path)
+            job.status = "succeeded"
+        except HTTPException as e:
+            job.status = "failed"
+            job.error = str(e.detail)
+        except Exception as e:
+            logger.exception(f"Échec du job {job.job_id}")
+            job.status = "failed"
+            job.error = f"Une erreur interne est survenue : {e}"
+        finally:
+            partial_result.unlink(missing_ok=True)
+            job.input_path.unlink(missing_ok=True)
+            job.finished_at = datetime.now(timezone.utc)
+
+
+job_manager = JobManager()
@@ -1,155 +1,283 @@
 import logging
-from ldap3 import ALL, SIMPLE, Connection, Server
+import queue
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from ldap3 import NONE, SIMPLE, SYNC, Connection, Server
+from ldap3.core.exceptions import LDAPBindError, LDAPException
 from ldap3.utils.conv import escape_filter_chars
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.models.models import User, LdapConfig
-from app.database.database import get_session, get_engine
-from app.utils.security import hash_password
+
+from app.core.cache import LRUCache
+from app.core.config import (
+    LDAP_CONFIG_CACHE_SECONDS,
+    LDAP_CONNECT_TIMEOUT,
+    LDAP_POOL_SIZE,
+    LDAP_RECEIVE_TIMEOUT,
+    LDAP_USER_CACHE_SIZE,
+    LDAP_USER_CACHE_TTL,
+    LDAP_USER_NEGATIVE_CACHE_TTL,
+)
+from app.core.security import get_password_hash_async
+from app.models.models import LdapConfig, User
 
 logger = logging.getLogger(__name__)
 
-async def verify_ldap_user_exists(ldap_login: str, db: AsyncSession) -> bool:
+LDAP_CONFIG_NAME = "CHEM_AUTHENTICATION"
+
+
+@dataclass(frozen=True)
+class LdapSettings:
+    """Copie de la configuration LDAP, détachée de la session SQLAlchemy."""
+    host: str
+    port: int
+    base_dn: Optional[str]
+    bind_dn: Optional[str]
+    bind_password: Optional[str]
+
+    @classmethod
+    def from_model(cls, config: LdapConfig) -> "LdapSettings":
+        return cls(
+            host=config.host,
+            port=config.port,
+            base_dn=config.base_dn,
+            bind_dn=config.bind_dn,
+            bind_password=config.bind_password,
+        )
+
+
+class LdapClient:
     """
-    Vérifie qu'un utilisateur existe dans le serveur LDAP sans authentification
+    Client LDAP synchrone, à appeler hors de la boucle d'événements.
+
+    Les recherches passent par un pool de connexions de service déjà
+    authentifiées (au plus LDAP_POOL_SIZE), réutilisées d'un appel à l'autre.
+    L'authentification d'un utilisateur ouvre une connexion dédiée, fermée
+    aussitôt : la connexion de service garde ainsi son identité.
+    Le schéma du serveur n'est jamais téléchargé (get_info=NONE).
     """
-    try:
-        # Récupération de la configuration LDAP
-        result = await db.execute(
-            select(LdapConfig).where(LdapConfig.name == "CHEM_AUTHENTICATION")
+
+    def __init__(self, settings: LdapSettings, pool_size: int = LDAP_POOL_SIZE, client_strategy=SYNC):
+        self.settings = settings
+        self.client_strategy = client_strategy
+        self.server = Server(
+            host=settings.host,
+            port=settings.port,
+            get_info=NONE,
+            use_ssl=False,
+            connect_timeout=LDAP_CONNECT_TIMEOUT,
         )
-        ldap_config = result.scalars().first()
+        self._idle: queue.LifoQueue[Connection] = queue.LifoQueue()
+        # Une place par connexion de service pouvant exister simultanément
+        self._slots = queue.Queue(maxsize=pool_size)
+        for _ in range(pool_size):
+            self._slots.put(None)
 
-        if not ldap_config:
-            logger.error("Configuration LDAP introuvable")
-            return False
+    def _connect(self, user: Optional[str], password: Optional[str]) -> Connection:
+        """
+        Ouvre et authentifie une connexion.
 
-        # Configuration du serveur LDAP
-        server = Server(
-            host=ldap_config.host,
-            port=ldap_config.port,
-            get_info=ALL,
-            use_ssl=False
+        Lève LDAPBindError si les identifiants sont refusés, une autre
+        LDAPException si le serveur est injoignable.
+        """
+        conn = Connection(
+            self.server,
+            user=user,
+            password=password,
+            authentication=SIMPLE,
+            client_strategy=self.client_strategy,
+            receive_timeout=LDAP_RECEIVE_TIMEOUT,
         )
+        if not conn.bind():
+            description = (conn.result or {}).get("description") or conn.last_error
+            conn.unbind()
+            raise LDAPBindError(description)
+        return conn
 
-        # Connexion avec un compte de service pour recherche
-        with Connection(
-            server,
-            user=f"{ldap_config.bind_dn}",
-            password=ldap_config.bind_password,
-            authentication=SIMPLE,
-            auto_bind=True
-        ) as conn:
-            
-            # Recherche de l'utilisateur (sécurisée contre injection LDAP)
-            escaped_login = escape_filter_chars(ldap_login)
-            search_filter = f"(sAMAccountName={escaped_login})"
-            conn.search(
-                search_base=ldap_config.base_dn,
-                search_filter=search_filter,
-                attributes=['cn', 'sAMAccountName', 'mail']
-            )
-            
-            return len(conn.entries) > 0
+    def _acquire(self) -> Connection:
+        self._slots.get(timeout=LDAP_CONNECT_TIMEOUT + LDAP_RECEIVE_TIMEOUT)
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._connect(self.settings.bind_dn, self.settings.bind_password)
+        except Exception:
+            self._slots.put(None)
+            raise
 
-    except Exception as e:
-        logger.error(f"Erreur lors de la vérification LDAP: {e}")
+    def _release(self, conn: Connection, healthy: bool) -> None:
+        if healthy:
+            self._idle.put(conn)
+        else:
+            conn.unbind()
+        self._slots.put(None)
+
+    def search_user(self, ldap_login: str) -> bool:
+        """
+        Indique si un compte existe, via une connexion de service du pool.
+
+        Une connexion rompue (serveur redémarré, délai d'inactivité) est
+        remplacée et la recherche rejouée une fois.
+        """
+        escaped_login = escape_filter_chars(ldap_login)
+        for attempt in range(2):
+            conn = self._acquire()
+            try:
+                conn.search(
+                    search_base=self.settings.base_dn,
+                    search_filter=f"(sAMAccountName={escaped_login})",
+                    attributes=['sAMAccountName'],
+                    size_limit=1,
+                )
+            except LDAPException:
+                self._release(conn, healthy=False)
+                if attempt:
+                    raise
+                continue
+            found = len(conn.entries) > 0
+            self._release(conn, healthy=True)
+            return found
         return False
 
-async def authenticate_ldap(user: User, password: str, db: AsyncSession) -> bool:
+    def authenticate(self, user_dn: str, password: str) -> bool:
+        """Vérifie un couple identifiant / mot de passe par une authentification simple."""
+        # Un mot de passe vide déclencherait une authentification anonyme, acceptée par le serveur
+        if not password:
+            return False
+        try:
+            conn = self._connect(user_dn, password)
+        except LDAPBindError:
+            # Identifiants refusés ; les erreurs réseau, elles, remontent à l'appelant
+            return False
+        try:
+            return conn.bound
+        finally:
+            conn.unbind()
+
+    def close(self) -> None:
+        """Ferme les connexions de service inactives."""
+        while True:
+            try:
+                self._idle.get_nowait().unbind()
+            except queue.Empty:
+                return
+
+
+# Configuration et client partagés par le processus, rechargés après invalidation
+# ou au plus tard après LDAP_CONFIG_CACHE_SECONDS (modification par un autre processus).
+_client: Optional[LdapClient] = None
+_loaded_at = 0.0
+_client_lock = Lock()
+
+# Existence des comptes LDAP, par identifiant (insensible à la casse, comme sAMAccountName).
+# Un compte introuvable est gardé moins longtemps : il peut être créé entre-temps.
+# Les erreurs (serveur injoignable) ne sont jamais mises en cache.
+_user_exists = LRUCache(maxsize=LDAP_USER_CACHE_SIZE)
+
+async def get_ldap_client(db: AsyncSession) -> Optional[LdapClient]:
+    """Retourne le client LDAP correspondant à la configuration CHEM_AUTHENTICATION, ou None si elle est absente."""
+    global _client, _loaded_at
+    if _client is not None and time.monotonic() - _loaded_at < LDAP_CONFIG_CACHE_SECONDS:
+        return _client
+
+    result = await db.execute(select(LdapConfig).where(LdapConfig.name == LDAP_CONFIG_NAME))
+    ldap_config = result.scalars().first()
+    settings = LdapSettings.from_model(ldap_config) if ldap_config else None
+
+    with _client_lock:
+        if settings is None:
+            previous, _client = _client, None
+        elif _client is not None and _client.settings == settings:
+            previous = None
+        else:
+            previous, _client = _client, LdapClient(settings)
+        _loaded_at = time.monotonic()
+        client = _client
+    if previous is not None:
+        # Autre annuaire : les résultats en cache ne sont plus valables
+        previous.close()
+        _user_exists.clear()
+    return client
+
+def invalidate_ldap_config() -> None:
+    """À appeler après modification de la configuration LDAP : elle sera relue au prochain appel."""
+    global _client, _loaded_at
+    with _client_lock:
+        previous, _client, _loaded_at = _client, None, 0.0
+    if previous is not None:
+        previous.close()
+    _user_exists.clear()
+
+def invalidate_ldap_user(ldap_login: Optional[str] = None) -> None:
+    """Oublie le résultat en cache pour un identifiant (ou pour tous si aucun n'est donné)."""
+    if ldap_login is None:
+        _user_exists.clear()
+    else:
+        _user_exists.pop(ldap_login.lower())
+
+def ldap_user_cache_stats() -> dict[str, int]:
+    """Compteurs du cache d'existence des comptes LDAP (hits, misses, taille)."""
+    return _user_exists.stats()
+
+async def verify_ldap_user_exists(ldap_login: str, db: AsyncSession) -> bool:
     """
-    Authentifie un utilisateur via LDAP et sauvegarde le mot de passe à la première connexion
+    Vérifie qu'un utilisateur existe dans le serveur LDAP sans authentification
+
+    Le résultat est mis en cache (LDAP_USER_CACHE_TTL si le compte existe,
+    LDAP_USER_NEGATIVE_CACHE_TTL sinon) : les vérifications répétées ne
+    sollicitent ni l'annuaire ni la base de données.
     """
-    try:
-        # Récupération de la configuration LDAP
-        result = await db.execute(
-            select(LdapConfig).where(LdapConfig.name == "CHEM_AUTHENTICATION")
-        )
-        ldap_config = result.scalars().first()
+    key = ldap_login.lower()
+    cached = _user_exists.get(key)
+    if cached is not None:
+        return cached
 
-        if not ldap_config:
+    try:
+        client = await get_ldap_client(db)
+        if client is None:
             logger.error("Configuration LDAP introuvable")
             return False
 
-        # Configuration du serveur LDAP
-        server = Server(
-            host=ldap_config.host,
-            port=ldap_config.port,
-            get_info=ALL,
-            use_ssl=False
-        )
-
-        # Construction du DN utilisateur
-        user_dn = f"{user.ldap_login}@{ldap_config.bind_dn}"
-
-        # Tentative d'authentification
-        with Connection(
-            server,
-            user=user_dn,
-            password=password,
-            authentication=SIMPLE,
-            auto_bind=True
-        ) as conn:
-            
-            if conn.bound:
-                # Sauvegarder le mot de passe hashé à la première connexion réussie
-                if not user.hashed_password:
-                    user.hashed_password = hash_password(password)
-                    db.add(user)
-                    await db.commit()
-                    logger.info(f"Mot de passe sauvegardé pour {user.ldap_login}")
-                
-                return True
-            
-            return False
+        # Recherche hors de la boucle d'événements, sur une connexion de service du pool
+        exists = await run_in_threadpool(client.search_user, ldap_login)
+        _user_exists.set(key, exists, ttl=LDAP_USER_CACHE_TTL if exists else LDAP_USER_NEGATIVE_CACHE_TTL)
+        return exists
 
     except Exception as e:
-        logger.error(f"Erreur authentification LDAP pour {user.ldap_login}: {e}")
+        logger.error(f"Erreur lors de la vérification LDAP: {e}")
         return False
-    
 
-async def verify_ldap_user_exists(ldap_login: str, db: AsyncSession) -> bool:
+async def authenticate_ldap(user: User, password: str, db: AsyncSession) -> bool:
     """
-    Vérifie qu'un utilisateur existe dans LDAP sans authentification
+    Authentifie un utilisateur via LDAP et sauvegarde le mot de passe à la première connexion
     """
     try:
-        # Récupération config LDAP
-        result = await db.execute(
-            select(LdapConfig).where(LdapConfig.name == "CHEM_AUTHENTICATION")
-        )
-        ldap_config = result.scalars().first()
-
-        if not ldap_config:
+        client = await get_ldap_client(db)
+        if client is None:
             logger.error("Configuration LDAP introuvable")
             return False
 
-        # Connexion avec compte de service
-        server = Server(
-            host=ldap_config.host,
-            port=ldap_config.port,
-            get_info=ALL,
-            use_ssl=False
-        )
+        # Construction du DN utilisateur
+        user_dn = f"{user.ldap_login}@{client.settings.bind_dn}"
 
-        with Connection(
-            server,
-            user=ldap_config.bind_dn,
-            password=ldap_config.bind_password,
-            authentication=SIMPLE,
-            auto_bind=True
-        ) as conn:
-            
-            # Recherche utilisateur (sécurisée contre injection LDAP)
-            escaped_login = escape_filter_chars(ldap_login)
-            search_filter = f"(sAMAccountName={escaped_login})"
-            conn.search(
-                search_base=ldap_config.base_dn,
-                search_filter=search_filter,
-                attributes=['cn', 'sAMAccountName']
-            )
-            
-            return len(conn.entries) > 0
+        # Tentative d'authentification, hors de la boucle d'événements
+        if not await run_in_threadpool(client.authenticate, user_dn, password):
+            return False
+
+        # Sauvegarder le mot de passe hashé à la première connexion réussie
+        if not user.hashed_password:
+            user.hashed_password = await get_password_hash_async(password)
+            db.add(user)
+            await db.commit()
+            logger.info(f"Mot de passe sauvegardé pour {user.ldap_login}")
+
+        return True
 
     except Exception as e:
-        logger.error(f"Erreur vérification LDAP: {e}")
-        return False
\ No newline at end of file
+        logger.error(f"Erreur authentification LDAP pour {user.ldap_login}: {e}")
+        return False
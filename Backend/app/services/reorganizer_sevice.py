@@ -1,70 +1,335 @@
-import pandas as pd
+import functools
+import logging
+from contextlib import ExitStack
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status, UploadFile
-from sqlalchemy.future import select
-from io import StringIO
+from fastapi.concurrency import run_in_threadpool
+from typing import BinaryIO, Callable, Iterator, Optional
 import uuid
 
-from app.models.models import Campaign 
-from app.core.file_processor import process_dataframe, CampaignColumn, ColumnRule
+from app.core.config import CSV_CHUNK_SIZE, UPLOAD_SNIFF_BYTES
+from app.core import plan_cache
+from app.core.compression import decompress_head, detect_upload_codec, open_decompressed
+from app.core.csv_writer import DEFAULT_DIALECT, OutputDialect, iter_blocks
+from app.core.engines import get_processing_engine, parse_header_line, read_header
+from app.core.excel import is_excel_filename, read_excel_chunks, read_excel_header
+from app.core.executor import map_partitions, process_partition
+from app.core.file_processor import CompiledPlan, check_missing_columns
+from app.core.metrics import StageTimings, metered, observe_processing, timed_parse
+from app.core.profiling import RequestProfile
+from app.core.sniffing import InputDialect, sniff_dialect, tolerant_source
+from app.core.upload import UploadInspector, map_file
+from app.services.campaign_service import CampaignService
 
-async def process_csv_file(db: AsyncSession, campaign_uuid: str, file: UploadFile) -> str:
+logger = logging.getLogger(__name__)
+
+async def get_campaign_plan(db: AsyncSession, campaign_uuid: str) -> CompiledPlan:
     """
-    Orchestre le traitement d'un fichier CSV pour une campagne donnée.
+    Charge une campagne et retourne son plan de traitement compilé.
+
+    Le plan est mis en cache par campagne et par version (`updated_at`) : la
+    configuration n'est triée et validée qu'une fois, pas à chaque requête.
     """
-    # 1. Récupérer la campagne depuis la base de données
-    result = await db.execute(select(Campaign).where(Campaign.uuid == campaign_uuid))
-    campaign = result.scalar_one_or_none()
-    if not campaign:
+    # 1. Récupérer la campagne (cache de CampaignService, à défaut la base de données)
+    try:
+        campaign = await CampaignService.get_campaign(db, campaign_uuid)
+    except ValueError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Campagne non trouvée."
         )
 
-    # 2. Lire le contenu du fichier CSV avec Pandas
-    try:
-        # Lire le contenu du fichier uploadé en mémoire
-        content = file.file.read().decode("utf-8")
-        # Créer un DataFrame Pandas à partir du contenu
-        df = pd.read_csv(StringIO(content))
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Impossible de lire le fichier CSV : {e}"
-        )
-    print("Extraction effectué avec succès")
-    # 3. Préparer la configuration pour le processeur
-    # Votre modèle stocke probablement le JSON, il faut le parser.
-    # Ici, nous simulons la structure attendue par process_dataframe.
-    # Assurez-vous d'adapter ceci à la structure réelle de votre BDD.
-    
-    # Exemple de structure de "columns" dans votre modèle BDD:
+    # 2. Compiler (ou récupérer du cache) la configuration des colonnes
+    # Exemple de structure de "fields" dans le modèle BDD:
     # [
     #   {"name": "col1", "displayName": "Colonne 1", "order": 0, "rules": [{"type": "TO_UPPERCASE"}]},
     #   {"name": "col2", "displayName": "Colonne 2", "order": 1, "rules": [{"type": "MULTIPLY_BY", "value": 1.2}]}
     # ]
     try:
-        # Trier les colonnes par leur ordre
-        sorted_columns_config = sorted(campaign.fields, key=lambda col: col.get('order', 0))
-        print("Trie effectué avec succès", sorted_columns_config)
-        campaign_config = [
-            CampaignColumn(
-                name=col.get('name'),
-                rules=[ColumnRule(type=rule.get('type'), value=rule.get('value')) for rule in col.get('rules', [])]
-            )
-            for col in sorted_columns_config
-        ]
+        return plan_cache.get_campaign_plan(campaign)
     except (TypeError, AttributeError):
          raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="La configuration des colonnes pour cette campagne est invalide."
         )
-    print("Trie terminer avec succès🎈🎈🎈")
-    # 4. Appeler le processeur de données
-    processed_df = process_dataframe(df, campaign_config)
-    print("Traitement effectué avec succès")
-    # 5. Convertir le DataFrame final en une chaîne CSV
-    output = StringIO()
-    processed_df.to_csv(output, index=False)
-    
-    return output.getvalue()
\ No newline at end of file
+
+def check_upload_filename(filename: str, compression: Optional[str] = None) -> None:
+    """
+    Lève une erreur 400 si le fichier uploadé n'est ni un .csv ni un classeur Excel.
+
+    `filename` est le nom sans extension de compression ; seuls les CSV
+    peuvent être compressés (un classeur est déjà une archive compressée).
+    """
+    if not (filename.endswith('.csv') or is_excel_filename(filename)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Type de fichier invalide. Seuls les fichiers .csv, .xlsx et .xls sont acceptés par le backend."
+        )
+    if compression is not None and is_excel_filename(filename):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Les fichiers Excel compressés ne sont pas acceptés : envoyez le classeur tel quel."
+        )
+
+def describe_upload(file: UploadFile) -> tuple[Optional[str], str]:
+    """Retourne la compression d'un fichier uploadé et son nom sans extension de compression, après validation."""
+    compression, filename = detect_upload_codec(file.filename or "", file.headers)
+    check_upload_filename(filename, compression)
+    return compression, filename
+
+def _checked_header(read: Callable[[], list[str]], kind: str = "CSV") -> list[str]:
+    """Lit une ligne d'en-tête ; lève une erreur 400 si elle est illisible ou vide."""
+    try:
+        header = read()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Impossible de lire le fichier {kind} : {e}"
+        )
+    if not header:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Impossible de lire le fichier {kind} : le fichier est vide."
+        )
+    return header
+
+def detect_input_dialect(sample: bytes) -> InputDialect:
+    """Format (encodage, séparateur, guillemets) d'un CSV d'après ses premiers octets ; erreur 400 s'il n'est pas pris en charge."""
+    try:
+        return sniff_dialect(sample)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Impossible de lire le fichier CSV : {e}"
+        )
+
+def sniff_source(source: BinaryIO) -> InputDialect:
+    """Détecte le format d'un flux CSV sur ses UPLOAD_SNIFF_BYTES premiers octets, sans déplacer la position de lecture."""
+    position = source.tell()
+    sample = source.read(UPLOAD_SNIFF_BYTES)
+    source.seek(position)
+    return detect_input_dialect(sample)
+
+def sniff_upload(file: UploadFile) -> Optional[InputDialect]:
+    """Format d'un CSV uploadé (décompressé si besoin), ou None pour un classeur Excel."""
+    compression, filename = describe_upload(file)
+    if is_excel_filename(filename):
+        return None
+    file.file.seek(0)
+    dialect = sniff_source(open_decompressed(file.file, compression))
+    file.file.seek(0)
+    return dialect
+
+def parse_csv_header(head: bytes) -> list[str]:
+    """Retourne les colonnes d'un CSV à partir de ses premiers octets, dans le format détecté sur ces octets."""
+    dialect = detect_input_dialect(head)
+    return _checked_header(lambda: parse_header_line(head, dialect))
+
+def read_workbook_header(source: BinaryIO, filename: str, sheet: Optional[str] = None) -> list[str]:
+    """Retourne les colonnes d'une feuille Excel."""
+    return _checked_header(lambda: read_excel_header(source, filename, sheet), kind="Excel")
+
+def header_inspector(plan: CompiledPlan) -> UploadInspector:
+    """
+    Contrôle à appliquer au début d'un upload (voir app.core.upload.receive_upload).
+
+    L'extension et les colonnes sont vérifiées dès réception du début du
+    fichier : un fichier invalide est refusé sans attendre la fin de l'upload.
+    Les colonnes d'un classeur Excel (archive dont l'en-tête ne peut être lu
+    qu'une fois le fichier complet) sont vérifiées au début du traitement.
+    """
+    def inspect(file: UploadFile, head: bytes) -> None:
+        compression, filename = describe_upload(file)
+        if not is_excel_filename(filename):
+            check_missing_columns(plan, parse_csv_header(decompress_head(head, compression)))
+    return inspect
+
+def iter_processed_file(
+    source: BinaryIO,
+    plan: CompiledPlan,
+    chunksize: int = CSV_CHUNK_SIZE,
+    progress: Optional[Callable[[int, int], None]] = None,
+    engine_name: Optional[str] = None,
+    filename: str = "",
+    sheet: Optional[str] = None,
+    compression: Optional[str] = None,
+    timings: Optional[StageTimings] = None,
+    parallel: bool = True,
+    dialect: OutputDialect = DEFAULT_DIALECT,
+    input_dialect: Optional[InputDialect] = None,
+) -> Iterator[bytes]:
+    """
+    Traite un flux CSV (ou un classeur Excel) bloc par bloc et produit le CSV résultant sous forme d'octets.
+
+    Les colonnes manquantes sont détectées sur la seule ligne d'en-tête, puis
+    seules les colonnes utilisées par la campagne sont analysées.
+    Le premier bloc est lu et traité dès l'appel, afin que les erreurs de lecture
+    soient levées avant le début de la réponse HTTP.
+    Les blocs suivants sont répartis sur le pool de processus (voir
+    app.core.executor) et restitués dans l'ordre du fichier d'origine.
+    La mémoire utilisée reste bornée par la taille d'un bloc, quelle que soit
+    la taille du fichier. `progress(lignes, octets)` est appelé après chaque bloc.
+
+    Le moteur d'exécution est celui demandé (`engine_name`), à défaut celui
+    de la campagne, à défaut le moteur par défaut.
+
+    Si `filename` désigne un classeur .xlsx / .xls, la feuille `sheet` (à
+    défaut la première) est lue en flux, par blocs de lignes, puis traitée
+    exactement comme un CSV.
+    Un CSV compressé (`compression` : "gzip" ou "zstd") est décompressé à la
+    volée, sans être écrit décompressé sur disque ni en mémoire.
+    Un CSV présent sur disque (upload écrit dans son fichier temporaire,
+    fichier d'entrée d'un job) est lu par projection en mémoire (voir
+    app.core.upload.map_file) : la mémoire utilisée dépend de la taille des
+    blocs, pas de celle du fichier.
+
+    La durée de chaque étape (lecture, analyse, règles, réorganisation,
+    sérialisation) et les volumes traités sont ajoutés à `timings`, puis
+    exportés (voir app.core.metrics) une fois le fichier entièrement traité.
+    Si `parallel` est faux, tous les blocs sont traités dans le thread appelant.
+
+    Le format du CSV reçu (`input_dialect` : encodage, séparateur, guillemets)
+    est, s'il n'est pas fourni, détecté sur le début du flux (voir
+    app.core.sniffing) ; le flux est ensuite décodé au fil de la lecture.
+    Un octet non UTF-8 rencontré plus loin dans un fichier détecté en UTF-8
+    est lu en cp1252 (voir Utf8FallbackReader) plutôt que d'interrompre une
+    réponse déjà commencée.
+    Le CSV produit est écrit au format `dialect` (séparateur, guillemets,
+    fin de ligne, encodage ; voir app.core.csv_writer) et restitué en blocs
+    d'au plus OUTPUT_BLOCK_SIZE octets.
+    """
+    blocks = _processed_blocks(
+        source, plan, chunksize, progress, engine_name, filename, sheet, compression,
+        timings if timings is not None else StageTimings(), parallel, dialect, input_dialect,
+    )
+    # Prépare la lecture et traite le premier bloc
+    next(blocks)
+    return blocks
+
+def _processed_blocks(
+    source: BinaryIO,
+    plan: CompiledPlan,
+    chunksize: int,
+    progress: Optional[Callable[[int, int], None]],
+    engine_name: Optional[str],
+    filename: str,
+    sheet: Optional[str],
+    compression: Optional[str],
+    timings: StageTimings,
+    parallel: bool,
+    dialect: OutputDialect,
+    input_dialect: Optional[InputDialect],
+) -> Iterator[bytes]:
+    """
+    Générateur de iter_processed_file. Un premier élément vide marque la fin
+    de la préparation (lecture de l'en-tête et traitement du premier bloc).
+
+    Les ressources de lecture (projection en mémoire, décompression, lecteur
+    CSV) sont ouvertes dans le générateur : une fois celui-ci démarré, elles
+    sont libérées à sa fermeture ou à sa destruction, y compris si la réponse
+    n'est jamais envoyée (client déconnecté avant le premier octet).
+    """
+    engine = get_processing_engine(engine_name or plan.engine)
+    excel = is_excel_filename(filename)
+    with ExitStack() as resources:
+        mapped = source if excel else map_file(source)
+        if mapped is not source:
+            resources.callback(mapped.close)
+        decompressed = open_decompressed(mapped, compression)
+        if decompressed is not mapped:
+            resources.callback(decompressed.close)
+        source = decompressed
+        if not excel:
+            if input_dialect is None:
+                input_dialect = sniff_source(source)
+            source = tolerant_source(source, input_dialect)
+        source = metered(source, timings)
+        if excel:
+            header = read_workbook_header(source, filename, sheet)
+        else:
+            header = _checked_header(lambda: read_header(source, input_dialect))
+        check_missing_columns(plan, header)
+
+        try:
+            if excel:
+                reader = engine.from_frames(read_excel_chunks(
+                    source, filename, chunksize, columns=plan.input_columns, sheet=sheet
+                ))
+            else:
+                reader = engine.read_chunks(source, chunksize, columns=plan.input_columns, dialect=input_dialect)
+            reader = timed_parse(reader, timings)
+            resources.callback(reader.close)
+            first_chunk = next(reader)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Impossible de lire le fichier CSV : {e}"
+            )
+        first_output, first_timings = process_partition(
+            first_chunk, plan, header=True, engine_name=engine.name, dialect=dialect
+        )
+        timings.merge(first_timings)
+        yield b""
+
+        if progress is not None:
+            progress(engine.num_rows(first_chunk), len(first_output))
+        yield from iter_blocks(first_output)
+        for output in map_partitions(reader, plan, progress, engine.name, timings, parallel, dialect):
+            yield from iter_blocks(output)
+        observe_processing(timings, engine.name)
+
+async def stream_csv_file(
+    db: AsyncSession,
+    campaign_uuid: str,
+    file: UploadFile,
+    engine_name: Optional[str] = None,
+    sheet: Optional[str] = None,
+) -> Iterator[bytes]:
+    """
+    Orchestre le traitement en flux d'un fichier CSV ou Excel pour une campagne donnée.
+
+    Le fichier uploadé est lu directement depuis son fichier temporaire, sans
+    jamais être chargé entièrement en mémoire. Le traitement s'exécute hors de
+    la boucle d'événements, qui reste disponible pour les autres requêtes.
+    """
+    plan = await get_campaign_plan(db, campaign_uuid)
+    return await stream_upload(plan, file, engine_name=engine_name, sheet=sheet)
+
+async def stream_upload(
+    plan: CompiledPlan,
+    file: UploadFile,
+    engine_name: Optional[str] = None,
+    sheet: Optional[str] = None,
+    timings: Optional[StageTimings] = None,
+    profile: Optional[RequestProfile] = None,
+    dialect: OutputDialect = DEFAULT_DIALECT,
+    input_dialect: Optional[InputDialect] = None,
+) -> Iterator[bytes]:
+    """
+    Lance le traitement en flux d'un fichier déjà reçu, pour un plan déjà chargé.
+
+    Si `profile` est fourni, la lecture et le traitement du premier bloc sont
+    profilés ; tous les blocs sont alors traités dans le processus serveur
+    (le profileur ne voit pas le pool de processus). Le profilage des blocs
+    suivants est à la charge de l'appelant (voir RequestProfile.wrap).
+    """
+    compression, filename = describe_upload(file)
+    await run_in_threadpool(file.file.seek, 0)
+    process = iter_processed_file if profile is None else functools.partial(profile.call, iter_processed_file)
+    csv_stream = await run_in_threadpool(
+        process, file.file, plan,
+        engine_name=engine_name, filename=filename, sheet=sheet, compression=compression, timings=timings,
+        parallel=profile is None, dialect=dialect, input_dialect=input_dialect,
+    )
+    logger.debug(f"Traitement de {filename} démarré")
+    return csv_stream
+
+async def process_csv_file(db: AsyncSession, campaign_uuid: str, file: UploadFile) -> str:
+    """
+    Orchestre le traitement d'un fichier CSV pour une campagne donnée.
+    """
+    csv_stream = await stream_csv_file(db, campaign_uuid, file)
+    content = await run_in_threadpool(b"".join, csv_stream)
+    return content.decode("utf-8")
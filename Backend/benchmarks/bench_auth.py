@@ -0,0 +1,82 @@
+"""
+Mesure le débit des connexions et leur latence selon le facteur de coût bcrypt :
+vérification du mot de passe dans la boucle d'événements (comportement
+historique) contre vérification dans le pool de hachage de app.core.security.
+
+Seule la vérification bcrypt est mesurée (la base de données n'intervient pas).
+Le retard maximal de la boucle d'événements indique combien de temps les
+autres requêtes restent bloquées pendant les connexions.
+
+Usage (depuis le dossier Backend) :
+    python -m benchmarks.bench_auth --logins 100 --rounds 8 10 12 --concurrency 1 10 50
+"""
+import argparse
+import asyncio
+import time
+
+from passlib.context import CryptContext
+
+from app.core import security
+from benchmarks.bench_ldap import report
+
+PASSWORD = "mot-de-passe-de-test"
+
+async def run_logins(verify, logins: int, concurrency: int) -> tuple[list[float], float, float]:
+    """Exécute `logins` vérifications, `concurrency` à la fois ; retourne latences, durée totale et retard maximal de la boucle."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    max_lag = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal max_lag
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            max_lag = max(max_lag, time.perf_counter() - start - 0.001)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            assert await verify()
+            latencies.append(time.perf_counter() - start)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    running = False
+    await tick
+    return latencies, elapsed, max_lag
+
+async def main_async(args) -> None:
+    for rounds in args.rounds:
+        context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+        hashed = context.hash(PASSWORD)
+        # Le pool de hachage vérifie avec le contexte du facteur de coût mesuré
+        security.pwd_context = context
+        print(f"--- bcrypt rounds={rounds}")
+
+        async def inline() -> bool:
+            return context.verify(PASSWORD, hashed)
+
+        async def pooled() -> bool:
+            return await security.verify_password_async(PASSWORD, hashed)
+
+        for concurrency in args.concurrency:
+            report("boucle", concurrency, *await run_logins(inline, args.logins, concurrency))
+            report("pool", concurrency, *await run_logins(pooled, args.logins, concurrency))
+    security.shutdown_hash_executor()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[8, 10, 12])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+    if max(args.concurrency) > security.PASSWORD_HASH_MAX_PENDING:
+        parser.error(f"concurrence supérieure à PASSWORD_HASH_MAX_PENDING ({security.PASSWORD_HASH_MAX_PENDING})")
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Mesure l'effet du réglage de l'engine de base de données : durée d'import
+de app.database.database (démarrage d'un worker) et latence d'une requête
+courte sous concurrence, engine historique (echo=True, pool par défaut)
+contre engine réglé (voir engine_options).
+
+La base utilisée est celle de DATABASE_URL (PostgreSQL pour des chiffres
+représentatifs de la production).
+
+Usage (depuis le dossier Backend) :
+    python -m benchmarks.bench_db --queries 2000 --concurrency 1 20 50
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database.database import DATABASE_URL, engine_options
+
+def import_time() -> float:
+    """Durée d'import du module de base de données dans un nouvel interpréteur."""
+    code = "import time; s = time.perf_counter(); import app.database.database; print(time.perf_counter() - s)"
+    return float(subprocess.check_output([sys.executable, "-c", code], stderr=subprocess.DEVNULL).split()[-1])
+
+async def run_queries(engine, queries: int, concurrency: int) -> tuple[list[float], float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(queries)))
+    return latencies, time.perf_counter() - start
+
+def report(label: str, concurrency: int, latencies: list[float], elapsed: float) -> None:
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{label:<10} c={concurrency:<4} {len(latencies) / elapsed:9.1f} requêtes/s  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms")
+
+async def main_async(args) -> None:
+    # Les requêtes journalisées par echo=True sont écrites, mais pas affichées
+    devnull = open(os.devnull, "w")
+    logging.getLogger("sqlalchemy.engine.Engine").addHandler(logging.StreamHandler(devnull))
+    for concurrency in args.concurrency:
+        for label, options in (("historique", {"echo": True}), ("réglé", engine_options(DATABASE_URL))):
+            engine = create_async_engine(DATABASE_URL, **options)
+            await run_queries(engine, concurrency, concurrency)  # ouverture des connexions
+            results = await run_queries(engine, args.queries, concurrency)
+            await engine.dispose()
+            report(label, concurrency, *results)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 20, 50])
+    args = parser.parse_args()
+    print(f"import de app.database.database : {import_time() * 1000:.0f} ms")
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
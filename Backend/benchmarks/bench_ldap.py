@@ -0,0 +1,178 @@
+"""
+Mesure la latence des connexions LDAP sous concurrence : client historique
+(connexion et schéma à chaque appel, appels bloquants dans la boucle
+d'événements) contre le client mutualisé de app.services.ldap_service.
+
+Le serveur LDAP est simulé par la stratégie MOCK_SYNC de ldap3 ; la latence
+réseau de chaque aller-retour est simulée par --rtt-ms.
+
+Mesure aussi le coût d'une vérification d'existence répétée, avec et sans
+le cache de verify_ldap_user_exists.
+
+Usage (depuis le dossier Backend) :
+    python -m benchmarks.bench_ldap --logins 200 --concurrency 1 10 50 --rtt-ms 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi.concurrency import run_in_threadpool
+from ldap3 import MOCK_SYNC, NONE, SIMPLE, Connection, Server
+
+from app.services import ldap_service
+from app.services.ldap_service import LdapClient, LdapSettings
+
+BASE_DN = "dc=example,dc=com"
+SERVICE_DN = f"cn=service,{BASE_DN}"
+USERS = [f"user{index}" for index in range(100)]
+# Allers-retours supplémentaires du client historique pour télécharger le schéma (get_info=ALL)
+SCHEMA_ROUND_TRIPS = 2
+
+def user_dn(login: str) -> str:
+    return f"cn={login},{BASE_DN}"
+
+def make_server() -> Server:
+    """Serveur simulé, partagé par toutes les connexions MOCK_SYNC qui l'utilisent."""
+    server = Server("ldap.example.com", get_info=NONE)
+    conn = Connection(server, client_strategy=MOCK_SYNC)
+    conn.strategy.add_entry(SERVICE_DN, {"objectClass": "person", "userPassword": "service"})
+    for login in USERS:
+        conn.strategy.add_entry(user_dn(login), {
+            "objectClass": "person", "sAMAccountName": login, "userPassword": f"{login}-password",
+        })
+    return server
+
+
+class _SlowConnection:
+    """Connexion simulée dont chaque opération coûte un aller-retour réseau."""
+
+    def __init__(self, conn: Connection, rtt: float):
+        self._conn = conn
+        self._rtt = rtt
+
+    def search(self, *args, **kwargs):
+        time.sleep(self._rtt)
+        return self._conn.search(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class MockLdapClient(LdapClient):
+    def __init__(self, server: Server, rtt: float, pool_size: int):
+        super().__init__(
+            LdapSettings(host="ldap.example.com", port=389, base_dn=BASE_DN, bind_dn=SERVICE_DN, bind_password="service"),
+            pool_size=pool_size,
+            client_strategy=MOCK_SYNC,
+        )
+        self.server = server
+        self.rtt = rtt
+
+    def _connect(self, user, password):
+        # Connexion TCP puis authentification : deux allers-retours
+        time.sleep(2 * self.rtt)
+        return _SlowConnection(super()._connect(user, password), self.rtt)
+
+
+def legacy_login(server: Server, rtt: float, login: str) -> bool:
+    """Reproduction du client historique : tout est refait, et bloquant, à chaque appel."""
+    time.sleep((2 + SCHEMA_ROUND_TRIPS) * rtt)
+    with Connection(server, user=SERVICE_DN, password="service", authentication=SIMPLE,
+                    client_strategy=MOCK_SYNC, auto_bind=True) as conn:
+        time.sleep(rtt)
+        conn.search(BASE_DN, f"(sAMAccountName={login})", attributes=["sAMAccountName"])
+        if not conn.entries:
+            return False
+    time.sleep((2 + SCHEMA_ROUND_TRIPS) * rtt)
+    with Connection(server, user=user_dn(login), password=f"{login}-password", authentication=SIMPLE,
+                    client_strategy=MOCK_SYNC, auto_bind=True) as conn:
+        return conn.bound
+
+async def run_logins(login_once, logins: int, concurrency: int) -> tuple[list[float], float, float]:
+    """Exécute `logins` connexions, `concurrency` à la fois ; retourne latences, durée totale et retard maximal de la boucle."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    max_lag = 0.0
+    running = True
+
+    async def ticker():
+        # Mesure la réactivité de la boucle d'événements pendant les connexions
+        nonlocal max_lag
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            max_lag = max(max_lag, time.perf_counter() - start - 0.001)
+
+    async def one(index: int):
+        async with semaphore:
+            start = time.perf_counter()
+            assert await login_once(USERS[index % len(USERS)])
+            latencies.append(time.perf_counter() - start)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(logins)))
+    elapsed = time.perf_counter() - start
+    running = False
+    await tick
+    return latencies, elapsed, max_lag
+
+def report(label: str, concurrency: int, latencies: list[float], elapsed: float, max_lag: float) -> None:
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{label:<10} c={concurrency:<4} {len(latencies) / elapsed:9.1f} connexions/s  "
+          f"p50 {p50:8.1f} ms  p99 {p99:8.1f} ms  retard boucle max {max_lag * 1000:8.1f} ms")
+
+async def main_async(args) -> None:
+    server = make_server()
+    rtt = args.rtt_ms / 1000
+
+    async def legacy(login: str) -> bool:
+        return legacy_login(server, rtt, login)
+
+    for concurrency in args.concurrency:
+        client = MockLdapClient(server, rtt, pool_size=args.pool_size)
+
+        async def pooled(login: str) -> bool:
+            if not await run_in_threadpool(client.search_user, login):
+                return False
+            return await run_in_threadpool(client.authenticate, user_dn(login), f"{login}-password")
+
+        report("historique", concurrency, *await run_logins(legacy, args.logins, concurrency))
+        report("mutualisé", concurrency, *await run_logins(pooled, args.logins, concurrency))
+        client.close()
+
+    await bench_user_cache(MockLdapClient(server, rtt, pool_size=args.pool_size), args.logins)
+
+async def bench_user_cache(client: MockLdapClient, checks: int) -> None:
+    """Coût moyen de verify_ldap_user_exists, cache vide puis cache chaud."""
+    # Client installé directement : la configuration n'est pas lue en base
+    ldap_service._client, ldap_service._loaded_at = client, time.monotonic()
+    logins = [USERS[index % len(USERS)] for index in range(checks)]
+
+    async def timed(cached: bool) -> float:
+        start = time.perf_counter()
+        for login in logins:
+            if not cached:
+                ldap_service.invalidate_ldap_user(login)
+            assert await ldap_service.verify_ldap_user_exists(login, db=None)
+        return (time.perf_counter() - start) / checks
+
+    print(f"vérification sans cache {await timed(cached=False) * 1e6:10.1f} µs/appel")
+    print(f"vérification avec cache {await timed(cached=True) * 1e6:10.1f} µs/appel")
+    print(f"cache : {ldap_service.ldap_user_cache_stats()}")
+    client.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--rtt-ms", type=float, default=5.0, help="latence simulée d'un aller-retour réseau")
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
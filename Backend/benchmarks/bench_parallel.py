@@ -0,0 +1,54 @@
+"""
+Mesure l'accélération du traitement par partitions selon le nombre de processus.
+
+Usage (depuis le dossier Backend) :
+    python -m benchmarks.bench_parallel --rows 2000000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+def run_once(rows: int, chunksize: int) -> None:
+    """Exécuté dans un sous-processus : PROCESS_POOL_WORKERS est lu à l'import de la config."""
+    from benchmarks.bench_process_dataframe import CAMPAIGN_CONFIG, make_dataframe
+    from app.core.config import PROCESS_POOL_WORKERS
+    from app.core.executor import map_partitions, shutdown_process_pool
+    from app.core.file_processor import compile_columns
+
+    df = make_dataframe(rows, "str")
+    plan = compile_columns(CAMPAIGN_CONFIG)
+    partitions = [df.iloc[start:start + chunksize] for start in range(0, rows, chunksize)]
+
+    # Démarrage des processus hors chronométrage
+    list(map_partitions(partitions[:PROCESS_POOL_WORKERS], plan))
+    start = time.perf_counter()
+    written = sum(len(block) for block in map_partitions(partitions, plan))
+    elapsed = time.perf_counter() - start
+    shutdown_process_pool()
+    print(f"{PROCESS_POOL_WORKERS:>3} processus : {elapsed:7.2f} s  {rows / elapsed:12,.0f} lignes/s  {written / 2**20:8.1f} Mo écrits")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_once(args.rows, args.chunksize)
+        return
+
+    print(f"{args.rows} lignes, blocs de {args.chunksize}, {os.cpu_count()} CPU")
+    for workers in args.workers:
+        env = {**os.environ, "PROCESS_POOL_WORKERS": str(workers)}
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_parallel", "--child",
+             "--rows", str(args.rows), "--chunksize", str(args.chunksize)],
+            env=env, check=True,
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Suite de benchmarks reproductible du chemin de transformation CSV.
+
+Chaque cas combine un profil de données (voir benchmarks.datagen), un moteur
+et un niveau de mesure :
+    dataframe : règles, réorganisation et sérialisation de blocs déjà lus
+                (engine.process puis engine.to_csv)
+    service   : iter_processed_file sur le fichier : lecture, pool de processus, écriture
+    http      : POST /api/process/{uuid} sur l'application (client de test),
+                upload multipart et réponse en flux ; la campagne n'est pas lue
+                en base, le plan est fourni directement à la route
+
+Chaque cas s'exécute dans un sous-processus neuf, après une exécution
+d'échauffement : le pic de mémoire résidente (RSS) est celui du cas seul,
+processus du pool de traitement mesurés à part. Le client de test reçoit la
+réponse entière en mémoire : au niveau http, le pic inclut le CSV produit.
+
+Les CSV sont générés une fois dans --data-dir (graine fixe), puis réutilisés.
+Les résultats peuvent être enregistrés (--save) puis comparés à une exécution
+ultérieure (--compare) : un cas dont le débit baisse, ou dont le pic de
+mémoire augmente, de plus de --threshold % est signalé comme régression et
+le code de sortie vaut 1. Seules des mesures faites sur la même machine sont
+comparables.
+
+Usage (depuis le dossier Backend) :
+    python -m benchmarks.bench_suite --save benchmarks/baselines/reference.json
+    python -m benchmarks.bench_suite --profiles etroit --levels service http --scale 0.2
+    python -m benchmarks.bench_suite --compare benchmarks/baselines/reference.json --threshold 10
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+LEVELS = ("dataframe", "service", "http")
+CAMPAIGN_UUID = "00000000-0000-0000-0000-000000000000"
+
+def _dataframe_level(path: Path, plan, engine):
+    from app.core.config import CSV_CHUNK_SIZE
+
+    with open(path, "rb") as source:
+        chunks = list(engine.read_chunks(source, CSV_CHUNK_SIZE, columns=plan.input_columns))
+
+    def run() -> None:
+        for index, chunk in enumerate(chunks):
+            engine.to_csv(engine.process(chunk, plan), header=index == 0)
+    return run
+
+def _service_level(path: Path, plan, engine):
+    from app.services.reorganizer_sevice import iter_processed_file
+
+    def run() -> None:
+        with open(path, "rb") as source:
+            for _ in iter_processed_file(source, plan, engine_name=engine.name, filename=path.name):
+                pass
+    return run
+
+def _http_level(path: Path, plan, engine):
+    from fastapi.testclient import TestClient
+
+    from app.database.database import get_db
+    from app.services import reorganizer_sevice
+    from main import create_application
+
+    async def no_db():
+        yield None
+
+    async def get_campaign_plan(db, campaign_uuid):
+        return plan
+
+    reorganizer_sevice.get_campaign_plan = get_campaign_plan
+    app = create_application()
+    app.dependency_overrides[get_db] = no_db
+    # Hors bloc `with` : le cycle de vie (connexion à la base) n'est pas exécuté
+    client = TestClient(app)
+
+    def run() -> None:
+        with open(path, "rb") as source:
+            with client.stream(
+                "POST", f"/api/process/{CAMPAIGN_UUID}", params={"engine": engine.name},
+                files={"file": (path.name, source, "text/csv")},
+            ) as response:
+                response.raise_for_status()
+                for _ in response.iter_raw():
+                    pass
+    return run
+
+def _peak_rss_mb(who: int) -> float:
+    # ru_maxrss est en kilo-octets sous Linux, en octets sous macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+def run_case(level: str, profile_name: str, engine_name: str, path: Path, rows: int, repeat: int) -> dict:
+    """Exécuté dans un sous-processus : mesure un cas et retourne son résultat."""
+    # Requise à l'import des services ; aucune connexion n'est ouverte
+    os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://benchmark@localhost/benchmark")
+    from app.core.engines import get_processing_engine
+    from app.core.executor import shutdown_process_pool
+    from benchmarks.datagen import PROFILES, campaign_plan
+
+    engine = get_processing_engine(engine_name)
+    plan = campaign_plan(PROFILES[profile_name])
+    run = {"dataframe": _dataframe_level, "service": _service_level, "http": _http_level}[level](path, plan, engine)
+
+    # Échauffement : démarrage du pool de processus, imports paresseux
+    run()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        durations.append(time.perf_counter() - start)
+    shutdown_process_pool()
+
+    seconds = statistics.median(durations)
+    size_mb = path.stat().st_size / 2**20
+    return {
+        "case": f"{level}/{profile_name}/{engine_name}",
+        "rows": rows,
+        "input_mb": round(size_mb, 2),
+        "seconds": round(seconds, 4),
+        "seconds_min": round(min(durations), 4),
+        "rows_per_s": round(rows / seconds),
+        "mb_per_s": round(size_mb / seconds, 2),
+        "peak_rss_mb": round(_peak_rss_mb(resource.RUSAGE_SELF), 1),
+        "peak_worker_rss_mb": round(_peak_rss_mb(resource.RUSAGE_CHILDREN), 1),
+    }
+
+def dataset_path(data_dir: Path, profile, rows: int) -> Path:
+    """Chemin du CSV d'un profil, généré s'il n'existe pas encore."""
+    from benchmarks.datagen import generate_csv
+
+    path = data_dir / f"{profile.name}-{rows}.csv"
+    if not path.exists():
+        print(f"génération de {path} ...", file=sys.stderr)
+        generate_csv(profile, path.with_suffix(".tmp"), rows=rows)
+        path.with_suffix(".tmp").rename(path)
+    return path
+
+def environment() -> dict:
+    import pandas as pd
+    from app.core.config import CSV_CHUNK_SIZE, PROCESS_POOL_WORKERS
+    try:
+        import pyarrow
+        arrow_version = pyarrow.__version__
+    except ImportError:
+        arrow_version = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "pyarrow": arrow_version,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "process_pool_workers": PROCESS_POOL_WORKERS,
+        "csv_chunk_size": CSV_CHUNK_SIZE,
+    }
+
+def report(result: dict) -> None:
+    print(f"{result['case']:<32} {result['rows']:>9} lignes  {result['seconds']:8.3f} s  "
+          f"{result['rows_per_s']:>11,} lignes/s  {result['mb_per_s']:8.1f} Mo/s  "
+          f"RSS {result['peak_rss_mb']:7.1f} Mo (pool {result['peak_worker_rss_mb']:7.1f} Mo)")
+
+def compare(results: list[dict], baseline: dict, threshold: float) -> list[str]:
+    """Compare les résultats à une référence ; retourne les cas en régression."""
+    reference = {result["case"]: result for result in baseline["results"]}
+    regressions = []
+    print(f"\nComparaison avec {baseline['environment'].get('commit')} ({baseline['environment'].get('date')}), "
+          f"seuil {threshold:g} %")
+    for result in results:
+        previous = reference.get(result["case"])
+        if previous is None:
+            print(f"{result['case']:<32} absent de la référence")
+            continue
+        if previous["rows"] != result["rows"]:
+            print(f"{result['case']:<32} non comparable ({previous['rows']} lignes dans la référence)")
+            continue
+        throughput = (result["rows_per_s"] / previous["rows_per_s"] - 1) * 100
+        memory = (result["peak_rss_mb"] / previous["peak_rss_mb"] - 1) * 100
+        regressed = throughput < -threshold or memory > threshold
+        if regressed:
+            regressions.append(result["case"])
+        print(f"{result['case']:<32} débit {throughput:+7.1f} %  RSS {memory:+7.1f} %"
+              f"{'  RÉGRESSION' if regressed else ''}")
+    return regressions
+
+def main() -> None:
+    from benchmarks.datagen import PROFILES
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument("--levels", nargs="+", choices=LEVELS, default=list(LEVELS))
+    parser.add_argument("--engines", nargs="+", default=["pandas", "arrow"])
+    parser.add_argument("--scale", type=float, default=1.0, help="facteur appliqué au nombre de lignes des profils")
+    parser.add_argument("--repeat", type=int, default=3, help="exécutions mesurées par cas (médiane retenue)")
+    parser.add_argument("--data-dir", type=Path, default=Path("benchmarks/data"))
+    parser.add_argument("--save", type=Path, help="enregistre les résultats dans ce fichier JSON")
+    parser.add_argument("--compare", type=Path, help="compare les résultats à ce fichier JSON")
+    parser.add_argument("--threshold", type=float, default=10.0, help="écart signalé comme régression, en %%")
+    parser.add_argument("--child", nargs=3, metavar=("LEVEL", "PROFILE", "ENGINE"), help=argparse.SUPPRESS)
+    parser.add_argument("--data", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_case(*args.child, args.data, args.rows, args.repeat)))
+        return
+
+    from app.core.engines import ENGINES
+    engines = [name for name in args.engines if name in ENGINES]
+    for name in set(args.engines) - set(engines):
+        print(f"moteur {name} indisponible, ignoré", file=sys.stderr)
+
+    results = []
+    for profile_name in args.profiles:
+        profile = PROFILES[profile_name]
+        rows = max(1, int(profile.rows * args.scale))
+        path = dataset_path(args.data_dir, profile, rows)
+        for level in args.levels:
+            for engine_name in engines:
+                completed = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_suite", "--child", level, profile_name, engine_name,
+                     "--data", str(path), "--rows", str(rows), "--repeat", str(args.repeat)],
+                    capture_output=True, text=True,
+                )
+                if completed.returncode != 0:
+                    print(f"{level}/{profile_name}/{engine_name} en échec :\n{completed.stderr}", file=sys.stderr)
+                    continue
+                result = json.loads(completed.stdout.splitlines()[-1])
+                report(result)
+                results.append(result)
+
+    run = {"environment": environment(), "scale": args.scale, "repeat": args.repeat, "results": results}
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(run, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"résultats enregistrés dans {args.save}")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
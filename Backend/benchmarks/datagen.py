@@ -0,0 +1,128 @@
+"""
+Jeux de données synthétiques et campagnes pour les benchmarks.
+
+Un profil décrit la forme d'un CSV (lignes, colonnes texte / numériques,
+largeur des textes, proportion de valeurs vides). Les fichiers sont générés
+de façon déterministe (graine fixe) : deux exécutions produisent les mêmes octets.
+
+La campagne associée à un profil utilise tous les types de règles, dont des
+suites de règles texte fusionnées, et réordonne les colonnes.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.file_processor import CompiledPlan
+from app.core.plan_cache import compile_campaign_fields
+
+# Lignes générées et écrites à la fois
+GENERATION_BLOCK = 100_000
+
+
+@dataclass(frozen=True)
+class DatasetProfile:
+    name: str
+    rows: int
+    text_columns: int
+    numeric_columns: int
+    # Longueur moyenne des valeurs texte, en caractères
+    text_width: int
+    # Proportion de valeurs vides (lues comme nulles)
+    null_ratio: float
+    # Proportion de valeurs texte non ASCII (chemin de repli du moteur Arrow)
+    non_ascii_ratio: float = 0.0
+
+    @property
+    def columns(self) -> list[str]:
+        return [f"texte_{index}" for index in range(self.text_columns)] + \
+               [f"nombre_{index}" for index in range(self.numeric_columns)]
+
+
+PROFILES: dict[str, DatasetProfile] = {profile.name: profile for profile in (
+    # Export type : quelques colonnes courtes, peu de vides
+    DatasetProfile("etroit", rows=500_000, text_columns=4, numeric_columns=2, text_width=12, null_ratio=0.05),
+    # Beaucoup de colonnes, dont la plupart ne sont pas utilisées par la campagne
+    DatasetProfile("large", rows=50_000, text_columns=40, numeric_columns=20, text_width=10, null_ratio=0.1),
+    # Majorité de colonnes numériques (MULTIPLY_BY)
+    DatasetProfile("numerique", rows=500_000, text_columns=1, numeric_columns=8, text_width=8, null_ratio=0.02),
+    # Textes longs, nombreux vides et caractères accentués
+    DatasetProfile("texte_long", rows=100_000, text_columns=6, numeric_columns=1, text_width=200,
+                   null_ratio=0.3, non_ascii_ratio=0.2),
+)}
+
+def _text_pool(profile: DatasetProfile, rng: np.random.Generator, size: int = 1000) -> np.ndarray:
+    alphabet = np.array(list("abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ-"))
+    accented = np.array(list("éèàçôüßÉ"))
+    values = []
+    for _ in range(size):
+        length = max(1, int(rng.normal(profile.text_width, profile.text_width / 4)))
+        characters = rng.choice(alphabet, length)
+        if rng.random() < profile.non_ascii_ratio:
+            characters[rng.integers(0, length)] = rng.choice(accented)
+        values.append("".join(characters))
+    return np.array(values, dtype=object)
+
+def make_dataframe(profile: DatasetProfile, rows: Optional[int] = None, seed: int = 42, start: int = 0) -> pd.DataFrame:
+    """Génère `rows` lignes du profil (valeurs texte, vides à None) ; `start` décale la graine d'un bloc à l'autre."""
+    rows = profile.rows if rows is None else rows
+    rng = np.random.default_rng(seed + start)
+    pool = _text_pool(profile, np.random.default_rng(seed))
+    data = {}
+    for name in profile.columns:
+        if name.startswith("texte_"):
+            values = pool[rng.integers(0, len(pool), rows)]
+        else:
+            values = rng.uniform(-1000, 100_000, rows).round(2).astype(str).astype(object)
+        values[rng.random(rows) < profile.null_ratio] = None
+        data[name] = values
+    return pd.DataFrame(data)
+
+def generate_csv(profile: DatasetProfile, path: Path, rows: Optional[int] = None, seed: int = 42) -> Path:
+    """Écrit le CSV du profil par blocs (la mémoire utilisée ne dépend pas du nombre de lignes)."""
+    rows = profile.rows if rows is None else rows
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as output:
+        for start in range(0, rows, GENERATION_BLOCK):
+            block = make_dataframe(profile, min(GENERATION_BLOCK, rows - start), seed=seed, start=start)
+            block.to_csv(output, index=False, header=start == 0)
+    return path
+
+def campaign_fields(profile: DatasetProfile) -> list[dict]:
+    """
+    Champs `fields` (format stocké en base) d'une campagne couvrant tous les types de règles.
+
+    Les colonnes sont restituées dans l'ordre inverse du fichier ; dans le
+    profil "large", seule une colonne sur quatre est conservée.
+    """
+    text_chains = [
+        [("ADD_PREFIX", "CLI-"), ("TO_UPPERCASE", ""), ("ADD_SUFFIX", "-FR")],
+        [("REPLACE_TEXT", "a,o"), ("TO_LOWERCASE", ""), ("ADD_SUFFIX", " (FR)")],
+        [("TO_UPPERCASE", "")],
+        [("ADD_PREFIX", "<"), ("REPLACE_TEXT", "-,_"), ("ADD_SUFFIX", ">")],
+        [],
+    ]
+    numeric_chains = [[("MULTIPLY_BY", "1.2")], [], [("MULTIPLY_BY", "0.5"), ("ADD_SUFFIX", " EUR")]]
+
+    columns = profile.columns
+    if len(columns) > 20:
+        columns = columns[::4]
+    fields = []
+    for order, name in enumerate(reversed(columns)):
+        index = int(name.rsplit("_", 1)[1])
+        chain = text_chains[index % len(text_chains)] if name.startswith("texte_") else numeric_chains[index % len(numeric_chains)]
+        fields.append({
+            "id": str(order),
+            "name": name,
+            "displayName": name,
+            "order": order,
+            "required": True,
+            "rules": [{"id": f"{order}-{position}", "type": rule, "value": value}
+                      for position, (rule, value) in enumerate(chain)],
+        })
+    return fields
+
+def campaign_plan(profile: DatasetProfile, engine: Optional[str] = None) -> CompiledPlan:
+    return compile_campaign_fields(campaign_fields(profile), engine=engine)
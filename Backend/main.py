@@ -1,7 +1,19 @@
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import LOG_LEVEL
+from app.core.metrics import render_metrics
 from app.routes import include_routers
+from app.core.executor import shutdown_process_pool
+from app.core.security import shutdown_hash_executor
+from app.database.database import close_database, init_database
+from app.services.job_service import job_manager
+from app.services.auth_service import refresh_token_sweeper
 from fastapi.middleware.cors import CORSMiddleware
 
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s : %(message)s")
+
 # Configuration CORS - Liste des origines autorisées
 ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -17,11 +29,31 @@ ALLOWED_HEADERS = [
     "Accept-Language",
     "Content-Language",
     "Content-Type",
+    "Content-Encoding",  # Upload d'un CSV compressé (gzip, zstd)
+    "X-Filename",  # Nom du fichier pour un upload en corps brut
+    "X-Profile",  # Profilage d'un traitement (administrateurs)
     "Authorization",
     "X-Requested-With",
 ]
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Cycle de vie de l'application : prépare la base de données et démarre
+    la purge des jetons expirés, puis libère les ressources partagées à l'arrêt.
+    """
+    await init_database()
+    refresh_token_sweeper.start()
+    yield
+    await refresh_token_sweeper.stop()
+    # Arrêt des jobs en arrière-plan (attente bornée, hors boucle d'événements), puis du pool de processus utilisé pour le traitement des fichiers
+    await run_in_threadpool(job_manager.shutdown)
+    shutdown_process_pool()
+    shutdown_hash_executor()
+    await close_database()
+
+
 def create_application() -> FastAPI:
     """
     Factory function pour créer et configurer l'application FastAPI.
@@ -36,6 +68,7 @@ def create_application() -> FastAPI:
         description="API pour l'application Reorganizer csv",
         docs_url="/api/docs",  # Documentation Swagger
         redoc_url="/api/redoc",  # Documentation Redoc
+        lifespan=lifespan,
     )
 
     # Configuration des middlewares dans l'ordre d'exécution
@@ -88,6 +121,21 @@ def configure_routes(app: FastAPI) -> None:
             "status": "healthy",
         }
 
+    @app.get("/metrics", tags=["Health Check"], include_in_schema=False)
+    async def metrics() -> Response:
+        """
+        Mesures du traitement des fichiers au format Prometheus
+        (durée des étapes et des règles, lignes et octets traités).
+        """
+        rendered = render_metrics()
+        if rendered is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Export des mesures indisponible : installez prometheus_client"
+            )
+        content, media_type = rendered
+        return Response(content=content, media_type=media_type)
+
     include_routers(app)
 
 
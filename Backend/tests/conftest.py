@@ -0,0 +1,5 @@
+import os
+
+# app.database.database exige DATABASE_URL à l'import ; les tests qui utilisent
+# une base créent leur propre moteur SQLite et ne se connectent jamais à celle-ci
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import main
+from app.core.security import get_password_hash
+from app.database.database import Base, get_db
+from app.dependencies.get_current_user import get_current_user
+from app.models.models import RefreshToken, User
+
+
+@pytest.fixture
+def auth(tmp_path):
+    """Client de l'API sur une base SQLite vide contenant un seul utilisateur (user / secret)."""
+    # NullPool : chaque boucle d'événements (préparation, TestClient) ouvre ses propres connexions
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'auth.db'}", poolclass=NullPool)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def setup() -> User:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_factory() as db:
+            user = User(full_name="Utilisateur", ldap_login="user", hashed_password=get_password_hash("secret"))
+            db.add(user)
+            await db.commit()
+            return user
+
+    user = asyncio.run(setup())
+
+    async def test_db():
+        async with session_factory() as db:
+            yield db
+            await db.commit()
+
+    main.app.dependency_overrides[get_db] = test_db
+    # get_current_user compare l'UUID à une chaîne, ce que le type UUID ne lie pas sous SQLite
+    main.app.dependency_overrides[get_current_user] = lambda: user
+
+    def active_tokens() -> int:
+        async def count() -> int:
+            async with session_factory() as db:
+                query = select(func.count()).select_from(RefreshToken).where(RefreshToken.is_revoked.is_(False))
+                return (await db.execute(query)).scalar()
+        return asyncio.run(count())
+
+    client = TestClient(main.app)
+    client.active_tokens = active_tokens
+    try:
+        yield client
+    finally:
+        main.app.dependency_overrides.clear()
+        asyncio.run(engine.dispose())
+
+
+def login(client: TestClient) -> dict:
+    response = client.post("/api/login", data={"username": "user", "password": "secret"})
+    assert response.status_code == 200
+    return response.json()
+
+
+def refresh(client: TestClient, refresh_token: str):
+    return client.post("/api/refresh", json={"refresh_token": refresh_token})
+
+
+def test_refresh_rotates_the_token(auth):
+    tokens = login(auth)
+    response = refresh(auth, tokens["refresh_token"])
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert refresh(auth, rotated["refresh_token"]).status_code == 200
+    assert auth.active_tokens() == 1
+
+
+def test_rotated_token_is_rejected_on_reuse(auth):
+    tokens = login(auth)
+    assert refresh(auth, tokens["refresh_token"]).status_code == 200
+    response = refresh(auth, tokens["refresh_token"])
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Invalid refresh token"}
+
+
+def test_reuse_revokes_every_token_of_the_user(auth):
+    stolen = login(auth)
+    other_session = login(auth)
+    rotated = refresh(auth, stolen["refresh_token"]).json()
+    assert auth.active_tokens() == 2
+
+    assert refresh(auth, stolen["refresh_token"]).status_code == 401
+    assert auth.active_tokens() == 0
+    # Le successeur du jeton réutilisé et les autres sessions sont révoqués
+    assert refresh(auth, rotated["refresh_token"]).status_code == 401
+    assert refresh(auth, other_session["refresh_token"]).status_code == 401
+
+
+def test_access_token_is_not_a_refresh_token(auth):
+    tokens = login(auth)
+    assert refresh(auth, tokens["access_token"]).status_code == 401
+    assert auth.active_tokens() == 1
+
+
+def test_logout_revokes_only_the_current_session(auth):
+    current = login(auth)
+    other_session = login(auth)
+    assert auth.post("/api/logout", json={"refresh_token": current["refresh_token"]}).status_code == 204
+    assert auth.active_tokens() == 1
+    assert refresh(auth, other_session["refresh_token"]).status_code == 200
+    # Un jeton révoqué par la déconnexion ne sert plus
+    assert refresh(auth, current["refresh_token"]).status_code == 401
+
+
+def test_logout_all_invalidates_existing_refresh_tokens(auth):
+    sessions = [login(auth) for _ in range(3)]
+    response = auth.post("/api/logout/all", headers={"Authorization": f"Bearer {sessions[0]['access_token']}"})
+    assert response.status_code == 200
+    assert response.json() == {"revoked": 3}
+    assert auth.active_tokens() == 0
+    for tokens in sessions:
+        assert refresh(auth, tokens["refresh_token"]).status_code == 401
+    # Une nouvelle connexion reste possible
+    assert refresh(auth, login(auth)["refresh_token"]).status_code == 200
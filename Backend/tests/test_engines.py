@@ -0,0 +1,64 @@
+import io
+import itertools
+
+import pandas as pd
+import pytest
+
+from app.core.engines import ENGINES
+from app.core.file_processor import CampaignColumn, ColumnRule, compile_columns
+
+pytestmark = pytest.mark.skipif("arrow" not in ENGINES, reason="pyarrow non installé")
+
+# Colonne "c" en ASCII seulement : les règles elles-mêmes introduisent le texte non ASCII
+ASCII_CSV = b"c,d\nabc,x\nXyz,y\nstrasse,\nx y,z\n,w\n"
+TEXT_RULES = [
+    ("TO_UPPERCASE", None),
+    ("TO_LOWERCASE", None),
+    ("ADD_PREFIX", "é"),
+    ("ADD_PREFIX", "ß"),
+    ("ADD_SUFFIX", "Σ"),
+    ("ADD_SUFFIX", "-s"),
+    ("REPLACE_TEXT", "a,é"),
+    ("REPLACE_TEXT", "ss,ß"),
+    ("REPLACE_TEXT", "x,y"),
+]
+
+
+def process(engine_name: str, data: bytes, rules: list[tuple[str, str]]) -> bytes:
+    engine = ENGINES[engine_name]
+    plan = compile_columns([CampaignColumn("c", [ColumnRule(rule_type, value) for rule_type, value in rules])])
+    output = []
+    for index, chunk in enumerate(engine.read_chunks(io.BytesIO(data), 1000, columns=plan.input_columns)):
+        output.append(engine.to_csv(engine.process(chunk, plan), header=index == 0))
+    return b"".join(output)
+
+
+@pytest.mark.parametrize("rules, expected", [
+    ([("REPLACE_TEXT", "a,é"), ("TO_UPPERCASE", None)], "ÉBC"),
+    ([("ADD_PREFIX", "é"), ("TO_LOWERCASE", None), ("TO_UPPERCASE", None)], "ÉABC"),
+    # Sigma final : le résultat dépend du noyau texte de pandas, seule l'égalité des moteurs compte
+    ([("ADD_SUFFIX", "Σ"), ("TO_LOWERCASE", None)], None),
+])
+def test_case_rules_after_non_ascii_literals_match_pandas(rules, expected):
+    pandas_output = process("pandas", ASCII_CSV, rules)
+    if expected is not None:
+        assert pandas_output.decode("utf-8").splitlines()[1] == expected
+    assert process("arrow", ASCII_CSV, rules) == pandas_output
+
+
+def test_text_rule_sequences_match_pandas():
+    sequences = [rules for length in range(1, 4) for rules in itertools.product(TEXT_RULES, repeat=length)]
+    mismatches = [
+        rules for rules in sequences
+        if process("arrow", ASCII_CSV, list(rules)) != process("pandas", ASCII_CSV, list(rules))
+    ]
+    assert mismatches == []
+
+
+def test_quoted_newlines_across_arrow_blocks_match_pandas():
+    # Assez de lignes pour que la lecture Arrow soit découpée en plusieurs blocs
+    data = b"c,d\n" + b'"line\nnext",x\n' * 400_000
+    rules = [("TO_UPPERCASE", None)]
+    output = process("arrow", data, rules)
+    assert output.count(b'"LINE\nNEXT"') == 400_000
+    assert output == process("pandas", data, rules)
@@ -0,0 +1,122 @@
+import itertools
+import random
+
+import pandas as pd
+import pytest
+
+from app.core.file_processor import (
+    CampaignColumn, ColumnRule, CompiledColumn, CompiledPlan, TextPass, compile_columns, process_dataframe,
+)
+
+# Valeurs choisies pour les cas où la fusion pourrait changer le résultat : casse
+# dépendante du contexte (sigma final), caractères qui s'allongent en majuscule
+# ("ß"), motifs de remplacement à cheval sur un préfixe ou un suffixe.
+VALUES = ["abc", "Xyz", "ΑΣ", "straße", "x,y", "", "12", "3.5", "Σa", "ǅx", "p-a"]
+TEXT_RULES = [
+    ("TO_UPPERCASE", None),
+    ("TO_LOWERCASE", None),
+    ("ADD_PREFIX", "p-"),
+    ("ADD_PREFIX", "Σ"),
+    ("ADD_PREFIX", "ß"),
+    ("ADD_SUFFIX", "-s"),
+    ("ADD_SUFFIX", "Σ"),
+    ("REPLACE_TEXT", "x,y"),
+    ("REPLACE_TEXT", "-a,Q"),
+    ("REPLACE_TEXT", "a,"),
+    ("REPLACE_TEXT", "SS,é"),
+]
+
+
+def unfused(plan: CompiledPlan) -> CompiledPlan:
+    """Même plan, chaque règle étant appliquée seule, dans l'ordre de la campagne."""
+    return CompiledPlan(
+        columns=tuple(
+            CompiledColumn(name=column.name, rules=column.rules, steps=tuple(rule.apply for rule in column.rules))
+            for column in plan.columns
+        ),
+        engine=plan.engine,
+    )
+
+
+def to_csv(df: pd.DataFrame) -> str:
+    return df.to_csv(index=False)
+
+
+def campaign(*columns: tuple[str, list[tuple[str, str]]]) -> list[CampaignColumn]:
+    return [CampaignColumn(name, [ColumnRule(rule_type, value) for rule_type, value in rules]) for name, rules in columns]
+
+
+def mismatches(df: pd.DataFrame, sequences, reference_df: pd.DataFrame = None) -> list:
+    reference_df = df if reference_df is None else reference_df
+    failures = []
+    for rules in sequences:
+        plan = compile_columns(campaign(("c", list(rules))))
+        fused = to_csv(process_dataframe(df.copy(), plan))
+        expected = to_csv(process_dataframe(reference_df.copy(), unfused(plan)))
+        if fused != expected:
+            failures.append((rules, fused, expected))
+    return failures
+
+
+def text_frame(values) -> pd.DataFrame:
+    return pd.DataFrame({"c": pd.Series(values, dtype=object)})
+
+
+def test_consecutive_text_rules_are_fused_into_one_pass():
+    plan = compile_columns(campaign(("c", [("ADD_PREFIX", "a"), ("TO_UPPERCASE", None), ("ADD_SUFFIX", "b")])))
+    steps = plan.columns[0].steps
+    assert len(steps) == 1 and isinstance(steps[0], TextPass)
+    assert steps[0].operations == (("upper",), ("concat", "A", "b"))
+
+
+def test_all_short_text_rule_sequences_match_unfused_rules():
+    df = text_frame(VALUES)
+    sequences = [rules for length in range(1, 4) for rules in itertools.product(TEXT_RULES, repeat=length)]
+    assert mismatches(df, sequences) == []
+
+
+def test_long_random_text_rule_sequences_match_unfused_rules():
+    generator = random.Random(3)
+    df = text_frame(VALUES)
+    sequences = [
+        tuple(generator.choice(TEXT_RULES) for _ in range(generator.randint(4, 8)))
+        for _ in range(300)
+    ]
+    assert mismatches(df, sequences) == []
+
+
+def test_null_cells_are_processed_as_empty_text():
+    # Une valeur manquante qui atteint une passe texte devient une chaîne vide
+    values = VALUES + [None]
+    df = text_frame(values)
+    reference = text_frame(["" if value is None else value for value in values])
+    sequences = [rules for length in range(1, 3) for rules in itertools.product(TEXT_RULES, repeat=length)]
+    assert mismatches(df, sequences, reference_df=reference) == []
+
+
+def test_text_rules_around_multiply_by():
+    df = text_frame(["2", "3.5", "abc", ""])
+    plan = compile_columns(campaign(("c", [
+        ("ADD_SUFFIX", "0"), ("REPLACE_TEXT", "3,4"), ("MULTIPLY_BY", "2"), ("ADD_PREFIX", "n="),
+    ])))
+    assert [type(step) is TextPass for step in plan.columns[0].steps] == [True, False, True]
+    # Une valeur non numérique devient nulle, puis vide dans la passe texte suivante
+    assert list(process_dataframe(df, plan)["c"]) == ["n=40.0", "n=9.0", "n=", "n=0.0"]
+
+
+@pytest.mark.parametrize("first, second", [
+    ([("TO_UPPERCASE", None), ("ADD_PREFIX", "ß")], [("ADD_SUFFIX", "Σ"), ("TO_LOWERCASE", None)]),
+    ([("REPLACE_TEXT", "a,b")], []),
+    ([], [("ADD_PREFIX", "x"), ("TO_UPPERCASE", None)]),
+])
+def test_duplicate_output_columns_match_unfused_rules(first, second):
+    df = pd.DataFrame({"c": pd.Series(VALUES + [None], dtype=object), "d": "z"})
+    plan = compile_columns(campaign(("c", first), ("d", []), ("c", second)))
+    assert plan.input_columns == ["c", "d"]
+    result = process_dataframe(df.copy(), plan)
+    assert list(result.columns) == ["c", "d", "c"]
+    reference_df = df.fillna("")
+    assert to_csv(result) == to_csv(process_dataframe(reference_df, unfused(plan)))
+    # Chaque colonne dupliquée reçoit ses propres règles, sans effet sur l'autre
+    alone = process_dataframe(df.copy(), compile_columns(campaign(("c", second))))
+    assert to_csv(result.iloc[:, [2]]) == to_csv(alone)
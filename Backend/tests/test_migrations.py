@@ -0,0 +1,138 @@
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+
+# Les migrations utilisent des fonctions PostgreSQL : elles sont testées sur un
+# serveur PostgreSQL, dans une base temporaire créée puis supprimée par le test
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL (serveur PostgreSQL) non défini")
+
+ALEMBIC_DIR = Path(__file__).resolve().parent.parent / "alembic"
+BEFORE = "7c3e9d41b2f6"
+CAMPAIGNS_REVISION = "9a4d2e6f1c83"
+LONG_NAME = "Campagne au nom très long, jusqu'à cinquante carac"
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """URL d'une base PostgreSQL vide, supprimée à la fin du test."""
+    server_url = make_url(TEST_DATABASE_URL).set(drivername="postgresql+psycopg2")
+    name = f"test_migrations_{uuid.uuid4().hex[:12]}"
+    server = create_engine(server_url, isolation_level="AUTOCOMMIT")
+    with server.connect() as conn:
+        conn.execute(text(f'CREATE DATABASE "{name}" ENCODING \'UTF8\' TEMPLATE template0'))
+    url = server_url.set(database=name)
+    # alembic/env.py lit l'URL de l'application (pilote asyncpg) dans DATABASE_URL
+    monkeypatch.setenv(
+        "DATABASE_URL", url.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    )
+    engine = create_engine(url)
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+        with server.connect() as conn:
+            conn.execute(text(f'DROP DATABASE "{name}" WITH (FORCE)'))
+        server.dispose()
+
+
+def migrate(direction: str, revision: str) -> None:
+    # Configuration sans fichier : alembic.ini reconfigurerait la journalisation des autres tests
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    getattr(command, direction)(config, revision)
+
+
+def insert_campaign(conn, name, created_at=None) -> uuid.UUID:
+    campaign_uuid = uuid.uuid4()
+    values = {"uuid": campaign_uuid, "name": name, "fields": "[]"}
+    if created_at is None:
+        conn.execute(text("INSERT INTO campaigns (uuid, name, fields) VALUES (:uuid, :name, :fields)"), values)
+    else:
+        conn.execute(
+            text(
+                "INSERT INTO campaigns (uuid, name, fields, created_at, updated_at) "
+                "VALUES (:uuid, :name, :fields, :created_at, :created_at)"
+            ),
+            {**values, "created_at": created_at},
+        )
+    return campaign_uuid
+
+
+def seed_duplicates(engine) -> dict[uuid.UUID, str]:
+    """Campagnes dont les noms sont en double, comme en produisait la mise à jour avant la contrainte."""
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    names = ["Paie", "Paie", "Paie", LONG_NAME, LONG_NAME, None, None, "Unique"]
+    with engine.begin() as conn:
+        return {
+            insert_campaign(conn, name, start + timedelta(days=index)): name
+            for index, name in enumerate(names)
+        }
+
+
+def campaign_names(engine) -> dict[uuid.UUID, str]:
+    with engine.connect() as conn:
+        return dict(conn.execute(text("SELECT uuid, name FROM campaigns")).all())
+
+
+def assert_duplicates_renamed(engine, seeded: dict[uuid.UUID, str]) -> None:
+    names = campaign_names(engine)
+    assert set(names) == set(seeded)
+    seen = set()
+    for campaign_uuid, original in seeded.items():
+        name = names[campaign_uuid]
+        if original is None or original not in seen:
+            # La plus ancienne campagne de chaque nom le garde
+            assert name == original
+        else:
+            assert name == f"{original[:39]} ({str(campaign_uuid)[:8]})"
+            assert len(name) <= 50
+        seen.add(original)
+    named = [name for name in names.values() if name is not None]
+    assert len(named) == len(set(named))
+
+
+def test_upgrade_renames_duplicates_and_downgrade_restores_the_schema(database):
+    migrate("upgrade", BEFORE)
+    seeded = seed_duplicates(database)
+
+    migrate("upgrade", CAMPAIGNS_REVISION)
+    assert_duplicates_renamed(database, seeded)
+    schema = inspect(database)
+    assert {"campaigns_name_key"} <= {constraint["name"] for constraint in schema.get_unique_constraints("campaigns")}
+    assert {"ix_campaigns_created_at_uuid", "ix_campaigns_updated_at"} <= {
+        index["name"] for index in schema.get_indexes("campaigns")
+    }
+    with database.begin() as conn:
+        # Horodatage fourni par la base
+        created = insert_campaign(conn, "Nouvelle")
+        row = conn.execute(
+            text("SELECT created_at, updated_at FROM campaigns WHERE uuid = :uuid"), {"uuid": created}
+        ).one()
+        assert row.created_at is not None and row.updated_at is not None
+    with pytest.raises(IntegrityError):
+        with database.begin() as conn:
+            insert_campaign(conn, "Paie")
+
+    migrate("downgrade", BEFORE)
+    schema = inspect(database)
+    assert "campaigns_name_key" not in {constraint["name"] for constraint in schema.get_unique_constraints("campaigns")}
+    assert not {"ix_campaigns_created_at_uuid", "ix_campaigns_updated_at"} & {
+        index["name"] for index in schema.get_indexes("campaigns")
+    }
+    with pytest.raises(IntegrityError):
+        with database.begin() as conn:
+            insert_campaign(conn, "Sans horodatage")
+    # Sans la contrainte, les doublons sont de nouveau acceptés : la migration les renomme encore
+    with database.begin() as conn:
+        duplicate = insert_campaign(conn, "Paie", datetime(2026, 1, 1, tzinfo=timezone.utc))
+    migrate("upgrade", CAMPAIGNS_REVISION)
+    assert campaign_names(database)[duplicate] == f"Paie ({str(duplicate)[:8]})"
@@ -0,0 +1,67 @@
+import io
+
+import pytest
+
+from app.core.engines import ENGINES
+from app.core.sniffing import Utf8FallbackReader, sniff_dialect, tolerant_source
+
+# Début de fichier purement ASCII, plus long que les extraits analysés et que les tampons de lecture
+ASCII_HEAD = b"a,b,c\n" + b"".join(b"%d,x,y\n" % i for i in range(200_000))
+LATE_CP1252 = ASCII_HEAD + b"1,caf\xe9,\x81\n" + "2,déjà,z\n".encode("utf-8")
+
+
+def read_all(reader: io.RawIOBase, size: int) -> bytes:
+    output = bytearray()
+    buffer = bytearray(size)
+    while True:
+        count = reader.readinto(buffer)
+        if not count:
+            return bytes(output)
+        output += buffer[:count]
+
+
+def test_valid_utf8_is_passed_through_unchanged():
+    data = "a,b\né,€\n".encode("utf-8") * 1000
+    # Tampon de 3 octets : les séquences UTF-8 sont coupées entre deux lectures
+    reader = Utf8FallbackReader(io.BytesIO(data))
+    assert read_all(reader, 3) == data
+    assert reader.replaced == 0
+
+
+def test_late_cp1252_byte_is_transcoded():
+    reader = Utf8FallbackReader(io.BytesIO(LATE_CP1252))
+    text = read_all(reader, 64 * 1024).decode("utf-8")
+    assert text.endswith("1,café,\x81\n2,déjà,z\n")
+    assert reader.replaced == 2
+
+
+def test_truncated_sequence_at_end_is_transcoded():
+    reader = Utf8FallbackReader(io.BytesIO(b"a\n\xc3"))
+    assert read_all(reader, 1024) == "a\nÃ".encode("utf-8")
+
+
+def test_seek_to_start_restarts_the_stream():
+    reader = Utf8FallbackReader(io.BytesIO(b"x\xe9\ny\n"))
+    assert read_all(reader, 2) == "xé\ny\n".encode("utf-8")
+    assert reader.seek(0) == 0
+    assert reader.tell() == 0
+    assert read_all(reader, 1024) == "xé\ny\n".encode("utf-8")
+    with pytest.raises(io.UnsupportedOperation):
+        reader.seek(3)
+
+
+@pytest.mark.parametrize("engine_name", sorted(ENGINES))
+def test_engines_read_a_late_non_utf8_byte(engine_name):
+    dialect = sniff_dialect(LATE_CP1252[:64 * 1024])
+    assert dialect.encoding == "utf-8"
+    engine = ENGINES[engine_name]
+    source = io.BufferedReader(tolerant_source(io.BytesIO(LATE_CP1252), dialect))
+    rows = 0
+    last = None
+    for chunk in engine.read_chunks(source, 50_000, columns=["a", "b"], dialect=dialect):
+        frame = chunk if engine_name == "pandas" else chunk.to_pandas()
+        rows += len(frame)
+        if len(frame):
+            last = frame
+    assert rows == 200_002
+    assert list(last["b"].tail(2)) == ["café", "déjà"]
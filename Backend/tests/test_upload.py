@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, status
+from starlette.requests import Request
+
+from app.core.config import UPLOAD_SNIFF_BYTES
+from app.core.upload import receive_upload
+
+BOUNDARY = b"----limite"
+CSV = b"a;b\n" + b"".join(b"%d;x\n" % i for i in range(50_000))
+
+
+def multipart_body(data: bytes, filename: str = "f.csv", fields: dict[str, str] = None) -> bytes:
+    parts = [
+        b'--%s\r\nContent-Disposition: form-data; name="%s"\r\n\r\n%s\r\n' % (BOUNDARY, name.encode(), value.encode())
+        for name, value in (fields or {}).items()
+    ]
+    parts.append(
+        b'--%s\r\nContent-Disposition: form-data; name="file"; filename="%s"\r\n'
+        b"Content-Type: text/csv\r\n\r\n%s\r\n" % (BOUNDARY, filename.encode(), data)
+    )
+    return b"".join(parts) + b"--%s--\r\n" % BOUNDARY
+
+
+class ChunkedRequest:
+    """Requête ASGI dont le corps arrive en `chunks` ; compte les blocs effectivement lus."""
+
+    def __init__(self, chunks: list[bytes], headers: dict[str, str]):
+        self.chunks = chunks
+        self.received = 0
+        self.request = Request({
+            "type": "http",
+            "method": "POST",
+            "path": "/",
+            "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        }, self.receive)
+
+    async def receive(self) -> dict:
+        chunk = self.chunks[self.received]
+        self.received += 1
+        return {"type": "http.request", "body": chunk, "more_body": self.received < len(self.chunks)}
+
+
+def split(data: bytes, size: int) -> list[bytes]:
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+def multipart_request(body: bytes, size: int) -> ChunkedRequest:
+    return ChunkedRequest(split(body, size), {"content-type": f"multipart/form-data; boundary={BOUNDARY.decode()}"})
+
+
+def receive(request: ChunkedRequest, inspect=None):
+    async def run():
+        upload = await receive_upload(request.request, inspect=inspect)
+        content = None if upload.file.file.closed else await upload.file.read()
+        if content is not None:
+            await upload.file.close()
+        return upload, content
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("size", [1, 7, 69, 4096])
+def test_boundary_split_across_chunks(size):
+    data = CSV[:3000] if size == 1 else CSV
+    request = multipart_request(multipart_body(data, fields={"sheet": "Feuille 1"}), size)
+    upload, content = receive(request)
+    assert content == data
+    assert upload.file.filename == "f.csv"
+    assert upload.fields == {"sheet": "Feuille 1"}
+
+
+def test_file_is_inspected_on_the_same_head_as_the_sniffer():
+    heads = []
+    # La ligne d'en-tête arrive seule dans le premier bloc
+    request = multipart_request(multipart_body(CSV), 16)
+    upload, content = receive(request, inspect=lambda file, head: heads.append(head))
+    assert content == CSV
+    assert heads == [CSV[:UPLOAD_SNIFF_BYTES]]
+
+
+def test_short_file_is_inspected_whole():
+    heads = []
+    data = b"a;b\n1;2\n"
+    receive(multipart_request(multipart_body(data), 5), inspect=lambda file, head: heads.append(head))
+    assert heads == [data]
+
+
+def test_invalid_file_is_rejected_before_the_end_of_the_body():
+    def inspect(file, head):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="refusé")
+
+    data = CSV * 20
+    request = multipart_request(multipart_body(data), 4096)
+    with pytest.raises(HTTPException) as error:
+        receive(request, inspect=inspect)
+    assert error.value.detail == "refusé"
+    assert request.received * 4096 < UPLOAD_SNIFF_BYTES + 2 * 4096
+    assert request.received < len(request.chunks)
+
+
+def test_inspector_can_stop_reading_after_the_head():
+    request = multipart_request(multipart_body(CSV * 20), 4096)
+    upload, content = receive(request, inspect=lambda file, head: True)
+    assert content is None
+    assert upload.file.filename == "f.csv"
+    assert request.received < len(request.chunks)
+
+
+def test_raw_body_with_x_filename():
+    heads = []
+    request = ChunkedRequest(split(CSV, 1000), {"content-type": "text/csv", "x-filename": "export.csv"})
+    upload, content = receive(request, inspect=lambda file, head: heads.append(head))
+    assert content == CSV
+    assert upload.file.filename == "export.csv"
+    assert upload.fields == {}
+    assert heads == [CSV[:UPLOAD_SNIFF_BYTES]]
+
+
+def test_missing_file_field_is_rejected():
+    body = b'--%s\r\nContent-Disposition: form-data; name="sheet"\r\n\r\nx\r\n--%s--\r\n' % (BOUNDARY, BOUNDARY)
+    with pytest.raises(HTTPException) as error:
+        receive(multipart_request(body, 10))
+    assert error.value.status_code == status.HTTP_400_BAD_REQUEST
@@ -3,11 +3,11 @@ import { Plus, CreditCard as Edit2, Trash2 } from 'lucide-react';
 import LoadingSpinner from '../components/LoadingSpinner';
 import StatusMessage from '../components/StatusMessage';
 import CampaignModal from '../components/CampaignModal';
-import { Campaign } from '../types';
+import { Campaign, CampaignSummary } from '../types';
 import { campaignApi } from '../services/api';
 
 const AdminPage: React.FC = () => {
-  const [campaigns, setCampaigns] = useState<Campaign[]>([]);
+  const [campaigns, setCampaigns] = useState<CampaignSummary[]>([]);
   const [loading, setLoading] = useState(true);
   const [editingCampaign, setEditingCampaign] = useState<Campaign | null>(null);
   const [isModalOpen, setIsModalOpen] = useState(false);
@@ -21,10 +21,10 @@ const AdminPage: React.FC = () => {
   const loadCampaigns = async () => {
     try {
       setLoading(true);
-      const response = await campaignApi.getAll();
-      console.log("récupération des campagnes", response.data);
+      const campaigns = await campaignApi.getAll();
+      console.log("récupération des campagnes", campaigns);
        
-      setCampaigns(response.data);
+      setCampaigns(campaigns);
     } catch (error) {
       console.error('Erreur lors du chargement des campagnes:', error);
       setError('Impossible de charger les campagnes.');
@@ -49,13 +49,25 @@ const AdminPage: React.FC = () => {
     setSuccess(null);
   };
 
-  const handleEditCampaign = (campaign: Campaign) => {
-    setEditingCampaign(campaign);
-    setIsModalOpen(true);
+  const handleEditCampaign = async (campaign: CampaignSummary) => {
     setError(null);
     setSuccess(null);
+    try {
+      // La liste ne contient pas les colonnes : la campagne complète est chargée à l'ouverture
+      const response = await campaignApi.get(campaign.uuid);
+      setEditingCampaign(response.data);
+      setIsModalOpen(true);
+    } catch (error) {
+      console.error(error);
+      setError('Impossible de charger la campagne.');
+    }
   };
 
+  const toSummary = (campaign: Campaign): CampaignSummary => ({
+    ...campaign,
+    field_count: campaign.fields.length,
+  });
+
   const handleSaveCampaign = async (campaignToSave: Campaign) => {
     if (!campaignToSave.name.trim()) {
       setError('Le nom de la campagne est requis');
@@ -67,13 +79,13 @@ const AdminPage: React.FC = () => {
         // --- APPEL RÉEL POUR LA CRÉATION ---
         const {...creationData } = campaignToSave;
         const response = await campaignApi.create(creationData);
-        setCampaigns(prev => [...prev, response.data]);
+        setCampaigns(prev => [...prev, toSummary(response.data)]);
         setSuccess('Campagne créée avec succès');
       } else {
         // --- APPEL RÉEL POUR LA MISE À JOUR ---
         const response = await campaignApi.update(campaignToSave.uuid, campaignToSave);
         setCampaigns(prev =>
-          prev.map(c => (c.uuid === campaignToSave.uuid ? response.data : c))
+          prev.map(c => (c.uuid === campaignToSave.uuid ? toSummary(response.data) : c))
         );
         setSuccess('Campagne mise à jour avec succès');
       }
@@ -156,7 +168,7 @@ const AdminPage: React.FC = () => {
                   <h3 className="font-medium text-gray-900">{campaign.name}</h3>
                   <p className="text-sm text-gray-500 mt-1">{campaign.description}</p>
                   <p className="text-xs text-gray-400 mt-2">
-                    {campaign.fields?.length} colonnes configurées
+                    {campaign.field_count} colonnes configurées
                   </p>
                 </div>
                 <div className="flex items-center space-x-2 ml-4">
@@ -1,18 +1,20 @@
 import React, { useState, useEffect } from 'react';
 import { Download, Trash } from 'lucide-react';
-import * as XLSX from 'xlsx';
 import DragDropZone from '../components/DragDropZone';
 import LoadingSpinner from '../components/LoadingSpinner';
 import StatusMessage from '../components/StatusMessage';
-import { Campaign, UploadState } from '../types';
+import { CampaignSummary, UploadState } from '../types';
 import { campaignApi, fileApi } from '../services/api';
+import { parseSheetsHeader, readXlsxSheetNames } from '../utils/workbook';
 
 const EndUserPage: React.FC = () => {
-  const [campaigns, setCampaigns] = useState<Campaign[]>([]);
+  const [campaigns, setCampaigns] = useState<CampaignSummary[]>([]);
   const [selectedCampaignId, setSelectedCampaignId] = useState<string>('');
   const [selectedFile, setSelectedFile] = useState<File | null>(null);
   const [outputFilename, setOutputFilename] = useState<string>('');
-  const [isConverting, setIsConverting] = useState(false);
+  const [isReadingSheets, setIsReadingSheets] = useState(false);
+  const [sheets, setSheets] = useState<string[]>([]);
+  const [selectedSheet, setSelectedSheet] = useState<string>('');
   const [uploadState, setUploadState] = useState<UploadState>({
     isUploading: false,
     success: false,
@@ -46,6 +48,8 @@ const EndUserPage: React.FC = () => {
 
   const handleDelete = () => {
     setSelectedFile(null);
+    setSheets([]);
+    setSelectedSheet('');
     setUploadState({ isUploading: false, success: false, error: null, progress: 0 });
   };
 
@@ -53,8 +57,7 @@ const EndUserPage: React.FC = () => {
     try {
       setLoadingCampaigns(true);
       // Remplacé par le vrai appel API
-      const response = await campaignApi.getAll();
-      setCampaigns(response.data);
+      setCampaigns(await campaignApi.getAll());
     } catch (error) {
       console.error('Erreur lors du chargement des campagnes:', error);
       setUploadState(prev => ({ ...prev, error: "Impossible de charger les campagnes depuis le serveur."}));
@@ -64,8 +67,10 @@ const EndUserPage: React.FC = () => {
     }
   };
 
-  const handleFileDrop = (file: File) => {
+  const handleFileDrop = async (file: File) => {
     setUploadState({ isUploading: false, success: false, error: null, progress: 0 });
+    setSheets([]);
+    setSelectedSheet('');
     const extension = file.name.split('.').pop()?.toLowerCase();
 
     if (extension === 'csv') {
@@ -74,31 +79,22 @@ const EndUserPage: React.FC = () => {
     }
 
     if (extension === 'xlsx' || extension === 'xls') {
-      setIsConverting(true);
-      const reader = new FileReader();
-      reader.onload = (e) => {
+      // Le classeur n'est envoyé qu'une fois, pour le traitement : les feuilles d'un .xlsx sont lues
+      // dans le navigateur, celles d'un .xls sont renvoyées par le backend avec le résultat
+      setSelectedFile(file);
+      if (extension === 'xlsx') {
+        setIsReadingSheets(true);
         try {
-          const data = e.target?.result;
-          const workbook = XLSX.read(data, { type: 'array' });
-          const firstSheetName = workbook.SheetNames[0];
-          const worksheet = workbook.Sheets[firstSheetName];
-          const csvData = XLSX.utils.sheet_to_csv(worksheet);
-          
-          const newFileName = file.name.replace(/\.(xlsx|xls)$/i, '.csv');
-          const csvFile = new File([csvData], newFileName, { type: 'text/csv' });
-          
-          setSelectedFile(csvFile);
-        } catch (err) {
-            setUploadState(prev => ({ ...prev, error: "Erreur lors de la conversion du fichier Excel."}));
+          const workbookSheets = await readXlsxSheetNames(file);
+          setSheets(workbookSheets);
+          setSelectedSheet(workbookSheets[0] ?? '');
+        } catch (error) {
+          // Archive non lisible ici : la première feuille est traitée, les autres sont proposées ensuite
+          console.warn('Lecture des feuilles du classeur impossible dans le navigateur:', error);
         } finally {
-            setIsConverting(false);
+          setIsReadingSheets(false);
         }
-      };
-      reader.onerror = () => {
-        setUploadState(prev => ({ ...prev, error: "Impossible de lire le fichier."}));
-        setIsConverting(false);
       }
-      reader.readAsArrayBuffer(file);
       return;
     }
 
@@ -119,7 +115,7 @@ const EndUserPage: React.FC = () => {
 
     try {
       // --- APPEL BACKEND RÉEL ---
-      const response = await fileApi.processCSV(selectedFile, selectedCampaignId);
+      const response = await fileApi.processCSV(selectedFile, selectedCampaignId, selectedSheet || undefined);
       
       const blob = new Blob([response.data], { type: 'text/csv' });
       const url = window.URL.createObjectURL(blob);
@@ -134,6 +130,15 @@ const EndUserPage: React.FC = () => {
 
       setUploadState({ isUploading: false, success: true, error: null, progress: 100 });
 
+      // Feuilles inconnues avant l'envoi (.xls) : la première a été traitée, le fichier est
+      // conservé pour pouvoir en choisir une autre
+      const workbookSheets = parseSheetsHeader(response.headers['x-excel-sheets']);
+      if (sheets.length === 0 && workbookSheets.length > 1) {
+        setSheets(workbookSheets);
+        setSelectedSheet(workbookSheets[0]);
+        return;
+      }
+
       setTimeout(() => {
         setSelectedFile(null);
         setUploadState({ isUploading: false, success: false, error: null, progress: 0 });
@@ -202,16 +207,16 @@ const EndUserPage: React.FC = () => {
 
         <div className="bg-white shadow rounded-lg p-6">
           <h2 className="text-xl font-semibold text-gray-900 mb-4">2. Uploadez votre fichier</h2>
-          <DragDropZone onFileDrop={handleFileDrop} disabled={!selectedCampaignId || uploadState.isUploading || isConverting} />
+          <DragDropZone onFileDrop={handleFileDrop} disabled={!selectedCampaignId || uploadState.isUploading || isReadingSheets} />
           
-          {isConverting && (
+          {isReadingSheets && (
             <div className="mt-4 flex items-center justify-center text-gray-600">
               <LoadingSpinner />
-              <span className="ml-2">Conversion du fichier Excel en cours...</span>
+              <span className="ml-2">Lecture des feuilles du fichier Excel...</span>
             </div>
           )}
 
-          {selectedFile && !isConverting && (
+          {selectedFile && !isReadingSheets && (
             <div className="mt-4 p-4 bg-gray-50 rounded-md">
               <div className="flex items-center justify-between">
                 <div>
@@ -224,6 +229,21 @@ const EndUserPage: React.FC = () => {
                   </div>
                 )}
               </div>
+              {sheets.length > 1 && (
+                <div className="mt-3">
+                  <label className="block text-sm font-medium text-gray-700 mb-1">Feuille à traiter</label>
+                  <select
+                    value={selectedSheet}
+                    onChange={(e) => setSelectedSheet(e.target.value)}
+                    disabled={uploadState.isUploading}
+                    className="w-full border border-gray-300 rounded-md px-3 py-2 focus:ring-blue-500 focus:border-blue-500"
+                  >
+                    {sheets.map((sheet) => (
+                      <option key={sheet} value={sheet}>{sheet}</option>
+                    ))}
+                  </select>
+                </div>
+              )}
             </div>
           )}
         </div>
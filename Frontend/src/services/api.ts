@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { Campaign, UserCredentials } from '../types';
+import { Campaign, CampaignPage, CampaignSummary, UserCredentials } from '../types';
 
 // URL de base de votre API backend. Assurez-vous que votre backend tourne sur le port 8000.
 const API_BASE_URL = 'http://localhost:8000/api';
@@ -37,8 +37,23 @@ export const authApi = {
 };
 
 // --- API des Campagnes (maintenant réelle) ---
+const getCampaignPage = (cursor?: string | null, limit?: number) =>
+  api.get<CampaignPage>('/campaigns', { params: { cursor: cursor || undefined, limit } });
+
 export const campaignApi = {
-  getAll: () => api.get<Campaign[]>('/campaigns'), 
+  getPage: getCampaignPage,
+  // Parcourt toutes les pages de la liste (résumés, sans les colonnes)
+  getAll: async (): Promise<CampaignSummary[]> => {
+    const campaigns: CampaignSummary[] = [];
+    let cursor: string | null = null;
+    do {
+      const { data }: { data: CampaignPage } = await getCampaignPage(cursor);
+      campaigns.push(...data.items);
+      cursor = data.next_cursor;
+    } while (cursor);
+    return campaigns;
+  },
+  get: (id: string) => api.get<Campaign>(`/campaigns/${id}`),
   create: (campaignData: Campaign) => api.post<Campaign>('/campaigns', campaignData),
   update: (id: string, campaignData: Partial<Campaign>) => api.put<Campaign>(`/campaigns/${id}`, campaignData),
   delete: (id: string) => api.delete(`/campaigns/${id}`),
@@ -46,7 +61,7 @@ export const campaignApi = {
 
 // --- API de Traitement de Fichier (maintenant réelle) ---
 export const fileApi = {
-  processCSV: (file: File, campaignId: string) => {
+  processCSV: (file: File, campaignId: string, sheet?: string) => {
     const formData = new FormData();
     formData.append('file', file);
     console.log(campaignId);
@@ -57,6 +72,7 @@ export const fileApi = {
       headers: {
         'Content-Type': 'multipart/form-data',
       },
+      params: sheet ? { sheet } : undefined, // Feuille à traiter pour un fichier Excel
       responseType: 'blob', // Important pour recevoir le fichier en retour
     });
   },
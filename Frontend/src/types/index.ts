@@ -23,6 +23,17 @@ export interface Campaign {
   outputFilenameTemplate: string; // Ajout de cette ligne
 }
 
+// Campagne telle que renvoyée par la liste : sans la configuration des colonnes
+export interface CampaignSummary extends Omit<Campaign, 'fields'> {
+  field_count: number;
+  fields?: ColumnConfig[] | null;
+}
+
+export interface CampaignPage {
+  items: CampaignSummary[];
+  next_cursor: string | null;
+}
+
 export interface UploadState {
   isUploading: boolean;
   success: boolean;
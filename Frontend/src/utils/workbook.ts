@@ -0,0 +1,86 @@
+// Lecture des feuilles d'un classeur .xlsx dans le navigateur, sans l'envoyer au serveur.
+// Seuls la fin de l'archive zip (répertoire central) et l'entrée xl/workbook.xml sont lus :
+// le coût ne dépend pas de la taille du classeur.
+
+const END_OF_DIRECTORY_SIGNATURE = 0x06054b50;
+const DIRECTORY_ENTRY_SIGNATURE = 0x02014b50;
+const LOCAL_HEADER_SIGNATURE = 0x04034b50;
+// Fin de répertoire central : 22 octets, suivis d'un commentaire de 65 535 octets au plus
+const END_OF_DIRECTORY_MAX_SIZE = 22 + 0xffff;
+const WORKBOOK_ENTRY = 'xl/workbook.xml';
+
+const readView = async (file: Blob, start: number, end: number): Promise<DataView> =>
+  new DataView(await file.slice(start, end).arrayBuffer());
+
+const inflate = (data: Blob): Promise<string> =>
+  new Response(data.stream().pipeThrough(new DecompressionStream('deflate-raw'))).text();
+
+const parseSheetNames = (xml: string): string[] => {
+  const workbook = new DOMParser().parseFromString(xml, 'application/xml');
+  return Array.from(workbook.getElementsByTagNameNS('*', 'sheet'))
+    .map((sheet) => sheet.getAttribute('name') ?? '')
+    .filter((name) => name !== '');
+};
+
+/**
+ * Retourne le nom des feuilles d'un classeur .xlsx, dans l'ordre du classeur.
+ * Lève une erreur si l'archive n'est pas lisible ici (zip64, compression inconnue, etc.) :
+ * l'appelant peut alors laisser le serveur lister les feuilles.
+ */
+export const readXlsxSheetNames = async (file: File): Promise<string[]> => {
+  const tailStart = Math.max(0, file.size - END_OF_DIRECTORY_MAX_SIZE);
+  const tail = await readView(file, tailStart, file.size);
+  let end = -1;
+  for (let offset = tail.byteLength - 22; offset >= 0; offset--) {
+    if (tail.getUint32(offset, true) === END_OF_DIRECTORY_SIGNATURE) {
+      end = offset;
+      break;
+    }
+  }
+  if (end < 0) {
+    throw new Error('Archive xlsx invalide');
+  }
+  const entryCount = tail.getUint16(end + 10, true);
+  const directorySize = tail.getUint32(end + 12, true);
+  const directoryOffset = tail.getUint32(end + 16, true);
+  const directory = await readView(file, directoryOffset, directoryOffset + directorySize);
+  const decoder = new TextDecoder();
+
+  let position = 0;
+  for (let index = 0; index < entryCount; index++) {
+    if (directory.getUint32(position, true) !== DIRECTORY_ENTRY_SIGNATURE) {
+      throw new Error('Répertoire de l\'archive xlsx invalide');
+    }
+    const method = directory.getUint16(position + 10, true);
+    const compressedSize = directory.getUint32(position + 20, true);
+    const nameLength = directory.getUint16(position + 28, true);
+    const extraLength = directory.getUint16(position + 30, true);
+    const commentLength = directory.getUint16(position + 32, true);
+    const localOffset = directory.getUint32(position + 42, true);
+    const name = decoder.decode(
+      new Uint8Array(directory.buffer, directory.byteOffset + position + 46, nameLength),
+    );
+
+    if (name === WORKBOOK_ENTRY) {
+      const local = await readView(file, localOffset, localOffset + 30);
+      if (local.getUint32(0, true) !== LOCAL_HEADER_SIGNATURE) {
+        throw new Error('Entrée de l\'archive xlsx invalide');
+      }
+      const dataStart = localOffset + 30 + local.getUint16(26, true) + local.getUint16(28, true);
+      const data = file.slice(dataStart, dataStart + compressedSize);
+      if (method === 0) {
+        return parseSheetNames(await data.text());
+      }
+      if (method === 8) {
+        return parseSheetNames(await inflate(data));
+      }
+      throw new Error('Compression de l\'archive xlsx non prise en charge');
+    }
+    position += 46 + nameLength + extraLength + commentLength;
+  }
+  throw new Error(`${WORKBOOK_ENTRY} introuvable dans l'archive`);
+};
+
+// Décode l'en-tête X-Excel-Sheets renvoyé par /process pour un classeur Excel
+export const parseSheetsHeader = (header: string | undefined): string[] =>
+  header ? header.split(',').map((name) => decodeURIComponent(name)) : [];